@@ -0,0 +1,311 @@
+"""Cash-flow time series and forecast.
+
+For the time series the database returns one compact row per day with transactions (day
+number, income, expense), read with an index-only scan of
+idx_transactions_user_date_id; resampling to weeks or months, running
+balance, rolling average and year-over-year deltas are then computed with
+NumPy array operations instead of Python loops over rows.
+
+The forecast expands recurring schedules into date/amount arrays and adds
+them, with the historical per-category averages, to the account balances
+with np.add.at and a cumulative sum.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+GRANULARITIES = ("day", "week", "month")
+# Periods between a period and the same period one year earlier
+YEAR_LAG = {"day": 365, "week": 52, "month": 12}
+
+EPOCH = date(1970, 1, 1)
+
+
+def user_today(timezone: Optional[str]) -> date:
+    """Current date in the user's timezone (server date if it is unknown)."""
+    try:
+        return datetime.now(ZoneInfo(timezone)).date() if timezone else date.today()
+    except (ZoneInfoNotFoundError, ValueError):
+        return date.today()
+
+
+def _periods(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Period number of every day number (days since 1970-01-01)."""
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        # 1970-01-01 is a Thursday; weeks start on Monday
+        return (days + 3) // 7
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _period_starts(periods: np.ndarray, granularity: str) -> np.ndarray:
+    """First day (datetime64[D]) of every period number."""
+    if granularity == "day":
+        return periods.astype("datetime64[D]")
+    if granularity == "week":
+        return (periods * 7 - 3).astype("datetime64[D]")
+    return periods.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _day_number(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def period_start(value: date, granularity: str) -> date:
+    period = _periods(np.array([_day_number(value)]), granularity)
+    return _period_starts(period, granularity)[0].item()
+
+
+def _add_months(value: date, months: int) -> date:
+    """Same day ``months`` later (or earlier), clamped to the month length."""
+    month = np.datetime64(value, "M") + months
+    month_days = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype(np.int64)
+    return (month.astype("datetime64[D]") + min(value.day, int(month_days)) - 1).item()
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each value and the window - 1 before it (NaN until the window fills)."""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    result = np.full(values.shape, np.nan)
+    result[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return result
+
+
+def _lagged_delta(values: np.ndarray, lag: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    result[lag:] = values[lag:] - values[:-lag]
+    return result
+
+
+def _to_list(values: np.ndarray) -> list:
+    return [None if np.isnan(value) else value for value in np.round(values, 2).tolist()]
+
+
+def default_range(timezone: Optional[str], start_date: Optional[date], end_date: Optional[date]):
+    """(start, end) with the end defaulting to today in the user's timezone
+    and the start to one year before it."""
+    end = end_date or user_today(timezone)
+    return start_date or end - timedelta(days=364), end
+
+
+def cash_flow(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    granularity: str,
+    window: int
+) -> dict:
+    """Income, expense, net and running balance per period, with the rolling
+    average of net over ``window`` periods and year-over-year deltas.
+    
+    ``start_date`` is aligned down to the start of its period so the first
+    period is complete. The balance covers all the user's accounts: their
+    opening balances plus every income and expense up to the period end.
+    """
+    start = period_start(start_date, granularity)
+    lag = YEAR_LAG[granularity]
+    # Earlier periods needed for the year-over-year deltas and the first windows
+    history = max(lag, window - 1)
+    first_period = int(_periods(np.array([_day_number(start)]), granularity)[0]) - history
+    last_period = int(_periods(np.array([_day_number(end_date)]), granularity)[0])
+    fetch_start = _period_starts(np.array([first_period]), granularity)[0].item()
+    
+    rows = db.execute(text("""
+        SELECT t.date - DATE '1970-01-01' AS day,
+               COALESCE(SUM(t.amount) FILTER (WHERE t.type = 'income'), 0)::FLOAT8 AS income,
+               COALESCE(SUM(t.amount) FILTER (WHERE t.type = 'expense'), 0)::FLOAT8 AS expense
+        FROM transactions t
+        WHERE t.user_id = :user_id
+          AND t.date BETWEEN :start_date AND :end_date
+          AND t.type <> 'transfer'
+        GROUP BY t.date
+    """), {"user_id": user_id, "start_date": fetch_start, "end_date": end_date}).all()
+    opening = db.execute(text("""
+        SELECT
+            (SELECT COALESCE(SUM(opening_balance), 0) FROM accounts WHERE user_id = :user_id)
+          + (SELECT COALESCE(SUM(CASE type WHEN 'income' THEN amount ELSE -amount END), 0)
+             FROM transactions
+             WHERE user_id = :user_id AND date < :start_date AND type <> 'transfer')
+    """), {"user_id": user_id, "start_date": fetch_start}).scalar()
+    
+    count = last_period - first_period + 1
+    income = np.zeros(count)
+    expense = np.zeros(count)
+    if rows:
+        days, day_income, day_expense = (np.array(column) for column in zip(*rows))
+        index = _periods(days.astype(np.int64), granularity) - first_period
+        income = np.bincount(index, weights=day_income, minlength=count)
+        expense = np.bincount(index, weights=day_expense, minlength=count)
+    net = income - expense
+    balance = float(opening) + np.cumsum(net)
+    
+    shown = slice(history, count)
+    series = {
+        "income": income,
+        "expense": expense,
+        "net": net,
+        "balance": balance,
+        "net_rolling_avg": _rolling_mean(net, window),
+        "income_yoy_delta": _lagged_delta(income, lag),
+        "expense_yoy_delta": _lagged_delta(expense, lag),
+        "net_yoy_delta": _lagged_delta(net, lag),
+    }
+    columns = {name: _to_list(values[shown]) for name, values in series.items()}
+    starts = _period_starts(np.arange(first_period, last_period + 1), granularity)[shown].tolist()
+    return {
+        "granularity": granularity,
+        "start_date": start,
+        "end_date": end_date,
+        "window": window,
+        "points": [
+            {"period_start": period, **dict(zip(columns, values))}
+            for period, *values in zip(starts, *columns.values())
+        ],
+    }
+
+
+# Forecast
+DAY_STEPS = {"daily": 1, "weekly": 7}
+MONTH_STEPS = {"monthly": 1, "yearly": 12}
+
+
+def expand_schedules(
+    start_dates: np.ndarray,
+    first_numbers: np.ndarray,
+    day_steps: np.ndarray,
+    month_steps: np.ndarray,
+    limits: np.ndarray
+):
+    """All occurrences of recurring schedules up to their limits.
+
+    Each schedule has either a step in days (daily, weekly) or in months
+    (monthly, yearly). Occurrence n is counted from the schedule's
+    start_date, starting at ``first_numbers`` (its occurrence_count); month
+    steps keep the day of month of start_date and clamp it to the month
+    length, like recurring_occurrence() in SQL, so a clamped date does not
+    shift the ones after it. Returns (schedule index, date) arrays of every
+    occurrence.
+    """
+    start_months = start_dates.astype("datetime64[M]")
+    by_days = (limits - start_dates).astype(np.int64) // np.maximum(day_steps, 1) + 1
+    by_months = (limits.astype("datetime64[M]") - start_months).astype(np.int64) // np.maximum(month_steps, 1) + 1
+    counts = np.clip(np.where(month_steps > 0, by_months, by_days) - first_numbers, 0, None)
+    
+    schedule = np.repeat(np.arange(len(start_dates)), counts)
+    # Occurrence number within its schedule: first_numbers ... first_numbers + counts - 1
+    n = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + first_numbers[schedule]
+    
+    months = start_months[schedule] + n * month_steps[schedule]
+    month_days = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+    day_of_month = (start_dates[schedule] - start_months[schedule].astype("datetime64[D]")).astype(np.int64)
+    dates = np.where(
+        month_steps[schedule] > 0,
+        months.astype("datetime64[D]") + np.minimum(day_of_month, month_days - 1),
+        start_dates[schedule] + n * day_steps[schedule]
+    )
+    # Month counts are an upper bound (clamped days), drop what passed the limit
+    keep = dates <= limits[schedule]
+    return schedule[keep], dates[keep]
+
+
+def forecast(db: Session, user_id: int, today: date, months: int, history_months: int) -> dict:
+    """Projected daily balance of every active account for ``months`` months.
+    
+    Active recurring schedules are expanded to their dates and amounts;
+    occurrences already due but not yet materialised are counted on the
+    first day. On top, every account drifts by its daily average of
+    non-recurring income and expense per category over the last
+    ``history_months`` months.
+    """
+    first = today + timedelta(days=1)
+    last = _add_months(today, months)
+    history_start = _add_months(today, -history_months) + timedelta(days=1)
+    history_days = (today - history_start).days + 1
+    
+    accounts = db.execute(text("""
+        SELECT id, name, balance::FLOAT8 AS balance
+        FROM accounts
+        WHERE user_id = :user_id AND is_active = TRUE
+        ORDER BY id
+    """), {"user_id": user_id}).all()
+    schedules = db.execute(text("""
+        SELECT account_id,
+               CASE type WHEN 'income' THEN amount WHEN 'expense' THEN -amount ELSE 0 END::FLOAT8 AS amount,
+               interval, start_date, occurrence_count,
+               LEAST(COALESCE(end_date, :last), :last) AS until
+        FROM recurring_transactions
+        WHERE user_id = :user_id AND is_active = TRUE AND type <> 'transfer'
+    """), {"user_id": user_id, "last": last}).all()
+    baseline = db.execute(text("""
+        SELECT t.account_id, t.category_id, c.name AS category_name,
+               SUM(CASE t.type WHEN 'income' THEN t.amount ELSE -t.amount END)::FLOAT8 AS amount
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        WHERE t.user_id = :user_id
+          AND t.date BETWEEN :start_date AND :end_date
+          AND t.type <> 'transfer'
+          AND t.recurring_transaction_id IS NULL
+        GROUP BY t.account_id, t.category_id, c.name
+    """), {"user_id": user_id, "start_date": history_start, "end_date": today}).all()
+    
+    positions = {account.id: position for position, account in enumerate(accounts)}
+    day_count = (last - first).days + 1
+    deltas = np.zeros((len(accounts), day_count))
+    
+    schedules = [row for row in schedules if row.account_id in positions]
+    if schedules:
+        account_index, amounts, intervals, start_dates, first_numbers, limits = (
+            list(column) for column in zip(*schedules)
+        )
+        schedule, dates = expand_schedules(
+            np.array(start_dates, dtype="datetime64[D]"),
+            np.array(first_numbers, dtype=np.int64),
+            np.array([DAY_STEPS.get(interval, 0) for interval in intervals]),
+            np.array([MONTH_STEPS.get(interval, 0) for interval in intervals]),
+            np.array(limits, dtype="datetime64[D]")
+        )
+        days = np.maximum((dates - np.datetime64(first, "D")).astype(np.int64), 0)
+        rows = np.array([positions[account_id] for account_id in account_index])[schedule]
+        np.add.at(deltas, (rows, days), np.array(amounts)[schedule])
+    
+    daily_baseline = np.zeros(len(accounts))
+    categories = {}
+    for row in baseline:
+        daily = row.amount / history_days
+        if row.account_id in positions:
+            daily_baseline[positions[row.account_id]] += daily
+        category = categories.setdefault(row.category_id, {
+            "category_id": row.category_id, "category_name": row.category_name, "daily_amount": 0.0
+        })
+        category["daily_amount"] += daily
+    deltas += daily_baseline[:, None]
+    
+    current = np.array([account.balance for account in accounts])
+    balances = current[:, None] + np.cumsum(deltas, axis=1)
+    return {
+        "start_date": first,
+        "end_date": last,
+        "history_months": history_months,
+        "dates": np.arange(np.datetime64(first, "D"), np.datetime64(last, "D") + 1).tolist(),
+        "total": np.round(balances.sum(axis=0), 2).tolist(),
+        "accounts": [
+            {
+                "account_id": account.id,
+                "name": account.name,
+                "current_balance": account.balance,
+                "daily_baseline": round(float(daily_baseline[position]), 2),
+                "balances": np.round(balances[position], 2).tolist(),
+            }
+            for position, account in enumerate(accounts)
+        ],
+        "category_baseline": sorted(
+            ({**category, "daily_amount": round(category["daily_amount"], 2)} for category in categories.values()),
+            key=lambda category: category["daily_amount"]
+        ),
+    }
@@ -0,0 +1,52 @@
+"""Async read operations used by the async routers (ASYNC_DATABASE)."""
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import crud, models
+
+
+# User
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    return await db.get(models.User, user_id)
+
+
+# Accounts
+async def get_account(db: AsyncSession, account_id: int, user_id: int) -> Optional[models.Account]:
+    result = await db.scalars(select(models.Account).where(
+        models.Account.id == account_id,
+        models.Account.user_id == user_id
+    ))
+    return result.first()
+
+
+async def get_accounts(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Account]:
+    result = await db.scalars(select(models.Account).where(
+        models.Account.user_id == user_id
+    ).offset(skip).limit(limit))
+    return result.all()
+
+
+# Transactions
+async def get_transaction(db: AsyncSession, transaction_id: int, user_id: int) -> Optional[models.Transaction]:
+    result = await db.scalars(
+        crud.transaction_select(user_id).where(models.Transaction.id == transaction_id)
+    )
+    return result.first()
+
+
+async def get_transactions(db: AsyncSession, user_id: int, **filters) -> List[models.Transaction]:
+    """Same filters and ordering as crud.get_transactions."""
+    result = await db.scalars(crud.transactions_select(user_id, **filters))
+    return result.all()
+
+
+async def search_transactions(db: AsyncSession, user_id: int, q: str, **filters) -> List[models.Transaction]:
+    """Same matching and ranking as crud.search_transactions."""
+    result = await db.scalars(crud.transactions_search_select(user_id, q, **filters))
+    return result.all()
+
+
+# Reports (database functions)
+async def fetch_all(db: AsyncSession, sql: str, params: dict) -> List[dict]:
+    result = await db.execute(text(sql), params)
+    return [dict(row) for row in result.mappings()]
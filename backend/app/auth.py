@@ -1,4 +1,5 @@
 """Authentication and authorization utilities."""
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,14 +7,34 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import user_cache
 from app.config import settings
-from app.database import get_db
-from app import crud, models
+from app.database import get_db, get_async_db
+from app import crud, async_crud, models
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Minimal view of the authenticated user kept in the user cache."""
+    id: int
+    is_active: bool
+    currency: str
+    timezone: Optional[str]
+    
+    @classmethod
+    def from_user(cls, user: models.User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            is_active=user.is_active,
+            currency=user.currency,
+            timezone=user.timezone
+        )
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -36,40 +57,75 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_user_id(token: str) -> int:
+    """Extract the user id from a JWT access token."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = crud.get_user(db, user_id=user_id)
+            raise _credentials_exception()
+        return int(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+
+def _cache_principal(user: Optional[models.User]) -> UserPrincipal:
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal = UserPrincipal.from_user(user)
+    user_cache.set(principal.id, principal)
+    return principal
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    """Get current authenticated user.
     
-    return user
+    The principal is served from the in-process user cache; the database is
+    only hit on a miss or after crud.update_user/deactivate_user invalidated it.
+    """
+    user_id = _decode_user_id(token)
+    principal = user_cache.get(user_id)
+    if principal is None:
+        principal = _cache_principal(crud.get_user(db, user_id=user_id))
+    return principal
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """Get current authenticated user using the async session."""
+    user_id = _decode_user_id(token)
+    principal = user_cache.get(user_id)
+    if principal is None:
+        principal = _cache_principal(await async_crud.get_user(db, user_id=user_id))
+    return principal
 
 
 async def get_current_active_user(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Get current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-
-
-
+async def get_current_active_user_async(
+    current_user: UserPrincipal = Depends(get_current_user_async)
+) -> UserPrincipal:
+    """Get current active user using the async session."""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
@@ -0,0 +1,139 @@
+"""In-process caches."""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Protocol
+
+from app.config import settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Authenticated user principals keyed by user id (see auth.get_current_user)
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the cached principal after the user row has changed."""
+    user_cache.delete(user_id)
+
+
+class CacheBackend(Protocol):
+    """Storage used by ReportCache; TTLCache is the in-process default.
+    
+    A shared store (e.g. a Redis adapter) with the same methods makes the
+    cache and the data versions common to all API workers.
+    """
+    
+    def get(self, key: str, default: Any = None) -> Any: ...
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None: ...
+    
+    def delete(self, key: str) -> None: ...
+    
+    def clear(self) -> None: ...
+
+
+class ReportCache:
+    """Per-user cache of report results with write-driven invalidation.
+    
+    Every user has a data version that crud drops on each write to
+    transactions, accounts, categories or budgets. Entries are keyed by the
+    version, so a write orphans all of the user's cached reports at once;
+    they age out of the LRU. The version is also part of the ETag, which
+    lets a conditional request be answered with 304 before the report is
+    computed or read. A version that expired or was evicted is replaced by
+    a new random one, so it can never match a stale entry or ETag.
+    """
+    
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+    
+    def version(self, user_id: int) -> str:
+        key = f"report-version:{user_id}"
+        version = self.backend.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(key, version)
+        return version
+    
+    def key(self, user_id: int, endpoint: str, params: dict) -> str:
+        """Cache key of a report; it changes with the user's data version."""
+        return "report:{}:{}:{}:{}".format(
+            user_id, self.version(user_id), endpoint,
+            json.dumps(params, sort_keys=True, default=str)
+        )
+    
+    @staticmethod
+    def etag(key: str) -> str:
+        return 'W/"{}"'.format(hashlib.sha1(key.encode()).hexdigest())
+    
+    def get(self, key: str) -> Any:
+        return self.backend.get(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, value)
+    
+    def invalidate(self, user_id: int) -> None:
+        """Start a new data version for the user."""
+        self.backend.delete(f"report-version:{user_id}")
+    
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+# Report endpoint results (see app.reports.cached_report)
+report_cache = ReportCache(TTLCache(
+    maxsize=settings.REPORT_CACHE_MAX_SIZE,
+    ttl=settings.REPORT_CACHE_TTL_SECONDS
+))
+
+
+def invalidate_reports(user_id: int) -> None:
+    """Drop the user's cached reports after their data has changed."""
+    report_cache.invalidate(user_id)
@@ -0,0 +1,141 @@
+"""Audit log partition maintenance.
+
+Creates the upcoming monthly partitions of audit_log and moves partitions
+older than the retention window out of the database: each one is detached,
+copied to ``<archive-dir>/<partition>.csv.gz`` and dropped.
+
+Usage:
+    python -m app.commands.audit_partitions [--months-ahead N]
+        [--retention-months N] [--archive-dir DIR] [--dry-run]
+
+Meant to run daily (cron or a scheduled container); every step is
+idempotent, and a partition left detached by an interrupted run is
+archived on the next one.
+"""
+import argparse
+import gzip
+import logging
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import List, Tuple
+
+from psycopg2 import sql
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r"^audit_log_p(\d{4})_(\d{2})$")
+
+
+def _months_before(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partitions(months_ahead: int) -> List[str]:
+    """Create missing monthly partitions up to months_ahead, return their names."""
+    with engine.begin() as conn:
+        return list(conn.execute(
+            text("SELECT create_audit_log_partitions(:months_ahead)"),
+            {"months_ahead": months_ahead}
+        ).scalars())
+
+
+def list_partitions() -> List[Tuple[str, date, bool]]:
+    """Monthly audit_log partitions as (name, month, attached), oldest first.
+    
+    Detached partitions that have not been archived yet are included.
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT relname, relispartition FROM pg_class "
+            "WHERE relkind = 'r' AND relname ~ '^audit_log_p[0-9]{4}_[0-9]{2}$'"
+        )).all()
+    partitions = []
+    for name, attached in rows:
+        match = PARTITION_NAME_RE.match(name)
+        partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1), attached))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def archive_partition(name: str, attached: bool, archive_dir: Path) -> Path:
+    """Detach a partition, copy it to a gzipped CSV file and drop it."""
+    table = sql.Identifier(name)
+    path = archive_dir / f"{name}.csv.gz"
+    tmp_path = path.with_suffix(".gz.tmp")
+    
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            if attached:
+                # No CONCURRENTLY: audit_log has a default partition
+                cur.execute(sql.SQL("ALTER TABLE audit_log DETACH PARTITION {}").format(table))
+                raw.commit()
+            
+            with gzip.open(tmp_path, "wb") as archive:
+                cur.copy_expert(
+                    sql.SQL("COPY {} TO STDOUT WITH (FORMAT csv, HEADER)").format(table).as_string(cur),
+                    archive
+                )
+            with open(tmp_path, "rb") as archive:
+                os.fsync(archive.fileno())
+            os.replace(tmp_path, path)
+            
+            cur.execute(sql.SQL("DROP TABLE {}").format(table))
+            raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return path
+
+
+def run(months_ahead: int, retention_months: int, archive_dir: Path, dry_run: bool = False) -> None:
+    cutoff = _months_before(date.today().replace(day=1), retention_months)
+    
+    if dry_run:
+        logger.info("Dry run: partitions would be created %d months ahead", months_ahead)
+    else:
+        for name in create_partitions(months_ahead):
+            logger.info("Created partition %s", name)
+    
+    expired = [p for p in list_partitions() if p[1] < cutoff]
+    if expired and not dry_run:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+    for name, month, attached in expired:
+        if dry_run:
+            logger.info("Dry run: %s (%s) would be archived", name, month.strftime("%Y-%m"))
+            continue
+        path = archive_partition(name, attached, archive_dir)
+        logger.info("Archived partition %s to %s", name, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain audit_log partitions.")
+    parser.add_argument(
+        "--months-ahead", type=int, default=settings.AUDIT_PARTITIONS_AHEAD,
+        help="create partitions up to this many months ahead"
+    )
+    parser.add_argument(
+        "--retention-months", type=int, default=settings.AUDIT_RETENTION_MONTHS,
+        help="archive partitions older than this many months"
+    )
+    parser.add_argument(
+        "--archive-dir", type=Path, default=Path(settings.AUDIT_ARCHIVE_DIR),
+        help="directory for the .csv.gz archives"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be done")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run(args.months_ahead, args.retention_months, args.archive_dir, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
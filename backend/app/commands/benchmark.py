@@ -0,0 +1,518 @@
+"""API load benchmark.
+
+Seeds a synthetic dataset of benchmark users (``bench<N>@bench.finflow``),
+then drives the main endpoints at a fixed concurrency and reports per
+endpoint p50/p95/p99 latency, throughput, error count and the number of
+SQL statements per request (from the X-DB-Query-Count header of
+app.instrumentation). Results are written as JSON, named after the time
+and the git commit, so runs of different commits can be compared.
+
+By default the app is called in-process over ASGI (no network);
+``--base-url`` targets a running server instead.
+
+Usage:
+    python -m app.commands.benchmark seed [--users N] [--transactions N] ...
+    python -m app.commands.benchmark run [--endpoints a,b] [--requests N]
+        [--concurrency N] [--base-url URL] [--compare FILE|latest]
+
+``run`` exits with status 1 when --compare finds a p95 regression above
+--regression-threshold.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.instrumentation import QUERY_COUNT_HEADER
+
+logger = logging.getLogger(__name__)
+
+BENCH_EMAIL_DOMAIN = "bench.finflow"
+BENCH_PASSWORD = "benchmark-password"
+BENCH_USERS = f"SELECT id FROM users WHERE email LIKE '%@{BENCH_EMAIL_DOMAIN}'"
+
+
+# Dataset
+@dataclass
+class DatasetConfig:
+    users: int = 100
+    accounts_per_user: int = 4
+    categories_per_user: int = 10
+    tags_per_user: int = 10
+    budgets_per_user: int = 3
+    transactions: int = 1_000_000
+    days: int = 730
+    tagged_share: float = 0.3
+    seed: float = 0.42
+
+
+def seed_dataset(config: DatasetConfig) -> Dict[str, int]:
+    """Replace the benchmark users' data with a fresh synthetic dataset.
+    
+    Everything is generated server-side with set-based INSERT ... SELECT.
+    Transactions are loaded with the transactions triggers disabled, then
+    balances and monthly totals are derived in bulk, so the dataset is
+    consistent without paying per-statement trigger and audit costs.
+    """
+    from app.auth import get_password_hash
+    
+    params = asdict(config)
+    params["password_hash"] = get_password_hash(BENCH_PASSWORD)
+    params["email_domain"] = BENCH_EMAIL_DOMAIN
+    started = time.perf_counter()
+    
+    with engine.begin() as conn:
+        conn.execute(text("SELECT setseed(:seed)"), params)
+        conn.execute(text("ALTER TABLE transactions DISABLE TRIGGER USER"))
+        conn.execute(text(f"DELETE FROM transactions WHERE user_id IN ({BENCH_USERS})"))
+        conn.execute(text(f"DELETE FROM users WHERE id IN ({BENCH_USERS})"))
+        conn.execute(
+            text("SELECT create_transaction_partitions(1, :years_back)"),
+            {"years_back": config.days // 365 + 1}
+        )
+    
+        conn.execute(text("""
+            INSERT INTO users (email, password_hash, full_name)
+            SELECT 'bench' || g || '@' || :email_domain, :password_hash, 'Benchmark user ' || g
+            FROM generate_series(1, :users) g
+        """), params)
+        conn.execute(text(f"""
+            INSERT INTO accounts (user_id, name, type)
+            SELECT u.id, 'Счет ' || g,
+                   (ARRAY['cash', 'debit_card', 'credit_card', 'deposit'])[1 + g % 4]::account_type
+            FROM ({BENCH_USERS}) u, generate_series(1, :accounts_per_user) g
+        """), params)
+        conn.execute(text(f"""
+            INSERT INTO categories (user_id, name, type)
+            SELECT u.id, 'Категория ' || g,
+                   (CASE WHEN g % 5 = 0 THEN 'income' ELSE 'expense' END)::category_type
+            FROM ({BENCH_USERS}) u, generate_series(1, :categories_per_user) g
+        """), params)
+        conn.execute(text(f"""
+            INSERT INTO tags (user_id, name)
+            SELECT u.id, 'тег' || g
+            FROM ({BENCH_USERS}) u, generate_series(1, :tags_per_user) g
+        """), params)
+        conn.execute(text(f"""
+            INSERT INTO budgets (user_id, category_id, amount, period, start_date)
+            SELECT c.user_id, c.id, ROUND((10000 + random() * 50000)::NUMERIC, 2), 'month',
+                   DATE_TRUNC('month', CURRENT_DATE)::DATE
+            FROM (
+                SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id) AS n
+                FROM categories
+                WHERE type = 'expense' AND user_id IN ({BENCH_USERS})
+            ) c
+            WHERE c.n <= :budgets_per_user
+        """), params)
+    
+        # Rows are spread round-robin over accounts; the category is picked
+        # among the account owner's categories
+        conn.execute(text(f"""
+            WITH acc AS (
+                SELECT ARRAY_AGG(id ORDER BY id) AS ids, ARRAY_AGG(user_id ORDER BY id) AS users
+                FROM accounts WHERE user_id IN ({BENCH_USERS})
+            ),
+            cat AS (
+                SELECT user_id, ARRAY_AGG(id ORDER BY id) AS ids, ARRAY_AGG(type ORDER BY id) AS types
+                FROM categories WHERE user_id IN ({BENCH_USERS})
+                GROUP BY user_id
+            ),
+            rows AS (
+                SELECT g,
+                       acc.ids[1 + g % CARDINALITY(acc.ids)] AS account_id,
+                       acc.users[1 + g % CARDINALITY(acc.ids)] AS user_id,
+                       1 + (random() * 1000000)::INTEGER AS pick
+                FROM acc, generate_series(1, :transactions) g
+            )
+            INSERT INTO transactions (account_id, user_id, category_id, amount, type, date, description, payee)
+            SELECT r.account_id, r.user_id,
+                   cat.ids[1 + r.pick % CARDINALITY(cat.ids)],
+                   ROUND((1 + random() * 5000)::NUMERIC, 2),
+                   cat.types[1 + r.pick % CARDINALITY(cat.ids)]::TEXT::transaction_type,
+                   CURRENT_DATE - (random() * :days)::INTEGER,
+                   'Покупка ' || r.g,
+                   'Магазин ' || r.pick % 500
+            FROM rows r
+            JOIN cat ON cat.user_id = r.user_id
+        """), params)
+        conn.execute(text(f"""
+            INSERT INTO transaction_tags (transaction_id, transaction_date, tag_id)
+            SELECT t.id, t.date, tg.ids[1 + (random() * (CARDINALITY(tg.ids) - 1))::INTEGER]
+            FROM transactions t
+            JOIN (
+                SELECT user_id, ARRAY_AGG(id ORDER BY id) AS ids
+                FROM tags WHERE user_id IN ({BENCH_USERS})
+                GROUP BY user_id
+            ) tg ON tg.user_id = t.user_id
+            WHERE random() < :tagged_share
+        """), params)
+    
+        # Opening balances large enough to keep every balance non-negative
+        conn.execute(text(f"""
+            UPDATE accounts a
+            SET opening_balance = s.opening,
+                balance = s.opening + s.delta
+            FROM (
+                SELECT a2.id,
+                       COALESCE(SUM(CASE t.type WHEN 'income' THEN t.amount
+                                                WHEN 'expense' THEN -t.amount
+                                                ELSE 0 END), 0) AS delta,
+                       GREATEST(0, -COALESCE(SUM(CASE t.type WHEN 'income' THEN t.amount
+                                                             WHEN 'expense' THEN -t.amount
+                                                             ELSE 0 END), 0)) + 1000 AS opening
+                FROM accounts a2
+                LEFT JOIN transactions t ON t.account_id = a2.id AND t.user_id = a2.user_id
+                WHERE a2.user_id IN ({BENCH_USERS})
+                GROUP BY a2.id
+            ) s
+            WHERE a.id = s.id
+        """))
+        conn.execute(text(f"SELECT rebuild_monthly_category_totals(u.id) FROM ({BENCH_USERS}) u"))
+        conn.execute(text("ALTER TABLE transactions ENABLE TRIGGER USER"))
+    
+        counts = dict(conn.execute(text(f"""
+            SELECT 'users', COUNT(*) FROM ({BENCH_USERS}) u
+            UNION ALL SELECT 'accounts', COUNT(*) FROM accounts WHERE user_id IN ({BENCH_USERS})
+            UNION ALL SELECT 'transactions', COUNT(*) FROM transactions WHERE user_id IN ({BENCH_USERS})
+            UNION ALL SELECT 'transaction_tags', COUNT(*) FROM transaction_tags tt
+                JOIN tags tg ON tg.id = tt.tag_id WHERE tg.user_id IN ({BENCH_USERS})
+            UNION ALL SELECT 'budgets', COUNT(*) FROM budgets WHERE user_id IN ({BENCH_USERS})
+        """)).all())
+    
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    logger.info("Seeded %s in %.1fs", counts, time.perf_counter() - started)
+    return counts
+
+
+def dataset_counts() -> Dict[str, int]:
+    with engine.connect() as conn:
+        return dict(conn.execute(text(f"""
+            SELECT 'users', COUNT(*) FROM ({BENCH_USERS}) u
+            UNION ALL SELECT 'transactions', COUNT(*) FROM transactions WHERE user_id IN ({BENCH_USERS})
+        """)).all())
+
+
+# Endpoints
+@dataclass
+class BenchUser:
+    id: int
+    headers: Dict[str, str]
+    account_id: int
+    category_id: int
+
+
+def _period(rng: random.Random) -> Dict[str, str]:
+    end = date.today() - timedelta(days=rng.randint(0, 365))
+    start = end - timedelta(days=rng.choice([30, 90, 365]))
+    return {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+
+def _create_body(user: BenchUser, rng: random.Random) -> dict:
+    return {
+        "account_id": user.account_id,
+        "category_id": user.category_id,
+        "amount": str(round(rng.uniform(1, 100), 2)),
+        "type": "income",
+        "date": date.today().isoformat(),
+        "description": "Benchmark",
+    }
+
+
+# name -> (method, path, query params factory, JSON body factory)
+ENDPOINTS: Dict[str, tuple] = {
+    "transactions_list": ("GET", "/api/transactions", lambda u, r: {"limit": 100}, None),
+    "transactions_period": ("GET", "/api/transactions", lambda u, r: {"limit": 100, **_period(r)}, None),
+    "transactions_search": (
+        "GET", "/api/transactions/search", lambda u, r: {"q": f"Магазин {r.randint(0, 499)}"}, None
+    ),
+    "transaction_create": ("POST", "/api/transactions", lambda u, r: {}, _create_body),
+    "report_financial": ("GET", "/api/transactions/reports/financial", lambda u, r: _period(r), None),
+    "report_top_expenses": (
+        "GET", "/api/transactions/reports/top-expenses", lambda u, r: {"limit": 10, **_period(r)}, None
+    ),
+    "budget_status": (
+        "GET", "/api/budgets/reports/status",
+        lambda u, r: {"year": date.today().year, "month": r.randint(1, date.today().month)}, None
+    ),
+    "total_balance": ("GET", "/api/accounts/summary/total-balance", lambda u, r: {}, None),
+    "accounts": ("GET", "/api/accounts", lambda u, r: {}, None),
+}
+
+
+def load_users(limit: int) -> List[BenchUser]:
+    from app.auth import create_access_token
+    
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT u.id, MIN(a.id) AS account_id, MIN(c.id) AS category_id
+            FROM users u
+            JOIN accounts a ON a.user_id = u.id
+            JOIN categories c ON c.user_id = u.id AND c.type = 'income'
+            WHERE u.id IN ({BENCH_USERS})
+            GROUP BY u.id
+            ORDER BY u.id
+            LIMIT :limit
+        """), {"limit": limit}).all()
+    token_ttl = timedelta(hours=12)
+    return [
+        BenchUser(
+            id=row.id,
+            headers={"Authorization": "Bearer " + create_access_token({"sub": str(row.id)}, token_ttl)},
+            account_id=row.account_id,
+            category_id=row.category_id
+        )
+        for row in rows
+    ]
+
+
+# Load generation
+@dataclass
+class EndpointResult:
+    endpoint: str
+    requests: int
+    errors: int
+    duration_seconds: float
+    throughput_rps: float
+    latency_ms: Dict[str, float]
+    queries_per_request: Optional[float]
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    name: str,
+    users: List[BenchUser],
+    requests: int,
+    concurrency: int,
+    seed: int
+) -> EndpointResult:
+    method, path, make_params, make_body = ENDPOINTS[name]
+    rng = random.Random(f"{seed}:{name}")
+    plan = [rng.choice(users) for _ in range(requests)]
+    latencies: List[float] = []
+    query_counts: List[int] = []
+    status_codes: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for user in plan:
+        queue.put_nowait(user)
+    
+    async def worker() -> None:
+        while not queue.empty():
+            user = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    method, path,
+                    params=make_params(user, rng),
+                    json=make_body(user, rng) if make_body else None,
+                    headers=user.headers
+                )
+                code = str(response.status_code)
+                if QUERY_COUNT_HEADER in response.headers:
+                    query_counts.append(int(response.headers[QUERY_COUNT_HEADER]))
+            except httpx.HTTPError as error:
+                code = type(error).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    
+    latencies.sort()
+    errors = sum(n for code, n in status_codes.items() if not code.startswith(("2", "304")))
+    return EndpointResult(
+        endpoint=name,
+        requests=requests,
+        errors=errors,
+        duration_seconds=round(duration, 3),
+        throughput_rps=round(requests / duration, 1) if duration else 0.0,
+        latency_ms={
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        queries_per_request=round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+        status_codes=status_codes
+    )
+
+
+async def run_benchmark(
+    endpoints: List[str],
+    requests: int,
+    warmup: int,
+    concurrency: int,
+    users: List[BenchUser],
+    seed: int,
+    base_url: Optional[str] = None
+) -> List[EndpointResult]:
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    
+    results = []
+    async with client:
+        for name in endpoints:
+            if warmup:
+                await run_endpoint(client, name, users, warmup, concurrency, seed + 1)
+            result = await run_endpoint(client, name, users, requests, concurrency, seed)
+            logger.info(
+                "%-22s %6.1f req/s  p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  queries %s  errors %d",
+                name, result.throughput_rps, result.latency_ms["p50"], result.latency_ms["p95"],
+                result.latency_ms["p99"], result.queries_per_request, result.errors
+            )
+            results.append(result)
+    return results
+
+
+# Results
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(output_dir: Path, payload: dict) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = output_dir / f"{stamp}_{payload['commit'] or 'nogit'}.json"
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+    return path
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Log p95/throughput changes against a baseline run; return regressed endpoints."""
+    previous = {result["endpoint"]: result for result in baseline["results"]}
+    regressed = []
+    logger.info("Compared with %s (commit %s)", baseline["started_at"], baseline["commit"])
+    for result in current["results"]:
+        before = previous.get(result["endpoint"])
+        if before is None or not before["latency_ms"]["p95"]:
+            continue
+        change = result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1
+        logger.info(
+            "%-22s p95 %7.2f -> %7.2f ms (%+.0f%%)  throughput %6.1f -> %6.1f req/s",
+            result["endpoint"], before["latency_ms"]["p95"], result["latency_ms"]["p95"],
+            change * 100, before["throughput_rps"], result["throughput_rps"]
+        )
+        if change > threshold:
+            regressed.append(result["endpoint"])
+    return regressed
+
+
+def _latest_result(output_dir: Path, exclude: Path) -> Optional[Path]:
+    runs = sorted(path for path in output_dir.glob("*.json") if path != exclude)
+    return runs[-1] if runs else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset and load-test the API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    seed = commands.add_parser("seed", help="replace the benchmark users' data")
+    defaults = DatasetConfig()
+    for name, value in asdict(defaults).items():
+        seed.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    
+    run = commands.add_parser("run", help="load-test the endpoints")
+    run.add_argument(
+        "--endpoints", default=",".join(ENDPOINTS),
+        help=f"comma-separated subset of: {', '.join(ENDPOINTS)}"
+    )
+    run.add_argument("--requests", type=int, default=1000, help="measured requests per endpoint")
+    run.add_argument("--warmup", type=int, default=50, help="unmeasured requests per endpoint")
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--users", type=int, default=100, help="benchmark users the requests are spread over")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    run.add_argument(
+        "--no-report-cache", action="store_true",
+        help="disable the report cache (in-process runs only)"
+    )
+    run.add_argument("--output-dir", type=Path, default=Path("benchmark_results"))
+    run.add_argument("--compare", help="baseline result file, or 'latest' in --output-dir")
+    run.add_argument(
+        "--regression-threshold", type=float, default=0.2,
+        help="p95 increase (fraction) counted as a regression"
+    )
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "seed":
+        seed_dataset(DatasetConfig(**{name: getattr(args, name) for name in asdict(defaults)}))
+        return
+    
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    users = load_users(args.users)
+    if not users:
+        parser.error("no benchmark users, run the seed command first")
+    if args.no_report_cache:
+        settings.REPORT_CACHE_ENABLED = False
+    
+    started_at = datetime.now(timezone.utc).isoformat()
+    results = asyncio.run(run_benchmark(
+        endpoints, args.requests, args.warmup, args.concurrency, users, args.seed, args.base_url
+    ))
+    payload = {
+        "commit": git_commit(),
+        "started_at": started_at,
+        "target": args.base_url or "in-process",
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "users": len(users),
+            "report_cache": not args.no_report_cache,
+            "async_database": settings.ASYNC_DATABASE,
+        },
+        "dataset": dataset_counts(),
+        "results": [asdict(result) for result in results],
+    }
+    path = save_results(args.output_dir, payload)
+    logger.info("Results written to %s", path)
+    
+    if args.compare:
+        baseline_path = _latest_result(args.output_dir, path) if args.compare == "latest" else Path(args.compare)
+        if baseline_path is None:
+            logger.warning("No earlier result to compare with")
+            return
+        regressed = compare_results(payload, json.loads(baseline_path.read_text()), args.regression_threshold)
+        if regressed:
+            logger.error("p95 regression in: %s", ", ".join(regressed))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
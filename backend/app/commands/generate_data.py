@@ -0,0 +1,479 @@
+"""Synthetic data generator.
+
+Creates users (``gen<N>@<--email-domain>``) with realistic per-user
+distributions: salary paid twice a month from a recurring schedule, rent
+and subscriptions, expenses skewed towards a few favourite categories with
+log-normal amounts, card/cash mix, monthly transfers to a savings account,
+tags, monthly budgets sized from the user's own spending and savings goals.
+
+The output is deterministic: every user is generated from its own
+``random.Random(f"{seed}:{index}")``, so the same --seed, --users,
+--transactions and --end-date always produce the same rows regardless of
+--workers. Only the ids depend on what the database already contains.
+
+Transactions and their tags are loaded with COPY by --workers processes,
+each committing batches of --batch-users users. The transactions triggers
+are disabled for the load (balances and monthly totals are rebuilt in bulk
+afterwards, the load itself is not audited), so run it against a benchmark
+or development database without live traffic.
+
+Usage:
+    python -m app.commands.generate_data [--users N] [--transactions N]
+        [--days N] [--end-date DATE] [--seed N] [--workers N]
+        [--batch-users N] [--email-domain DOMAIN]
+
+Users of --email-domain from an earlier run are replaced.
+"""
+import argparse
+import csv
+import io
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+PASSWORD = "synthetic-password"
+TIMEZONES = [
+    "Europe/Moscow", "Europe/Moscow", "Europe/Moscow", "Europe/Kaliningrad", "Europe/Samara",
+    "Asia/Yekaterinburg", "Asia/Novosibirsk", "Asia/Krasnoyarsk", "Asia/Vladivostok",
+]
+
+# name -> (share of expense rows, median amount at a 90 000 salary, log-normal sigma, payees)
+EXPENSE_CATEGORIES: Dict[str, Tuple[float, float, float, List[str]]] = {
+    "Продукты": (30, 900, 0.8, ["Пятерочка", "Перекресток", "Магнит", "ВкусВилл", "Лента", "Азбука вкуса"]),
+    "Кафе и рестораны": (12, 700, 0.7, ["Шоколадница", "Теремок", "Вкусно и точка", "Кофе Хауз", "Додо Пицца"]),
+    "Транспорт": (14, 250, 0.9, ["Метро", "Яндекс Такси", "Ситимобил", "Лукойл", "Газпромнефть"]),
+    "Развлечения": (6, 1200, 0.8, ["Кинопоиск", "Синема Парк", "Ticketland", "Steam"]),
+    "Одежда": (4, 3500, 0.7, ["Lamoda", "Wildberries", "Gloria Jeans", "Спортмастер"]),
+    "Здоровье": (4, 1500, 0.9, ["Аптека 36,6", "Ригла", "Инвитро", "СМ-Клиника"]),
+    "Дом": (5, 1800, 1.0, ["OZON", "Леруа Мерлен", "IKEA", "Hoff"]),
+    "Связь и интернет": (2, 600, 0.3, ["МТС", "Билайн", "МегаФон", "Ростелеком"]),
+    "Подарки": (2, 3000, 0.8, ["OZON", "Золотое Яблоко", "Л'Этуаль"]),
+    "Образование": (1, 5000, 0.7, ["Skillbox", "Литрес", "Читай-город"]),
+    "Путешествия": (1, 15000, 0.9, ["РЖД", "Аэрофлот", "Островок", "Туту.ру"]),
+}
+INCOME_CATEGORIES = ["Зарплата", "Подработка", "Проценты и кэшбэк"]
+RECURRING_CATEGORY = "Жилье и коммунальные"
+SUBSCRIPTIONS = [("Яндекс Плюс", 399), ("Кинопоиск", 299), ("Spotify", 169), ("iCloud", 149), ("Облако Mail", 99)]
+TAGS = ["отпуск", "работа", "семья", "дети", "налоговый вычет", "возврат", "крупная покупка", "ремонт", "подарок", "здоровье"]
+GOALS = [
+    ("Подушка безопасности", 6.0), ("Отпуск", 1.5), ("Новый ноутбук", 1.2),
+    ("Первоначальный взнос", 24.0), ("Автомобиль", 12.0),
+]
+# Expense account mix: debit card, credit card, cash
+EXPENSE_ACCOUNTS = (0.65, 0.25, 0.10)
+
+
+@dataclass
+class GeneratorConfig:
+    users: int = 1000
+    transactions: int = 1_000_000
+    days: int = 730
+    end_date: date = field(default_factory=date.today)
+    seed: int = 42
+    workers: int = os.cpu_count() or 1
+    batch_users: int = 100
+    email_domain: str = "synthetic.finflow"
+    tagged_share: float = 0.2
+
+
+@dataclass
+class UserPlan:
+    """Everything generated for one user; rows reference each other by
+    position (accounts, recurring) or name (categories, tags)."""
+    index: int
+    timezone: str
+    accounts: List[tuple] = field(default_factory=list)
+    categories: List[tuple] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    recurring: List[tuple] = field(default_factory=list)
+    budgets: List[tuple] = field(default_factory=list)
+    goals: List[tuple] = field(default_factory=list)
+    # (account index, category name, amount, type, date, description, payee, recurring index, tag names)
+    transactions: List[tuple] = field(default_factory=list)
+
+
+def activity_counts(config: GeneratorConfig) -> List[int]:
+    """Transactions per user: log-normal activity, summing to config.transactions."""
+    rng = random.Random(f"{config.seed}:activity")
+    weights = [rng.lognormvariate(0, 0.8) for _ in range(config.users)]
+    total = sum(weights)
+    return [max(1, round(config.transactions * weight / total)) for weight in weights]
+
+
+def _amount(value: float) -> str:
+    return f"{max(value, 0.01):.2f}"
+
+
+def _months(start: date, end: date, day: int) -> List[date]:
+    """Dates with the given day of month within [start, end]."""
+    dates = []
+    year, month = start.year, start.month
+    while True:
+        current = date(year, month, day)
+        if current > end:
+            return dates
+        if current >= start:
+            dates.append(current)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + 1, 1, value.day) if value.month == 12 else date(value.year, value.month + 1, value.day)
+
+
+def generate_user(index: int, transactions: int, config: GeneratorConfig) -> UserPlan:
+    rng = random.Random(f"{config.seed}:{index}")
+    end = config.end_date
+    start = end - timedelta(days=config.days - 1)
+    salary = round(rng.lognormvariate(math.log(90000), 0.45), -3)
+    scale = salary / 90000
+    plan = UserPlan(index=index, timezone=rng.choice(TIMEZONES))
+    
+    bank = rng.choice(["Сбербанк", "Т-Банк", "Альфа-Банк", "ВТБ", "Газпромбанк"])
+    accounts = [
+        ("Зарплатная карта", "debit_card", bank),
+        ("Кредитная карта", "credit_card", rng.choice(["Т-Банк", "Альфа-Банк", bank])),
+        ("Наличные", "cash", None),
+        ("Накопительный счет", "deposit", bank),
+    ]
+    # (name, type, bank, opening balance cushion), see rebuild_derived
+    plan.accounts = [(*account, _amount(rng.uniform(0, 50000))) for account in accounts]
+    plan.categories = [(name, "income") for name in INCOME_CATEGORIES]
+    plan.categories += [(name, "expense") for name in [RECURRING_CATEGORY, *EXPENSE_CATEGORIES]]
+    plan.tags = rng.sample(TAGS, rng.randint(3, len(TAGS)))
+    
+    # Recurring schedules: advance and salary, rent, a few subscriptions
+    recurring = [
+        ("Аванс", "Зарплата", round(salary * 0.4, 2), "income", 0, rng.randint(5, 12)),
+        ("Зарплата", "Зарплата", round(salary * 0.6, 2), "income", 0, rng.randint(20, 28)),
+        ("Аренда и коммунальные", RECURRING_CATEGORY, round(salary * rng.uniform(0.2, 0.4), -2), "expense", 0, rng.randint(1, 10)),
+    ]
+    for name, price in rng.sample(SUBSCRIPTIONS, rng.randint(0, 3)):
+        recurring.append((name, "Развлечения", price, "expense", 1, rng.randint(1, 28)))
+    for position, (description, category, amount, kind, account, day) in enumerate(recurring):
+        dates = _months(start, end, day)
+        for current in dates:
+            plan.transactions.append(
+                (account, category, _amount(amount), kind, current, description, None, position, ())
+            )
+        last = dates[-1] if dates else _months(start - timedelta(days=31), end, day)[0]
+        plan.recurring.append((account, category, description, _amount(amount), kind, "monthly", _next_month(last)))
+    
+    # Part of every salary goes to savings
+    saving_rate = rng.choice([0, 0.05, 0.1, 0.15, 0.2])
+    saved = 0.0
+    if saving_rate:
+        for current in _months(start, end, recurring[1][5]):
+            amount = round(salary * saving_rate, -2)
+            saved += amount
+            plan.transactions.append(
+                (0, None, _amount(amount), "transfer", current, "Перевод на накопительный счет", None, None, ())
+            )
+    
+    # Category preferences differ per user, so the expense mix is skewed
+    names = list(EXPENSE_CATEGORIES)
+    weights = list(itertools.accumulate(
+        EXPENSE_CATEGORIES[name][0] * rng.lognormvariate(0, 0.6) for name in names
+    ))
+    account_weights = list(itertools.accumulate(EXPENSE_ACCOUNTS))
+    favourite_payees = {name: rng.sample(EXPENSE_CATEGORIES[name][3], 2) for name in names}
+    spent: Dict[str, float] = {}
+    
+    for _ in range(max(0, transactions - len(plan.transactions))):
+        category = rng.choices(names, cum_weights=weights)[0]
+        _, median, sigma, payees = EXPENSE_CATEGORIES[category]
+        amount = rng.lognormvariate(math.log(median * scale), sigma)
+        spent[category] = spent.get(category, 0) + amount
+        # Weekends are busier
+        current = start + timedelta(days=rng.randrange(config.days))
+        while current.weekday() < 5 and rng.random() < 0.25:
+            current = start + timedelta(days=rng.randrange(config.days))
+        payee = rng.choice(favourite_payees[category] if rng.random() < 0.7 else payees)
+        account = rng.choices((0, 1, 2), cum_weights=account_weights)[0]
+        tags = ()
+        if rng.random() < config.tagged_share:
+            tags = tuple(rng.sample(plan.tags, min(len(plan.tags), rng.choice((1, 1, 1, 2)))))
+        plan.transactions.append(
+            (account, category, _amount(amount), "expense", current, f"Покупка: {payee}", payee, None, tags)
+        )
+    
+    # Occasional side income and cashback
+    for current in _months(start, end, rng.randint(1, 28)):
+        if rng.random() < 0.3:
+            plan.transactions.append(
+                (0, "Подработка", _amount(round(salary * rng.uniform(0.05, 0.3), -2)), "income",
+                 current, "Подработка", None, None, ())
+            )
+        plan.transactions.append(
+            (0, "Проценты и кэшбэк", _amount(salary * rng.uniform(0.002, 0.01)), "income",
+             current, "Кэшбэк", plan.accounts[0][2], None, ())
+        )
+    
+    # Monthly budgets for the biggest categories, sized from actual spending
+    months = max(1, config.days / 30.4)
+    first_month = date(start.year, start.month, 1)
+    for category in sorted(spent, key=spent.get, reverse=True)[:rng.randint(2, 5)]:
+        monthly = spent[category] / months * rng.uniform(0.9, 1.3)
+        plan.budgets.append((category, _amount(round(monthly, -2) or 100), "month", first_month))
+    if "Путешествия" in spent:
+        plan.budgets.append(("Путешествия", _amount(round(salary * rng.uniform(0.5, 1.5), -3)), "year", date(end.year, 1, 1)))
+    
+    for position, (name, months_of_salary) in enumerate(rng.sample(GOALS, rng.randint(0, 3))):
+        target = round(salary * months_of_salary, -3)
+        current = min(target, round(saved * rng.uniform(0.2, 1.0), 2)) if position == 0 else round(target * rng.uniform(0, 0.6), 2)
+        deadline = end + timedelta(days=rng.randint(60, 1000))
+        plan.goals.append((name, _amount(target), _amount(current), deadline, rng.randint(1, 10), current >= target))
+    
+    return plan
+
+
+# Loading (one connection per worker process)
+_config: Optional[GeneratorConfig] = None
+_password_hash: Optional[str] = None
+
+
+def _init_worker(config: GeneratorConfig, password_hash: str) -> None:
+    global _config, _password_hash
+    _config, _password_hash = config, password_hash
+    # Connections inherited from the parent must not be reused
+    engine.dispose(close=False)
+
+
+def _insert(cur, query: str, rows: List[tuple]) -> List[int]:
+    if not rows:
+        return []
+    return [row[0] for row in execute_values(cur, query, rows, page_size=1000, fetch=True)]
+
+
+def _copy(cur, table: str, columns: str, rows: List[tuple]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _reserve_transaction_ids(raw, count: int) -> int:
+    """First id of a block of count transaction ids taken from the sequence."""
+    with raw.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(hashtext('generate_data'))")
+        try:
+            cur.execute(
+                "SELECT setval(pg_get_serial_sequence('transactions', 'id'),"
+                " nextval(pg_get_serial_sequence('transactions', 'id')) + %s - 1)",
+                (count,)
+            )
+            last = cur.fetchone()[0]
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(hashtext('generate_data'))")
+    raw.commit()
+    return last - count + 1
+
+
+def load_batch(batch: List[Tuple[int, int]]) -> Tuple[int, int]:
+    """Generate and load the given (user index, transactions) pairs in one
+    transaction; returns (users, transactions) loaded."""
+    config = _config
+    plans = [generate_user(index, count, config) for index, count in batch]
+    transaction_count = sum(len(plan.transactions) for plan in plans)
+    
+    raw = engine.raw_connection()
+    try:
+        first_id = _reserve_transaction_ids(raw, transaction_count)
+        with raw.cursor() as cur:
+            user_ids = _insert(cur, """
+                INSERT INTO users (email, password_hash, full_name, timezone) VALUES %s RETURNING id
+            """, [
+                (f"gen{plan.index}@{config.email_domain}", _password_hash, f"Пользователь {plan.index}", plan.timezone)
+                for plan in plans
+            ])
+            account_ids = iter(_insert(cur, """
+                INSERT INTO accounts (user_id, name, type, bank_name, balance) VALUES %s RETURNING id
+            """, [(user_id, *account) for plan, user_id in zip(plans, user_ids) for account in plan.accounts]))
+            category_ids = iter(_insert(cur, """
+                INSERT INTO categories (user_id, name, type) VALUES %s RETURNING id
+            """, [(user_id, *category) for plan, user_id in zip(plans, user_ids) for category in plan.categories]))
+            tag_ids = iter(_insert(cur, """
+                INSERT INTO tags (user_id, name) VALUES %s RETURNING id
+            """, [(user_id, tag) for plan, user_id in zip(plans, user_ids) for tag in plan.tags]))
+    
+            # Per user lookups of the generated ids
+            accounts, categories, tags = [], [], []
+            for plan in plans:
+                accounts.append([next(account_ids) for _ in plan.accounts])
+                categories.append({name: next(category_ids) for name, _ in plan.categories})
+                tags.append({name: next(tag_ids) for name in plan.tags})
+    
+            recurring_ids = iter(_insert(cur, """
+                INSERT INTO recurring_transactions
+                    (user_id, account_id, category_id, description, amount, type, interval, next_date)
+                VALUES %s RETURNING id
+            """, [
+                (user_id, accounts[n][account], categories[n][category], description, amount, kind, interval, next_date)
+                for n, (plan, user_id) in enumerate(zip(plans, user_ids))
+                for account, category, description, amount, kind, interval, next_date in plan.recurring
+            ]))
+            recurring = [[next(recurring_ids) for _ in plan.recurring] for plan in plans]
+            _insert(cur, """
+                INSERT INTO budgets (user_id, category_id, amount, period, start_date) VALUES %s RETURNING id
+            """, [
+                (user_id, categories[n][category], amount, period, start_date)
+                for n, (plan, user_id) in enumerate(zip(plans, user_ids))
+                for category, amount, period, start_date in plan.budgets
+            ])
+            _insert(cur, """
+                INSERT INTO goals (user_id, name, target_amount, current_amount, deadline, priority, is_completed)
+                VALUES %s RETURNING id
+            """, [(user_id, *goal) for plan, user_id in zip(plans, user_ids) for goal in plan.goals])
+    
+            transaction_rows, tag_rows = [], []
+            transaction_id = first_id
+            for n, (plan, user_id) in enumerate(zip(plans, user_ids)):
+                for account, category, amount, kind, current, description, payee, schedule, names in plan.transactions:
+                    transaction_rows.append((
+                        transaction_id, accounts[n][account], user_id,
+                        categories[n][category] if category else None, amount, kind, current,
+                        description, payee, schedule is not None,
+                        recurring[n][schedule] if schedule is not None else None
+                    ))
+                    tag_rows.extend((transaction_id, current, tags[n][name]) for name in names)
+                    transaction_id += 1
+            _copy(
+                cur, "transactions",
+                "id, account_id, user_id, category_id, amount, type, date, description, payee, "
+                "is_recurring, recurring_transaction_id",
+                transaction_rows
+            )
+            _copy(cur, "transaction_tags", "transaction_id, transaction_date, tag_id", tag_rows)
+        raw.commit()
+    finally:
+        raw.close()
+    return len(plans), transaction_count
+
+
+GENERATED_USERS = "SELECT id FROM users WHERE email LIKE 'gen%@' || :email_domain"
+
+
+def delete_generated(email_domain: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE transactions DISABLE TRIGGER USER"))
+        conn.execute(text(f"DELETE FROM transactions WHERE user_id IN ({GENERATED_USERS})"), {"email_domain": email_domain})
+        conn.execute(text(f"DELETE FROM users WHERE id IN ({GENERATED_USERS})"), {"email_domain": email_domain})
+        conn.execute(text("ALTER TABLE transactions ENABLE TRIGGER USER"))
+
+
+def rebuild_derived(email_domain: str) -> None:
+    """Balances and monthly totals the disabled triggers did not maintain.
+    
+    Accounts are created with the generated cushion as their opening
+    balance; the opening balance is raised by what keeps the account from
+    ending up negative.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            UPDATE accounts a
+            SET opening_balance = s.opening,
+                balance = s.opening + s.delta
+            FROM (
+                SELECT d.id, d.delta, GREATEST(0, -d.delta) + d.cushion AS opening
+                FROM (
+                    SELECT a2.id,
+                           a2.opening_balance AS cushion,
+                           COALESCE(SUM(CASE t.type WHEN 'income' THEN t.amount
+                                                    WHEN 'expense' THEN -t.amount
+                                                    ELSE 0 END), 0) AS delta
+                    FROM accounts a2
+                    LEFT JOIN transactions t ON t.account_id = a2.id AND t.user_id = a2.user_id
+                    WHERE a2.user_id IN ({GENERATED_USERS})
+                    GROUP BY a2.id, a2.opening_balance
+                ) d
+            ) s
+            WHERE a.id = s.id
+        """), {"email_domain": email_domain})
+        conn.execute(text("SELECT rebuild_monthly_category_totals()"))
+
+
+def generate(config: GeneratorConfig) -> Tuple[int, int]:
+    from app.auth import get_password_hash
+    
+    started = time.perf_counter()
+    delete_generated(config.email_domain)
+    with engine.begin() as conn:
+        for name in conn.execute(
+            text("SELECT create_transaction_partitions(0, :years_back)"),
+            {"years_back": date.today().year - (config.end_date - timedelta(days=config.days)).year}
+        ).scalars():
+            logger.info("Created partition %s", name)
+    
+    counts = list(enumerate(activity_counts(config)))
+    batches = [
+        counts[offset:offset + config.batch_users]
+        for offset in range(0, config.users, config.batch_users)
+    ]
+    users = transactions = 0
+    
+    # Committed separately: the workers' COPY must not fire the row triggers
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE transactions DISABLE TRIGGER USER"))
+    try:
+        with multiprocessing.get_context("fork").Pool(
+            config.workers, initializer=_init_worker, initargs=(config, get_password_hash(PASSWORD))
+        ) as pool:
+            for loaded_users, loaded_transactions in pool.imap_unordered(load_batch, batches):
+                users += loaded_users
+                transactions += loaded_transactions
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    "%d/%d users, %d transactions (%.0f rows/s)",
+                    users, config.users, transactions, transactions / elapsed
+                )
+        logger.info("Rebuilding balances and monthly totals")
+        rebuild_derived(config.email_domain)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE transactions ENABLE TRIGGER USER"))
+    
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    logger.info("Generated %d users and %d transactions in %.1fs", users, transactions, time.perf_counter() - started)
+    return users, transactions
+
+
+def main() -> None:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset.")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--transactions", type=int, default=defaults.transactions, help="approximate total")
+    parser.add_argument("--days", type=int, default=defaults.days, help="history length")
+    parser.add_argument(
+        "--end-date", type=date.fromisoformat, default=defaults.end_date,
+        help="last day of the history (YYYY-MM-DD), fix it for reproducible data"
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--workers", type=int, default=defaults.workers, help="parallel loading processes")
+    parser.add_argument("--batch-users", type=int, default=defaults.batch_users, help="users per COPY transaction")
+    parser.add_argument("--email-domain", default=defaults.email_domain)
+    parser.add_argument("--tagged-share", type=float, default=defaults.tagged_share)
+    args = parser.parse_args()
+    
+    if args.end_date > date.today():
+        parser.error("--end-date cannot be in the future")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    generate(GeneratorConfig(**vars(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Recurring transaction materialisation.
+
+Creates the transactions of every active recurring schedule that is due,
+catching up on missed periods. Safe to re-run and to run in parallel.
+
+Usage:
+    python -m app.commands.materialize_recurring [--as-of YYYY-MM-DD]
+        [--batch-size N] [--loop [--interval SECONDS]]
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import date
+
+from app.config import settings
+from app.scheduler import materialize_due
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Materialise due recurring transactions.")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="due date, defaults to today")
+    parser.add_argument("--batch-size", type=int, default=settings.RECURRING_BATCH_SIZE)
+    parser.add_argument("--loop", action="store_true", help="keep running every --interval seconds")
+    parser.add_argument("--interval", type=int, default=settings.RECURRING_SCHEDULER_INTERVAL_SECONDS)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.loop:
+        stats = materialize_due(as_of=args.as_of, batch_size=args.batch_size)
+        print(json.dumps(stats.as_dict(), default=str))
+        return
+    
+    while True:
+        try:
+            materialize_due(as_of=args.as_of, batch_size=args.batch_size)
+        except Exception:
+            logging.exception("Recurring transaction run failed")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Account balance reconciliation.
+
+Recomputes every account balance as opening_balance plus the signed sum of
+its transactions and reports accounts whose stored balance drifted from it.
+
+Usage:
+    python -m app.commands.reconcile_balances [--user-id ID] [--fix]
+
+Exits with status 1 when unfixed drift was found, so it can be scheduled
+as a monitoring check.
+"""
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+def find_drift(user_id: Optional[int] = None, fix: bool = False) -> List[dict]:
+    """Accounts with drifted balances; with fix=True they are corrected too."""
+    function = "reconcile_account_balances" if fix else "get_account_balance_drift"
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(f"SELECT * FROM {function}(:user_id)"),
+            {"user_id": user_id}
+        )
+        return [dict(row) for row in result.mappings()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile account balances with transactions.")
+    parser.add_argument("--user-id", type=int, help="only check this user's accounts")
+    parser.add_argument("--fix", action="store_true", help="set drifted balances to the expected value")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    drift = find_drift(args.user_id, args.fix)
+    for row in drift:
+        logger.warning(
+            "Account %s (user %s): balance %s, expected %s, drift %s%s",
+            row["account_id"], row["user_id"], row["balance"],
+            row["expected_balance"], row["drift"],
+            " - fixed" if args.fix else ""
+        )
+    logger.info("%d account(s) with balance drift", len(drift))
+    
+    if drift and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Refresh of the materialised dashboard views.
+
+Refreshes every view whose interval in dashboard_view_refreshes has passed
+(all of them with --force) and prints their status; exits with status 1 if
+a view failed to refresh. Safe to run next to the in-process refresher.
+
+Usage:
+    python -m app.commands.refresh_dashboard [--view NAME ...] [--force]
+        [--loop [--interval SECONDS]]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from app.config import settings
+from app.dashboard import DASHBOARD_VIEWS, refresh_due, refresh_status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh the materialised dashboard views.")
+    parser.add_argument("--view", action="append", choices=DASHBOARD_VIEWS, help="refresh only this view (repeatable)")
+    parser.add_argument("--force", action="store_true", help="refresh even if the interval has not passed")
+    parser.add_argument("--loop", action="store_true", help="keep checking every --interval seconds")
+    parser.add_argument("--interval", type=int, default=settings.DASHBOARD_REFRESH_CHECK_SECONDS)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.loop:
+        refresh_due(args.view, force=args.force)
+        status = [item for item in refresh_status() if not args.view or item["view_name"] in args.view]
+        print(json.dumps(status, default=str, indent=2))
+        if any(item["last_error"] for item in status):
+            sys.exit(1)
+        return
+    
+    while True:
+        try:
+            refresh_due(args.view, force=args.force)
+        except Exception:
+            logging.exception("Dashboard refresh run failed")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Transactions partition maintenance and pruning check.
+
+Creates the yearly partitions of transactions up to ``--years-ahead``
+years from now, plus partitions for any years whose rows landed in
+transactions_default, and moves those rows into them.
+
+With ``--verify`` it then checks that date-filtered reads only touch the
+partitions of the requested period: the GET /api/transactions query built
+by crud, and the report functions (get_transactions_sum,
+get_user_financial_report, get_top_expense_categories,
+get_transactions_with_tags). Function plans are captured with
+auto_explain, which has to be loadable by the connecting role.
+
+Usage:
+    python -m app.commands.transaction_partitions [--years-ahead N]
+        [--verify] [--user-id ID] [--start DATE] [--end DATE]
+
+Meant to run daily next to audit_partitions; exits with status 1 when the
+pruning check fails.
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Set
+
+from psycopg2 import Error as DatabaseError
+from sqlalchemy import text
+
+from app import crud
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Report functions that filter transactions by date, called as f(user_id, start, end)
+REPORT_FUNCTIONS = {
+    "get_transactions_sum": "SELECT get_transactions_sum(%(user_id)s, %(start)s, %(end)s)",
+    "get_user_financial_report": "SELECT * FROM get_user_financial_report(%(user_id)s, %(start)s, %(end)s)",
+    "get_top_expense_categories": "SELECT * FROM get_top_expense_categories(%(user_id)s, 10, %(start)s, %(end)s)",
+    "get_transactions_with_tags": "SELECT * FROM get_transactions_with_tags(%(user_id)s, %(start)s, %(end)s)",
+}
+
+
+def create_partitions(years_ahead: int) -> List[str]:
+    """Create missing yearly partitions up to years_ahead, return their names."""
+    with engine.begin() as conn:
+        return list(conn.execute(
+            text("SELECT create_transaction_partitions(:years_ahead)"),
+            {"years_ahead": years_ahead}
+        ).scalars())
+
+
+def _plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def scanned_partitions(plan: dict) -> Set[str]:
+    """Names of the transactions partitions a plan reads."""
+    return {
+        node["Relation Name"] for node in _plan_nodes(plan)
+        if node.get("Relation Name", "").startswith("transactions_")
+    }
+
+
+def expected_partitions(start: date, end: date) -> Set[str]:
+    return {f"transactions_y{year}" for year in range(start.year, end.year + 1)}
+
+
+def verify_pruning(user_id: int, start: date, end: date) -> Dict[str, Set[str]]:
+    """Check partition pruning for [start, end].
+    
+    Returns the queries that read partitions outside the period, mapped to
+    those partitions; an empty dict means every query was pruned.
+    """
+    expected = expected_partitions(start, end)
+    params = {"user_id": user_id, "start": start, "end": end}
+    failures = {}
+    
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            compiled = crud.transactions_select(
+                user_id, start_date=start, end_date=end
+            ).compile(dialect=engine.dialect)
+            cur.execute("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params)
+            scanned = scanned_partitions(cur.fetchone()[0][0]["Plan"])
+            logger.info("get_transactions reads %s", ", ".join(sorted(scanned)) or "no partitions")
+            if scanned - expected:
+                failures["get_transactions"] = scanned - expected
+            
+            try:
+                cur.execute("LOAD 'auto_explain'")
+            except DatabaseError as e:
+                raw.rollback()
+                logger.warning("auto_explain is not available, report functions not checked: %s", e)
+                return failures
+            # Plans of the statements inside the functions are sent back as NOTICEs
+            cur.execute(
+                "SET auto_explain.log_min_duration = 0;"
+                "SET auto_explain.log_nested_statements = on;"
+                "SET auto_explain.log_format = json;"
+                "SET auto_explain.log_level = notice;"
+                "SET client_min_messages = notice"
+            )
+            for function, query in REPORT_FUNCTIONS.items():
+                del raw.notices[:]
+                cur.execute(query, params)
+                scanned = set()
+                for notice in raw.notices:
+                    if "{" in notice:
+                        scanned |= scanned_partitions(json.loads(notice[notice.index("{"):])["Plan"])
+                logger.info("%s reads %s", function, ", ".join(sorted(scanned)) or "no partitions")
+                if scanned - expected:
+                    failures[function] = scanned - expected
+        raw.rollback()
+    finally:
+        raw.close()
+    return failures
+
+
+def main() -> None:
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Maintain transactions partitions.")
+    parser.add_argument(
+        "--years-ahead", type=int, default=settings.TRANSACTION_PARTITIONS_AHEAD,
+        help="create partitions up to this many years ahead"
+    )
+    parser.add_argument("--verify", action="store_true", help="check partition pruning afterwards")
+    parser.add_argument("--user-id", type=int, default=1, help="user the checked queries run for")
+    parser.add_argument(
+        "--start", type=date.fromisoformat, default=today - timedelta(days=90),
+        help="first day of the checked period (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--end", type=date.fromisoformat, default=today,
+        help="last day of the checked period (YYYY-MM-DD)"
+    )
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    for name in create_partitions(args.years_ahead):
+        logger.info("Created partition %s", name)
+    
+    if args.verify:
+        failures = verify_pruning(args.user_id, args.start, args.end)
+        for query, partitions in failures.items():
+            logger.error("%s is not pruned, also reads %s", query, ", ".join(sorted(partitions)))
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
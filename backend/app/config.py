@@ -8,23 +8,74 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "postgresql://finflow_user:finflow_pass@db:5432/finflow_db"
+    # Async engine (asyncpg) for the read/report endpoints, see routers/async_reads.py
+    ASYNC_DATABASE: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    ASYNC_POOL_SIZE: int = 20
+    ASYNC_MAX_OVERFLOW: int = 40
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    
+    # Report cache (app.reports); the TTL bounds staleness after writes made
+    # outside crud, e.g. the recurring scheduler run as a separate command
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_MAX_SIZE: int = 10000
+    REPORT_CACHE_TTL_SECONDS: int = 300
+    
+    # Query instrumentation (app.instrumentation)
+    QUERY_INSTRUMENTATION_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    # A statement run more often than this in one request is logged as a likely N+1
+    REPEATED_QUERY_THRESHOLD: int = 10
     
     # Application
     APP_NAME: str = "FinFlow API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
     
+    # Import / export
+    BATCH_IMPORT_CHUNK_SIZE: int = 1000
+    # Rows fetched per server-side cursor round trip in GET /api/transactions/export
+    EXPORT_CHUNK_SIZE: int = 5000
+    
+    # Audit log
+    AUDIT_HISTORY_DEFAULT_DAYS: int = 90
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    AUDIT_RETENTION_MONTHS: int = 12
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"
+    
+    # Transactions partitions
+    TRANSACTION_PARTITIONS_AHEAD: int = 1
+    
+    # Recurring transactions
+    RECURRING_SCHEDULER_ENABLED: bool = False
+    RECURRING_SCHEDULER_INTERVAL_SECONDS: int = 300
+    RECURRING_BATCH_SIZE: int = 10000
+    RECURRING_MAX_OCCURRENCES: int = 366
+    
+    # Dashboard materialised views (app.dashboard); the per-view refresh
+    # intervals are kept in the dashboard_view_refreshes table
+    DASHBOARD_REFRESH_ENABLED: bool = False
+    DASHBOARD_REFRESH_CHECK_SECONDS: int = 15
+    
     # CORS
     CORS_ORIGINS: list[str] = ["*"]
     
     class Config:
         env_file = ".env"
         case_sensitive = True
+    
+    @property
+    def async_database_url(self) -> str:
+        """Async DSN, derived from DATABASE_URL unless set explicitly."""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return self.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
 
 settings = Settings()
@@ -1,10 +1,15 @@
 """CRUD operations for database models."""
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Optional
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, and_, or_, case, insert, select, update, delete, tuple_, literal_column, true, Select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from pydantic import ValidationError
+from typing import Iterator, List, Optional, Tuple
 from datetime import date, datetime
 from decimal import Decimal
 from app import models, schemas
+from app.cache import invalidate_reports, invalidate_user
+from app.config import settings
 
 
 # User CRUD
@@ -40,10 +45,22 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
         setattr(db_user, field, value)
     
     db.commit()
+    invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
 
+def deactivate_user(db: Session, user_id: int) -> bool:
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return False
+    
+    db_user.is_active = False
+    db.commit()
+    invalidate_user(user_id)
+    return True
+
+
 # Account CRUD
 def get_account(db: Session, account_id: int, user_id: int) -> Optional[models.Account]:
     return db.query(models.Account).filter(
@@ -62,6 +79,7 @@ def create_account(db: Session, account: schemas.AccountCreate, user_id: int) ->
     db_account = models.Account(**account.model_dump(), user_id=user_id)
     db.add(db_account)
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_account)
     return db_account
 
@@ -76,6 +94,7 @@ def update_account(db: Session, account_id: int, user_id: int, account_update: s
         setattr(db_account, field, value)
     
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_account)
     return db_account
 
@@ -87,6 +106,7 @@ def delete_account(db: Session, account_id: int, user_id: int) -> bool:
     
     db.delete(db_account)
     db.commit()
+    invalidate_reports(user_id)
     return True
 
 
@@ -108,6 +128,7 @@ def create_category(db: Session, category: schemas.CategoryCreate, user_id: int)
     db_category = models.Category(**category.model_dump(), user_id=user_id)
     db.add(db_category)
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_category)
     return db_category
 
@@ -122,6 +143,7 @@ def update_category(db: Session, category_id: int, user_id: int, category_update
         setattr(db_category, field, value)
     
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_category)
     return db_category
 
@@ -133,14 +155,146 @@ def delete_category(db: Session, category_id: int, user_id: int) -> bool:
     
     db.delete(db_category)
     db.commit()
+    invalidate_reports(user_id)
     return True
 
 
 # Transaction CRUD
+def transaction_select(user_id: int) -> Select:
+    """Base SELECT of a user's transactions with tags eager-loaded.
+    
+    Filters on the denormalised transactions.user_id, so no join with
+    accounts is needed. Tags are loaded with one extra SELECT ... IN query
+    per result, not per row. Shared by the sync functions below and by
+    async_crud.
+    """
+    return select(models.Transaction).options(
+        selectinload(models.Transaction.tags)
+    ).where(
+        models.Transaction.user_id == user_id
+    )
+
+
+def transaction_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[models.TransactionType] = None,
+    category_id: Optional[int] = None
+) -> list:
+    """WHERE conditions of the transaction list filters (user_id not included)."""
+    conditions = []
+    if start_date:
+        conditions.append(models.Transaction.date >= start_date)
+    if end_date:
+        conditions.append(models.Transaction.date <= end_date)
+    if transaction_type:
+        conditions.append(models.Transaction.type == transaction_type)
+    if category_id:
+        conditions.append(models.Transaction.category_id == category_id)
+    return conditions
+
+
+def transactions_select(
+    user_id: int, 
+    skip: int = 0, 
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[models.TransactionType] = None,
+    category_id: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None
+) -> Select:
+    """SELECT for a page of transactions, newest first, ordered by (date, id).
+    
+    ``after`` is the (date, id) key of the last row of the previous page;
+    it turns the query into a keyset seek on idx_transactions_user_date_id.
+    """
+    query = transaction_select(user_id).where(*transaction_filters(
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type,
+        category_id=category_id
+    ))
+    if after:
+        query = query.where(
+            tuple_(models.Transaction.date, models.Transaction.id) < tuple_(*after)
+        )
+    
+    return query.order_by(
+        models.Transaction.date.desc(),
+        models.Transaction.id.desc()
+    ).offset(skip).limit(limit)
+
+
+# Full-text document of a transaction; spelled exactly like the expression of
+# idx_transactions_description_gin (constants inline) so the index matches
+SEARCH_CONFIG = literal_column("'russian'::regconfig")
+SEARCH_DOCUMENT = func.to_tsvector(
+    SEARCH_CONFIG, func.coalesce(models.Transaction.description, literal_column("''"))
+)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards (backslash is PostgreSQL's default escape)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def transactions_search_select(
+    user_id: int,
+    q: str,
+    skip: int = 0,
+    limit: int = 50,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Select:
+    """SELECT of a user's transactions matching ``q``, best matches first.
+    
+    Description is matched with websearch_to_tsquery on the GIN full-text
+    index, payee by substring ILIKE on the trigram index. Rank is ts_rank
+    plus payee trigram similarity, with a bonus for payee prefix matches.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    payee = models.Transaction.payee
+    pattern = _escape_like(q)
+    rank = (
+        func.ts_rank(SEARCH_DOCUMENT, tsquery)
+        + func.coalesce(func.similarity(payee, q), 0)
+        + case((payee.ilike(pattern + "%"), 1), else_=0)
+    )
+    
+    query = transaction_select(user_id).where(or_(
+        SEARCH_DOCUMENT.op("@@")(tsquery),
+        payee.ilike("%" + pattern + "%")
+    ))
+    if start_date:
+        query = query.where(models.Transaction.date >= start_date)
+    if end_date:
+        query = query.where(models.Transaction.date <= end_date)
+    
+    return query.order_by(
+        rank.desc(),
+        models.Transaction.date.desc(),
+        models.Transaction.id.desc()
+    ).offset(skip).limit(limit)
+
+
+def search_transactions(
+    db: Session,
+    user_id: int,
+    q: str,
+    skip: int = 0,
+    limit: int = 50,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[models.Transaction]:
+    return db.scalars(transactions_search_select(
+        user_id, q, skip=skip, limit=limit, start_date=start_date, end_date=end_date
+    )).all()
+
+
 def get_transaction(db: Session, transaction_id: int, user_id: int) -> Optional[models.Transaction]:
-    return db.query(models.Transaction).join(models.Account).filter(
-        models.Transaction.id == transaction_id,
-        models.Account.user_id == user_id
+    return db.scalars(
+        transaction_select(user_id).where(models.Transaction.id == transaction_id)
     ).first()
 
 
@@ -152,22 +306,109 @@ def get_transactions(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     transaction_type: Optional[models.TransactionType] = None,
-    category_id: Optional[int] = None
+    category_id: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None
 ) -> List[models.Transaction]:
-    query = db.query(models.Transaction).join(models.Account).filter(
-        models.Account.user_id == user_id
-    )
+    return db.scalars(transactions_select(
+        user_id,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type,
+        category_id=category_id,
+        after=after
+    )).all()
+
+
+def transactions_export_select(
+    user_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[models.TransactionType] = None,
+    category_id: Optional[int] = None
+) -> Select:
+    """Flat rows of a user's transactions with account, category and tag names.
     
-    if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
-    if transaction_type:
-        query = query.filter(models.Transaction.type == transaction_type)
-    if category_id:
-        query = query.filter(models.Transaction.category_id == category_id)
+    Plain columns instead of ORM objects, newest first in the order of
+    idx_transactions_user_date_id; tags are aggregated per row.
+    """
+    tags = select(
+        func.coalesce(func.array_agg(aggregate_order_by(models.Tag.id, models.Tag.id)), literal_column("'{}'")).label("ids"),
+        func.coalesce(func.array_agg(aggregate_order_by(models.Tag.name, models.Tag.id)), literal_column("'{}'")).label("names")
+    ).join(
+        models.TransactionTag, models.TransactionTag.tag_id == models.Tag.id
+    ).where(
+        models.TransactionTag.transaction_id == models.Transaction.id,
+        models.TransactionTag.transaction_date == models.Transaction.date
+    ).lateral("tags")
+    
+    return select(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.type,
+        models.Transaction.amount,
+        models.Transaction.account_id,
+        models.Account.name.label("account"),
+        models.Transaction.category_id,
+        models.Category.name.label("category"),
+        models.Transaction.description,
+        models.Transaction.payee,
+        tags.c.ids.label("tag_ids"),
+        tags.c.names.label("tags")
+    ).join(
+        models.Account, models.Account.id == models.Transaction.account_id
+    ).outerjoin(
+        models.Category, models.Category.id == models.Transaction.category_id
+    ).join(
+        tags, true()
+    ).where(
+        models.Transaction.user_id == user_id,
+        *transaction_filters(
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category_id=category_id
+        )
+    ).order_by(
+        models.Transaction.date.desc(),
+        models.Transaction.id.desc()
+    )
+
+
+def iter_transaction_export(db: Session, user_id: int, chunk_size: int, **filters) -> Iterator[list]:
+    """Export rows in lists of at most chunk_size, read through a server-side
+    cursor so memory does not grow with the number of transactions."""
+    result = db.execute(
+        transactions_export_select(user_id, **filters).execution_options(yield_per=chunk_size)
+    )
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _owned_tag_ids(db: Session, tag_ids: Optional[List[int]], user_id: int) -> List[int]:
+    """The user's tags among tag_ids, in request order without duplicates.
     
-    return query.order_by(models.Transaction.date.desc()).offset(skip).limit(limit).all()
+    One query for any number of tags; unknown or foreign tags are skipped.
+    """
+    tag_ids = list(dict.fromkeys(tag_ids or []))
+    if not tag_ids:
+        return []
+    owned = {row[0] for row in db.query(models.Tag.id).filter(
+        models.Tag.user_id == user_id,
+        models.Tag.id.in_(tag_ids)
+    )}
+    return [tag_id for tag_id in tag_ids if tag_id in owned]
+
+
+def _link_tags(db: Session, transaction: models.Transaction, tag_ids) -> None:
+    if tag_ids:
+        db.execute(insert(models.TransactionTag), [
+            {"transaction_id": transaction.id, "transaction_date": transaction.date, "tag_id": tag_id}
+            for tag_id in tag_ids
+        ])
 
 
 def create_transaction(db: Session, transaction: schemas.TransactionCreate, user_id: int) -> models.Transaction:
@@ -175,25 +416,19 @@ def create_transaction(db: Session, transaction: schemas.TransactionCreate, user
     account = get_account(db, transaction.account_id, user_id)
     if not account:
         raise ValueError("Account not found or doesn't belong to user")
+    tag_ids = _owned_tag_ids(db, transaction.tag_ids, user_id)
     
     # Create transaction
     transaction_data = transaction.model_dump(exclude={"tag_ids"})
-    db_transaction = models.Transaction(**transaction_data)
+    db_transaction = models.Transaction(**transaction_data, user_id=user_id)
     db.add(db_transaction)
     db.flush()
     
-    # Add tags if provided
-    if transaction.tag_ids:
-        for tag_id in transaction.tag_ids:
-            # Verify tag belongs to user
-            tag = db.query(models.Tag).filter(
-                models.Tag.id == tag_id,
-                models.Tag.user_id == user_id
-            ).first()
-            if tag:
-                db_transaction.tags.append(tag)
+    # Link tags with one multi-row INSERT
+    _link_tags(db, db_transaction, tag_ids)
     
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_transaction)
     return db_transaction
 
@@ -204,26 +439,37 @@ def update_transaction(
     user_id: int, 
     transaction_update: schemas.TransactionUpdate
 ) -> Optional[models.Transaction]:
+    """Update fields and, if tag_ids is given, the tag set of a transaction.
+    
+    Tags are diffed against the current links (already loaded with the
+    transaction): only removed links are deleted and only new ones inserted,
+    one statement each. This happens before the field update is flushed, so
+    the links still carry the old date; a date change reaches them through
+    ON UPDATE CASCADE.
+    """
     db_transaction = get_transaction(db, transaction_id, user_id)
     if not db_transaction:
         return None
     
+    # Update tags if provided
+    if "tag_ids" in transaction_update.model_fields_set:
+        tag_ids = _owned_tag_ids(db, transaction_update.tag_ids, user_id)
+        current = {tag.id for tag in db_transaction.tags}
+        removed = current - set(tag_ids)
+        if removed:
+            db.execute(delete(models.TransactionTag).where(
+                models.TransactionTag.transaction_id == db_transaction.id,
+                models.TransactionTag.transaction_date == db_transaction.date,
+                models.TransactionTag.tag_id.in_(removed)
+            ).execution_options(synchronize_session=False))
+        _link_tags(db, db_transaction, [tag_id for tag_id in tag_ids if tag_id not in current])
+    
     update_data = transaction_update.model_dump(exclude_unset=True, exclude={"tag_ids"})
     for field, value in update_data.items():
         setattr(db_transaction, field, value)
     
-    # Update tags if provided
-    if "tag_ids" in transaction_update.model_dump(exclude_unset=True):
-        db_transaction.tags.clear()
-        for tag_id in transaction_update.tag_ids or []:
-            tag = db.query(models.Tag).filter(
-                models.Tag.id == tag_id,
-                models.Tag.user_id == user_id
-            ).first()
-            if tag:
-                db_transaction.tags.append(tag)
-    
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_transaction)
     return db_transaction
 
@@ -235,9 +481,247 @@ def delete_transaction(db: Session, transaction_id: int, user_id: int) -> bool:
     
     db.delete(db_transaction)
     db.commit()
+    invalidate_reports(user_id)
     return True
 
 
+# Bulk transaction update and delete
+def _bulk_conditions(user_id: int, transaction_filter: schemas.TransactionFilter) -> list:
+    conditions = transaction_filters(
+        start_date=transaction_filter.start_date,
+        end_date=transaction_filter.end_date,
+        transaction_type=transaction_filter.transaction_type,
+        category_id=transaction_filter.category_id
+    )
+    if transaction_filter.ids is not None:
+        conditions.append(models.Transaction.id.in_(transaction_filter.ids))
+    if not conditions:
+        # An empty filter would hit every transaction of the user
+        raise ValueError("Filter must specify ids or at least one of the list filters")
+    return [models.Transaction.user_id == user_id, *conditions]
+
+
+def _check_owned(db: Session, model, ids: set, user_id: int, name: str) -> None:
+    if not ids:
+        return
+    owned = {row[0] for row in db.query(model.id).filter(
+        model.user_id == user_id,
+        model.id.in_(ids)
+    )}
+    if owned != ids:
+        raise ValueError(f"{name} not found or doesn't belong to user")
+
+
+def bulk_update_transactions(
+    db: Session,
+    bulk: schemas.BulkTransactionUpdate,
+    user_id: int
+) -> schemas.BulkTransactionResult:
+    """Apply field and tag changes to all transactions matching a filter.
+    
+    Each kind of change is one set-based statement, whatever the number of
+    rows: tag links are removed and added first (while the filter still
+    matches the old values), then one UPDATE sets the fields. Balances,
+    monthly totals and audit entries follow from the statement-level
+    triggers. Raises ValueError for foreign objects or a rejected update;
+    nothing is applied in that case.
+    """
+    conditions = _bulk_conditions(user_id, bulk.filter)
+    changes = bulk.changes.model_dump(exclude_unset=True, exclude={"add_tag_ids", "remove_tag_ids"})
+    for field in ("account_id", "type", "date"):
+        if field in changes and changes[field] is None:
+            raise ValueError(f"{field} cannot be null")
+    if changes.get("date") and changes["date"] > date.today():
+        raise ValueError("Transaction date cannot be in the future")
+    
+    add_tag_ids = set(bulk.changes.add_tag_ids or [])
+    remove_tag_ids = set(bulk.changes.remove_tag_ids or []) - add_tag_ids
+    _check_owned(db, models.Account, {changes["account_id"]} if "account_id" in changes else set(), user_id, "Account")
+    _check_owned(db, models.Category, {changes["category_id"]} if changes.get("category_id") else set(), user_id, "Category")
+    _check_owned(db, models.Tag, add_tag_ids | remove_tag_ids, user_id, "Tag")
+    
+    matched = select(models.Transaction.id, models.Transaction.date).where(*conditions)
+    result = schemas.BulkTransactionResult(affected=0)
+    try:
+        if remove_tag_ids:
+            result.tags_removed = db.execute(
+                delete(models.TransactionTag).where(
+                    models.TransactionTag.tag_id.in_(remove_tag_ids),
+                    tuple_(
+                        models.TransactionTag.transaction_id,
+                        models.TransactionTag.transaction_date
+                    ).in_(matched)
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+        if add_tag_ids:
+            result.tags_added = db.execute(
+                pg_insert(models.TransactionTag).from_select(
+                    ["transaction_id", "transaction_date", "tag_id"],
+                    select(models.Transaction.id, models.Transaction.date, models.Tag.id).join(
+                        models.Tag, models.Tag.id.in_(add_tag_ids)
+                    ).where(*conditions)
+                ).on_conflict_do_nothing()
+            ).rowcount
+        if changes:
+            result.affected = db.execute(
+                update(models.Transaction).where(*conditions).values(**changes)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        else:
+            result.affected = db.scalar(select(func.count()).select_from(matched.subquery()))
+        db.commit()
+    except DBAPIError as e:
+        db.rollback()
+        raise ValueError(f"Bulk update rejected: {e.orig}")
+    
+    invalidate_reports(user_id)
+    return result
+
+
+def bulk_delete_transactions(
+    db: Session,
+    bulk: schemas.BulkTransactionDelete,
+    user_id: int
+) -> schemas.BulkTransactionResult:
+    """Delete all transactions matching a filter with one DELETE.
+    
+    Tag links go with them (ON DELETE CASCADE); balances, monthly totals and
+    audit entries follow from the statement-level triggers. Raises
+    ValueError if the database rejects the delete (e.g. a balance would
+    become negative); nothing is deleted in that case.
+    """
+    conditions = _bulk_conditions(user_id, bulk.filter)
+    try:
+        affected = db.execute(
+            delete(models.Transaction).where(*conditions)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    except DBAPIError as e:
+        db.rollback()
+        raise ValueError(f"Bulk delete rejected: {e.orig}")
+    
+    invalidate_reports(user_id)
+    return schemas.BulkTransactionResult(affected=affected)
+
+
+# Bulk transaction import
+def _batch_error(index: int, item: schemas.BatchTransactionItem, error) -> dict:
+    return {
+        "index": index,
+        "data": item.model_dump(),
+        "error": str(error)
+    }
+
+
+def _insert_transaction_chunk(db: Session, chunk: List[tuple]) -> None:
+    """Insert prepared rows and their tag links with multi-row statements."""
+    transaction_ids = db.execute(
+        insert(models.Transaction).returning(models.Transaction.id, sort_by_parameter_order=True),
+        [values for _, _, values, _ in chunk]
+    ).scalars().all()
+    
+    tag_rows = [
+        {"transaction_id": transaction_id, "transaction_date": values["date"], "tag_id": tag_id}
+        for transaction_id, (_, _, values, tag_ids) in zip(transaction_ids, chunk)
+        for tag_id in tag_ids
+    ]
+    if tag_rows:
+        db.execute(insert(models.TransactionTag), tag_rows)
+
+
+def bulk_create_transactions(
+    db: Session,
+    items: List[schemas.BatchTransactionItem],
+    user_id: int,
+    indexes: Optional[List[int]] = None
+) -> Tuple[int, List[dict]]:
+    """Create many transactions using set-based statements.
+    
+    Account, category and tag ownership is checked with one query each for
+    the whole batch. Rows are inserted in chunks of BATCH_IMPORT_CHUNK_SIZE;
+    if the database rejects a chunk, it is replayed row by row in savepoints
+    so errors are still reported per item. Errors carry the position of the
+    item in ``items`` unless explicit ``indexes`` are given. Returns the
+    number of created transactions and the list of per-index errors.
+    """
+    account_ids = {item.account_id for item in items}
+    category_ids = {item.category_id for item in items if item.category_id is not None}
+    tag_ids = {tag_id for item in items for tag_id in item.tag_ids or []}
+    
+    owned_accounts = set()
+    if account_ids:
+        owned_accounts = {row[0] for row in db.query(models.Account.id).filter(
+            models.Account.user_id == user_id,
+            models.Account.id.in_(account_ids)
+        )}
+    owned_categories = set()
+    if category_ids:
+        owned_categories = {row[0] for row in db.query(models.Category.id).filter(
+            models.Category.user_id == user_id,
+            models.Category.id.in_(category_ids)
+        )}
+    owned_tags = set()
+    if tag_ids:
+        owned_tags = {row[0] for row in db.query(models.Tag.id).filter(
+            models.Tag.user_id == user_id,
+            models.Tag.id.in_(tag_ids)
+        )}
+    
+    errors = []
+    pending = []
+    today = date.today()
+    if indexes is None:
+        indexes = range(len(items))
+    for idx, item in zip(indexes, items):
+        try:
+            transaction = schemas.TransactionCreate(**item.model_dump())
+        except ValidationError as e:
+            errors.append(_batch_error(idx, item, e))
+            continue
+        
+        if transaction.account_id not in owned_accounts:
+            errors.append(_batch_error(idx, item, "Account not found or doesn't belong to user"))
+            continue
+        if transaction.category_id is not None and transaction.category_id not in owned_categories:
+            errors.append(_batch_error(idx, item, "Category not found or doesn't belong to user"))
+            continue
+        if transaction.date > today:
+            errors.append(_batch_error(idx, item, "Transaction date cannot be in the future"))
+            continue
+        
+        # Unknown tags are skipped, the same as in create_transaction
+        item_tag_ids = list(dict.fromkeys(
+            tag_id for tag_id in transaction.tag_ids or [] if tag_id in owned_tags
+        ))
+        values = transaction.model_dump(exclude={"tag_ids"})
+        values["user_id"] = user_id
+        pending.append((idx, item, values, item_tag_ids))
+    
+    successful = 0
+    chunk_size = settings.BATCH_IMPORT_CHUNK_SIZE
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            with db.begin_nested():
+                _insert_transaction_chunk(db, chunk)
+            successful += len(chunk)
+        except DBAPIError:
+            # Fall back to row-by-row inserts to find the offending items
+            for entry in chunk:
+                try:
+                    with db.begin_nested():
+                        _insert_transaction_chunk(db, [entry])
+                    successful += 1
+                except DBAPIError as e:
+                    errors.append(_batch_error(entry[0], entry[1], e.orig))
+    
+    db.commit()
+    invalidate_reports(user_id)
+    errors.sort(key=lambda error: error["index"])
+    return successful, errors
+
+
 # Tag CRUD
 def get_tag(db: Session, tag_id: int, user_id: int) -> Optional[models.Tag]:
     return db.query(models.Tag).filter(
@@ -302,6 +786,7 @@ def create_budget(db: Session, budget: schemas.BudgetCreate, user_id: int) -> mo
     db_budget = models.Budget(**budget.model_dump(), user_id=user_id)
     db.add(db_budget)
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_budget)
     return db_budget
 
@@ -316,6 +801,7 @@ def update_budget(db: Session, budget_id: int, user_id: int, budget_update: sche
         setattr(db_budget, field, value)
     
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_budget)
     return db_budget
 
@@ -327,6 +813,7 @@ def delete_budget(db: Session, budget_id: int, user_id: int) -> bool:
     
     db.delete(db_budget)
     db.commit()
+    invalidate_reports(user_id)
     return True
 
 
@@ -403,6 +890,7 @@ def create_recurring_transaction(
     db_recurring = models.RecurringTransaction(**recurring.model_dump(), user_id=user_id)
     db.add(db_recurring)
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_recurring)
     return db_recurring
 
@@ -422,6 +910,7 @@ def update_recurring_transaction(
         setattr(db_recurring, field, value)
     
     db.commit()
+    invalidate_reports(user_id)
     db.refresh(db_recurring)
     return db_recurring
 
@@ -433,9 +922,93 @@ def delete_recurring_transaction(db: Session, recurring_id: int, user_id: int) -
     
     db.delete(db_recurring)
     db.commit()
+    invalidate_reports(user_id)
     return True
 
 
+# Audit log
+# Audited tables and the model used to check that a record belongs to the user
+AUDITED_MODELS = {
+    "users": models.User,
+    "accounts": models.Account,
+    "categories": models.Category,
+    "transactions": models.Transaction,
+    "budgets": models.Budget,
+    "goals": models.Goal,
+    "recurring_transactions": models.RecurringTransaction,
+    "tags": models.Tag,
+}
+
+
+def _owns_account(db: Session, account_id: Optional[int], user_id: int) -> bool:
+    return account_id is not None and db.query(models.Account.id).filter(
+        models.Account.id == account_id,
+        models.Account.user_id == user_id
+    ).first() is not None
+
+
+def audited_record_owned(
+    db: Session,
+    table_name: str,
+    record_id: int,
+    user_id: int,
+    start: datetime
+) -> bool:
+    """Check that an audited record belongs to the user.
+    
+    Live records are checked against their table; deleted ones against the
+    row image kept in their DELETE audit entry. Only entries from start on
+    are looked up, so records deleted earlier are reported as not owned.
+    """
+    if table_name == "users":
+        return record_id == user_id
+    
+    model = AUDITED_MODELS[table_name]
+    if db.query(model.id).filter(
+        model.id == record_id,
+        model.user_id == user_id
+    ).first() is not None:
+        return True
+    
+    deleted = db.query(models.AuditLog.old_data).filter(
+        models.AuditLog.table_name == table_name,
+        models.AuditLog.record_id == record_id,
+        models.AuditLog.action == models.AuditAction.DELETE,
+        models.AuditLog.changed_at >= start
+    ).order_by(models.AuditLog.changed_at.desc()).first()
+    if deleted is None or not deleted.old_data:
+        return False
+    if model is models.Transaction and "user_id" not in deleted.old_data:
+        # Logged before transactions carried user_id
+        return _owns_account(db, deleted.old_data.get("account_id"), user_id)
+    return deleted.old_data.get("user_id") == user_id
+
+
+def get_audit_history(
+    db: Session,
+    table_name: str,
+    record_id: int,
+    start: datetime,
+    end: datetime,
+    skip: int = 0,
+    limit: int = 100
+) -> List[models.AuditLog]:
+    """Audit entries of one record in [start, end), newest first.
+    
+    The changed_at range restricts the scan to the matching monthly
+    partitions of audit_log.
+    """
+    return db.scalars(select(models.AuditLog).where(
+        models.AuditLog.table_name == table_name,
+        models.AuditLog.record_id == record_id,
+        models.AuditLog.changed_at >= start,
+        models.AuditLog.changed_at < end
+    ).order_by(
+        models.AuditLog.changed_at.desc(),
+        models.AuditLog.id.desc()
+    ).offset(skip).limit(limit)).all()
+
+
 
 
 
@@ -0,0 +1,103 @@
+"""Refresh of the materialised dashboard views.
+
+The views and their schedule live in database/08_materialized_views.sql;
+refresh_dashboard_view() refreshes one view CONCURRENTLY when its interval in
+dashboard_view_refreshes has passed and records when it was refreshed, so
+the dashboard endpoints can report how old their data is. The refresher runs
+either inside the API process (DASHBOARD_REFRESH_ENABLED) or as
+``python -m app.commands.refresh_dashboard``; several of them can run at once.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_VIEWS = (
+    "mv_user_accounts_summary",
+    "mv_monthly_financial_summary",
+    "mv_current_month_expenses_by_category",
+    "mv_tags_summary",
+    "mv_budgets_with_status",
+)
+
+REFRESH_VIEW = text("SELECT refresh_dashboard_view(:view_name, :force)")
+RECORD_FAILURE = text(
+    "UPDATE dashboard_view_refreshes SET last_error = :error, last_error_at = now() "
+    "WHERE view_name = :view_name"
+)
+REFRESHED_AT = text(
+    "SELECT last_refreshed_at FROM dashboard_view_refreshes WHERE view_name = :view_name"
+)
+REFRESH_STATUS = text("""
+    SELECT
+        view_name,
+        EXTRACT(EPOCH FROM refresh_interval)::INTEGER AS refresh_interval_seconds,
+        last_refreshed_at,
+        EXTRACT(EPOCH FROM now() - last_refreshed_at)::DECIMAL(12, 1) AS age_seconds,
+        last_duration_ms,
+        last_error,
+        last_error_at
+    FROM dashboard_view_refreshes
+    ORDER BY view_name
+""")
+
+
+def refresh_due(views: Optional[Iterable[str]] = None, force: bool = False) -> List[str]:
+    """Refresh the views whose interval has passed (all of them with force).
+    
+    Each view is refreshed in its own transaction; a failure is recorded in
+    dashboard_view_refreshes and does not hold back the other views. Returns
+    the names of the refreshed views.
+    """
+    refreshed = []
+    for view_name in views or DASHBOARD_VIEWS:
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                done = conn.execute(REFRESH_VIEW, {"view_name": view_name, "force": force}).scalar()
+        except Exception as error:
+            logger.exception("Refresh of %s failed", view_name)
+            with engine.begin() as conn:
+                conn.execute(RECORD_FAILURE, {"view_name": view_name, "error": repr(error)})
+            continue
+        if done:
+            refreshed.append(view_name)
+            logger.info("Refreshed %s in %.0f ms", view_name, (time.perf_counter() - started) * 1000)
+    return refreshed
+
+
+def refresh_status() -> List[dict]:
+    """Schedule, age and last error of every dashboard view."""
+    with engine.connect() as conn:
+        rows = conn.execute(REFRESH_STATUS).mappings().all()
+    status = []
+    for row in rows:
+        item = dict(row)
+        age = item["age_seconds"]
+        # Stale: the refresher is a full interval or more behind schedule
+        item["is_stale"] = age is None or age >= 2 * item["refresh_interval_seconds"]
+        status.append(item)
+    return status
+
+
+def refreshed_at(db: Session, view_name: str) -> Optional[datetime]:
+    """Time of the snapshot a dashboard view currently holds (None if never refreshed)."""
+    return db.execute(REFRESHED_AT, {"view_name": view_name}).scalar()
+
+
+async def run_refresher(interval: float) -> None:
+    """Check every ``interval`` seconds for due views and refresh them until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_due)
+        except Exception:
+            logger.exception("Dashboard refresh run failed")
+        await asyncio.sleep(interval)
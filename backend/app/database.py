@@ -2,8 +2,9 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from app.config import settings
+from app.instrumentation import instrument_engine
 
 # Create database engine
 engine = create_engine(
@@ -14,9 +15,30 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
+instrument_engine(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional async engine and session factory (requires asyncpg)
+async_engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        pool_pre_ping=True,
+        pool_size=settings.ASYNC_POOL_SIZE,
+        max_overflow=settings.ASYNC_MAX_OVERFLOW,
+        echo=settings.DEBUG
+    )
+    instrument_engine(async_engine.sync_engine)
+    # Objects are serialised after the handler returns, keep them loaded
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 # Base class for models
 Base = declarative_base()
 
@@ -39,3 +61,9 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+# Dependency for getting async database session (ASYNC_DATABASE only)
+async def get_async_db() -> AsyncGenerator:
+    """Get async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
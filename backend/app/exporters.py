@@ -0,0 +1,135 @@
+"""Streaming writers for transaction exports (CSV, NDJSON, Parquet).
+
+Each writer turns the row chunks of crud.iter_transaction_export into
+response body chunks one chunk at a time, so an export of any size is
+written with constant memory.
+"""
+import csv
+import importlib.util
+import io
+import json
+from typing import Iterable, Iterator
+
+EXPORT_FIELDS = (
+    "id", "date", "type", "amount", "account_id", "account",
+    "category_id", "category", "description", "payee", "tag_ids", "tags"
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+SUPPORTED_FORMATS = tuple(MEDIA_TYPES)
+
+
+def format_available(export_format: str) -> bool:
+    """Parquet needs the optional pyarrow package."""
+    return export_format != "parquet" or importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_csv(chunks: Iterable[list]) -> Iterator[bytes]:
+    """CSV with a header row; tag ids and names are ``|``-separated as in
+    the CSV import, so the file can be imported back."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow((
+                row.id, row.date.isoformat(), row.type.value, row.amount,
+                row.account_id, row.account, row.category_id, row.category,
+                row.description, row.payee,
+                "|".join(map(str, row.tag_ids)), "|".join(row.tags)
+            ))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(chunks: Iterable[list]) -> Iterator[bytes]:
+    """One JSON object per line; amounts as strings to keep them exact."""
+    for chunk in chunks:
+        yield "".join(
+            json.dumps({
+                "id": row.id,
+                "date": row.date.isoformat(),
+                "type": row.type.value,
+                "amount": str(row.amount),
+                "account_id": row.account_id,
+                "account": row.account,
+                "category_id": row.category_id,
+                "category": row.category,
+                "description": row.description,
+                "payee": row.payee,
+                "tag_ids": row.tag_ids,
+                "tags": row.tags,
+            }, ensure_ascii=False) + "\n"
+            for row in chunk
+        ).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last take()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(chunks: Iterable[list]) -> Iterator[bytes]:
+    """Parquet file with one row group per chunk (requires pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("type", pa.string()),
+        ("amount", pa.decimal128(15, 2)),
+        ("account_id", pa.int32()),
+        ("account", pa.string()),
+        ("category_id", pa.int32()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+        ("payee", pa.string()),
+        ("tag_ids", pa.list_(pa.int32())),
+        ("tags", pa.list_(pa.string())),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            # Enum members are written by value
+            columns[2] = [value.value for value in columns[2]]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.take()
+    yield sink.take()
+
+
+WRITERS = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "parquet": iter_parquet,
+}
@@ -0,0 +1,268 @@
+"""Streaming parsers for bank statement imports (CSV, OFX)."""
+import codecs
+import csv
+import io
+import logging
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.database import set_user_id_for_audit
+from app.models import TransactionType
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("csv", "ofx")
+
+CSV_FIELDS = (
+    "account_id", "category_id", "amount", "type", "date",
+    "description", "payee", "tag_ids"
+)
+# Columns a CSV header must have; account_id may come from the query instead
+CSV_REQUIRED_FIELDS = ("amount", "type", "date")
+
+# OFX files are read in blocks of this size, never as a whole
+OFX_READ_SIZE = 64 * 1024
+OFX_TAG_RE = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class StatementError(ValueError):
+    """The statement cannot be read: unknown encoding, undecodable bytes,
+    malformed CSV or a header without the required columns."""
+
+
+def check_encoding(encoding: str) -> None:
+    """Raise StatementError for an encoding name Python does not know."""
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise StatementError(f"Unknown encoding: {encoding}")
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """Guess statement format from the file extension."""
+    if not filename or "." not in filename:
+        return None
+    extension = filename.rsplit(".", 1)[1].lower()
+    if extension in ("ofx", "qfx"):
+        return "ofx"
+    if extension in ("csv", "txt"):
+        return "csv"
+    return None
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of at most ``size`` rows without materialising the input."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _empty_to_none(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def iter_csv_rows(
+    stream: BinaryIO,
+    account_id: Optional[int] = None,
+    encoding: str = "utf-8-sig",
+    delimiter: str = ","
+) -> Iterator[dict]:
+    """Return an iterator of raw transaction dicts from a CSV file, one row at a time.
+
+    The header must use BatchTransactionItem field names; ``tag_ids`` are
+    separated by ``|``. ``account_id`` fills rows that do not specify one.
+    The header is decoded and checked before this returns, so a wrong
+    encoding or missing columns raise StatementError here; bytes or CSV
+    syntax that fail further down raise StatementError from the iterator.
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    reader = csv.DictReader(text, delimiter=delimiter)
+    try:
+        header = reader.fieldnames or []
+    except (UnicodeDecodeError, csv.Error) as e:
+        text.detach()
+        raise StatementError(f"Cannot read CSV header: {e}")
+    missing = [field for field in CSV_REQUIRED_FIELDS if field not in header]
+    if missing:
+        text.detach()
+        raise StatementError(f"CSV header is missing columns: {missing}")
+    return _iter_csv_records(text, reader, account_id)
+
+
+def _iter_csv_records(
+    text: io.TextIOWrapper,
+    reader: csv.DictReader,
+    account_id: Optional[int]
+) -> Iterator[dict]:
+    try:
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise StatementError(f"Cannot read CSV after line {reader.line_num}: {e}")
+            data = {field: _empty_to_none(row.get(field)) for field in CSV_FIELDS}
+            if data["account_id"] is None:
+                data["account_id"] = account_id
+            if data["tag_ids"] is not None:
+                data["tag_ids"] = [tag for tag in data["tag_ids"].split("|") if tag.strip()]
+            yield data
+    finally:
+        # Keep the underlying upload open when the wrapper goes away
+        text.detach()
+
+
+def _iter_ofx_tags(stream: BinaryIO, encoding: str) -> Iterator[tuple]:
+    """Tokenise OFX (SGML or XML flavour) into (is_closing, tag, value)."""
+    decoder = io.TextIOWrapper(stream, encoding=encoding, errors="replace")
+    try:
+        buffer = ""
+        while True:
+            block = decoder.read(OFX_READ_SIZE)
+            if block:
+                buffer += block
+                # Keep the last, possibly incomplete, tag for the next block
+                cut = buffer.rfind("<")
+                ready, buffer = (buffer[:cut], buffer[cut:]) if cut > 0 else ("", buffer)
+            else:
+                ready, buffer = buffer, ""
+            for match in OFX_TAG_RE.finditer(ready):
+                yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+            if not block:
+                return
+    finally:
+        decoder.detach()
+
+
+def _parse_ofx_date(value: str) -> Optional[str]:
+    # DTPOSTED: YYYYMMDD[HHMMSS[.XXX][[TZ]]]
+    try:
+        return datetime.strptime(value[:8], "%Y%m%d").date().isoformat()
+    except ValueError:
+        return None
+
+
+def _ofx_transaction(fields: dict, account_id: Optional[int]) -> dict:
+    data = {
+        "account_id": account_id,
+        "category_id": None,
+        "amount": fields.get("TRNAMT"),
+        "type": None,
+        "date": _parse_ofx_date(fields.get("DTPOSTED", "")),
+        "description": fields.get("MEMO") or fields.get("NAME"),
+        "payee": fields.get("NAME") or fields.get("PAYEE"),
+        "tag_ids": None
+    }
+    try:
+        amount = Decimal(fields.get("TRNAMT", "").replace(",", "."))
+    except InvalidOperation:
+        return data
+    data["amount"] = abs(amount)
+    data["type"] = (TransactionType.INCOME if amount > 0 else TransactionType.EXPENSE).value
+    return data
+
+
+def iter_ofx_rows(
+    stream: BinaryIO,
+    account_id: Optional[int] = None,
+    encoding: str = "utf-8"
+) -> Iterator[dict]:
+    """Yield raw transaction dicts from an OFX statement (STMTTRN blocks)."""
+    fields = None
+    for is_closing, tag, value in _iter_ofx_tags(stream, encoding):
+        if tag == "STMTTRN":
+            if not is_closing:
+                fields = {}
+            elif fields is not None:
+                yield _ofx_transaction(fields, account_id)
+                fields = None
+        elif fields is not None and not is_closing and value:
+            fields[tag] = value
+
+
+def import_rows(
+    db: Session,
+    rows: Iterable[dict],
+    user_id: int,
+    chunk_size: int
+) -> Iterator[schemas.StatementImportProgress]:
+    """Validate and write parsed rows chunk by chunk, yielding progress.
+
+    Only one chunk is held in memory at a time and every chunk is committed
+    on its own, so memory use does not depend on the file size. A statement
+    that stops being readable, or a database error, ends the import: the
+    rows read before it are still written (the failed chunk is rolled back)
+    and the final progress record carries the error.
+    """
+    processed = 0
+    successful = 0
+    failed = 0
+    failure = []
+    chunks = chunked(_until_statement_error(rows, failure), chunk_size)
+    for number, chunk in enumerate(chunks, start=1):
+        items = []
+        indexes = []
+        errors = []
+        for index, data in enumerate(chunk, start=processed):
+            try:
+                items.append(schemas.BatchTransactionItem(**data))
+                indexes.append(index)
+            except ValidationError as e:
+                errors.append({"index": index, "data": data, "error": str(e)})
+        
+        try:
+            # SET LOCAL is reset by the commit of the previous chunk
+            set_user_id_for_audit(db, user_id)
+            chunk_successful, chunk_errors = crud.bulk_create_transactions(
+                db, items, user_id, indexes=indexes
+            )
+        except SQLAlchemyError:
+            logger.exception("Statement import chunk %d failed", number)
+            db.rollback()
+            failure.append(f"Database error, rows {processed}-{processed + len(chunk) - 1} were not imported")
+            break
+        errors = sorted(errors + chunk_errors, key=lambda error: error["index"])
+        
+        processed += len(chunk)
+        successful += chunk_successful
+        failed += len(errors)
+        yield schemas.StatementImportProgress(
+            chunk=number,
+            processed=processed,
+            successful=successful,
+            failed=failed,
+            errors=errors
+        )
+    
+    yield schemas.StatementImportProgress(
+        chunk=0,
+        processed=processed,
+        successful=successful,
+        failed=failed,
+        errors=[],
+        done=True,
+        error=failure[0] if failure else None
+    )
+
+
+def _until_statement_error(rows: Iterable[dict], failure: list) -> Iterator[dict]:
+    """Pass rows through until the statement becomes unreadable, recording why."""
+    try:
+        yield from rows
+    except StatementError as e:
+        failure.append(str(e))
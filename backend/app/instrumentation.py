@@ -0,0 +1,150 @@
+"""Per-request SQL instrumentation.
+
+instrument_engine hooks SQLAlchemy cursor events to time every statement;
+QueryInstrumentationMiddleware collects the statements of one request and
+reports them as response headers and a request log line. Statements slower
+than SLOW_QUERY_THRESHOLD_MS are logged with their normalised SQL, and a
+statement repeated more than REPEATED_QUERY_THRESHOLD times in one request
+(typically an N+1 lazy load) is logged once per request.
+"""
+import contextvars
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("app.requests")
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalise_sql(statement: str) -> str:
+    """Statement with literals and bind parameters replaced by ``?``.
+
+    Value lists collapse to ``(...)``, so statements that differ only in
+    their values normalise to the same text.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _PARAMETER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while handling one request."""
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_sql: Optional[str] = None
+    # Raw statement text -> executions; bound values are not part of it
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+
+# Set by the middleware; sync handlers see it through the copied context
+# of the threadpool they run in
+_current_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, normalise_sql(statement))
+
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time the statements of a sync engine (for an AsyncEngine pass .sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryInstrumentationMiddleware:
+    """ASGI middleware adding per-request query count and DB time.
+
+    Headers are set when the response starts; the request log line is
+    written after the body is sent, so it also covers streamed responses.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_INSTRUMENTATION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_stats(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[QUERY_COUNT_HEADER] = str(stats.count)
+                headers[QUERY_TIME_HEADER] = f"{stats.total_ms:.1f}"
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope, status_code, (time.perf_counter() - started) * 1000, stats)
+
+
+def _log_request(scope, status_code: int, elapsed_ms: float, stats: QueryStats) -> None:
+    if request_logger.isEnabledFor(logging.INFO):
+        request_logger.info(
+            "method=%s path=%s status=%d duration_ms=%.1f queries=%d db_ms=%.1f "
+            "slowest_ms=%.1f slowest_sql=%r",
+            scope["method"], scope["path"], status_code, elapsed_ms, stats.count,
+            stats.total_ms, stats.slowest_ms, normalise_sql(stats.slowest_sql) if stats.slowest_sql else None
+        )
+    for statement, executions in stats.statements.items():
+        if executions > settings.REPEATED_QUERY_THRESHOLD:
+            logger.warning(
+                "%s %s ran the same statement %d times (N+1?): %s",
+                scope["method"], scope["path"], executions, normalise_sql(statement)
+            )
@@ -1,10 +1,15 @@
 """Main FastAPI application."""
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.pagination import NEXT_CURSOR_HEADER
+from app.instrumentation import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryInstrumentationMiddleware
+from app import scheduler, dashboard
 from app.routers import (
     auth, accounts, categories, transactions, 
-    budgets, goals, tags, recurring
+    budgets, goals, tags, recurring, audit, async_reads, exports,
+    dashboard as dashboard_router
 )
 
 # Create FastAPI app
@@ -23,9 +28,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
+# Per-request query count and DB time, slow query logging
+app.add_middleware(QueryInstrumentationMiddleware)
+
 # Include routers
+# Before any router whose /api/transactions/{transaction_id} would match /export
+app.include_router(exports.router)
+if settings.ASYNC_DATABASE:
+    # Registered first so the async read/report handlers take precedence
+    app.include_router(async_reads.router)
 app.include_router(auth.router)
 app.include_router(accounts.router)
 app.include_router(categories.router)
@@ -34,6 +48,40 @@ app.include_router(budgets.router)
 app.include_router(goals.router)
 app.include_router(tags.router)
 app.include_router(recurring.router)
+app.include_router(audit.router)
+app.include_router(dashboard_router.router)
+
+
+@app.on_event("startup")
+async def start_recurring_scheduler():
+    """Start the in-process recurring transaction scheduler if enabled."""
+    if settings.RECURRING_SCHEDULER_ENABLED:
+        app.state.recurring_scheduler = asyncio.create_task(
+            scheduler.run_scheduler(settings.RECURRING_SCHEDULER_INTERVAL_SECONDS)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_recurring_scheduler():
+    task = getattr(app.state, "recurring_scheduler", None)
+    if task:
+        task.cancel()
+
+
+@app.on_event("startup")
+async def start_dashboard_refresher():
+    """Start the in-process dashboard view refresher if enabled."""
+    if settings.DASHBOARD_REFRESH_ENABLED:
+        app.state.dashboard_refresher = asyncio.create_task(
+            dashboard.run_refresher(settings.DASHBOARD_REFRESH_CHECK_SECONDS)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_dashboard_refresher():
+    task = getattr(app.state, "dashboard_refresher", None)
+    if task:
+        task.cancel()
 
 
 @app.get("/")
@@ -52,3 +100,15 @@ def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+@app.get("/metrics/recurring")
+def recurring_metrics():
+    """Throughput of the recurring transaction scheduler in this process."""
+    return scheduler.metrics.snapshot()
+
+
+@app.get("/metrics/dashboard")
+def dashboard_metrics():
+    """Refresh schedule, data age and last error of the dashboard views."""
+    return dashboard.refresh_status()
+
@@ -1,8 +1,9 @@
 """SQLAlchemy models for FinFlow database."""
 from sqlalchemy import (
-    Column, Integer, String, Numeric, Date, Boolean, Text, 
-    ForeignKey, Enum as SQLEnum, TIMESTAMP, ARRAY, Index
+    Column, Integer, BigInteger, String, Numeric, Date, Boolean, Text, 
+    ForeignKey, ForeignKeyConstraint, Enum as SQLEnum, TIMESTAMP, ARRAY, Index, FetchedValue
 )
+from sqlalchemy.dialects.postgresql import JSONB, INET
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -40,6 +41,18 @@ class RecurringInterval(str, enum.Enum):
     YEARLY = "yearly"
 
 
+class AuditAction(str, enum.Enum):
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+
+def _pg_enum(enum_class, name: str) -> SQLEnum:
+    """Column type of a PostgreSQL enum whose labels are the member values
+    (SQLAlchemy uses the member names by default)."""
+    return SQLEnum(enum_class, name=name, values_callable=lambda members: [member.value for member in members])
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -69,7 +82,7 @@ class Account(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
-    type = Column(SQLEnum(AccountType), nullable=False)
+    type = Column(_pg_enum(AccountType, "account_type"), nullable=False)
     balance = Column(Numeric(15, 2), nullable=False, default=0.00)
     currency = Column(String(3), nullable=False, default="RUB")
     bank_name = Column(String(255))
@@ -89,7 +102,7 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
-    type = Column(SQLEnum(CategoryType), nullable=False)
+    type = Column(_pg_enum(CategoryType, "category_type"), nullable=False)
     parent_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL", onupdate="CASCADE"), index=True)
     budget_limit = Column(Numeric(15, 2))
     icon = Column(String(50))
@@ -105,14 +118,21 @@ class Category(Base):
 
 
 class Transaction(Base):
+    """Income, expense or transfer on an account.
+
+    The table is range-partitioned by date, so the primary key includes it;
+    filter on date to let PostgreSQL prune partitions.
+    """
     __tablename__ = "transactions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id", ondelete="RESTRICT", onupdate="CASCADE"), nullable=False, index=True)
+    # Owner of the account, kept consistent by the (account_id, user_id) foreign key
+    user_id = Column(Integer, nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL", onupdate="CASCADE"), index=True)
     amount = Column(Numeric(15, 2), nullable=False)
-    type = Column(SQLEnum(TransactionType), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    type = Column(_pg_enum(TransactionType, "transaction_type"), nullable=False, index=True)
+    date = Column(Date, primary_key=True, index=True)
     description = Column(Text)
     payee = Column(String(255))
     location = Column(String(255))
@@ -129,6 +149,10 @@ class Transaction(Base):
     # Indexes
     __table_args__ = (
         Index('idx_transactions_date_type', 'date', 'type'),
+        Index(
+            'idx_transactions_user_date_id', user_id, date.desc(), id.desc(),
+            postgresql_include=['account_id', 'category_id', 'type', 'amount']
+        ),
     )
 
 
@@ -149,8 +173,16 @@ class Tag(Base):
 class TransactionTag(Base):
     __tablename__ = "transaction_tags"
     
-    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
+    transaction_id = Column(Integer, primary_key=True)
+    transaction_date = Column(Date, nullable=False)
     tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['transaction_id', 'transaction_date'], ['transactions.id', 'transactions.date'],
+            ondelete="CASCADE", onupdate="CASCADE"
+        ),
+    )
 
 
 class Budget(Base):
@@ -160,7 +192,7 @@ class Budget(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE", onupdate="CASCADE"), index=True)
     amount = Column(Numeric(15, 2), nullable=False)
-    period = Column(SQLEnum(BudgetPeriod), nullable=False)
+    period = Column(_pg_enum(BudgetPeriod, "budget_period"), nullable=False)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -201,8 +233,11 @@ class RecurringTransaction(Base):
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL", onupdate="CASCADE"))
     description = Column(Text, nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
-    type = Column(SQLEnum(TransactionType), nullable=False)
-    interval = Column(SQLEnum(RecurringInterval), nullable=False)
+    type = Column(_pg_enum(TransactionType, "transaction_type"), nullable=False)
+    interval = Column(_pg_enum(RecurringInterval, "recurring_interval"), nullable=False)
+    # Anchor of the occurrence dates, set by set_recurring_anchor_trigger
+    start_date = Column(Date, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
+    occurrence_count = Column(Integer, nullable=False, server_default="0", server_onupdate=FetchedValue())
     next_date = Column(Date, nullable=False, index=True)
     end_date = Column(Date)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -213,6 +248,26 @@ class RecurringTransaction(Base):
     user = relationship("User", back_populates="recurring_transactions")
 
 
+class AuditLog(Base):
+    """Audit trail written by the database triggers (read-only here).
+
+    The table is range-partitioned by changed_at, so the primary key
+    includes it; filter on changed_at to let PostgreSQL prune partitions.
+    """
+    __tablename__ = "audit_log"
+    
+    id = Column(BigInteger, primary_key=True)
+    changed_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
+    table_name = Column(String(100), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    action = Column(_pg_enum(AuditAction, "audit_action"), nullable=False)
+    old_data = Column(JSONB)
+    new_data = Column(JSONB)
+    changed_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL", onupdate="CASCADE"))
+    ip_address = Column(INET)
+    user_agent = Column(Text)
+
+
 
 
 
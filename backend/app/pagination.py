@@ -0,0 +1,23 @@
+"""Opaque keyset cursors for paginated listings."""
+import base64
+import json
+from datetime import date
+from typing import Optional, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """Encode the (date, id) key of the last row on a page."""
+    payload = json.dumps([row_date.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[date, int]]:
+    """Decode a cursor produced by encode_cursor, None if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        row_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(row_date), int(row_id)
+    except (ValueError, TypeError):
+        return None
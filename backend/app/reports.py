@@ -0,0 +1,71 @@
+"""Cached, conditional responses for the report endpoints.
+
+Report handlers pass their computation to cached_report (or
+cached_report_async); the result is served from app.cache.report_cache
+while the user's data is unchanged, and a request whose If-None-Match
+matches the current ETag gets an empty 304.
+"""
+from typing import Any, Awaitable, Callable, Union
+
+from fastapi import Request, Response
+
+from app.cache import report_cache
+from app.config import settings
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison, as required for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _lookup(request: Request, response: Response, user_id: int, endpoint: str, params: dict):
+    """Return (cache key, 304 response or cached value or None)."""
+    key = report_cache.key(user_id, endpoint, params)
+    etag = report_cache.etag(key)
+    if _etag_matches(request, etag):
+        return key, Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return key, report_cache.get(key)
+
+
+def cached_report(
+    request: Request,
+    response: Response,
+    user_id: int,
+    endpoint: str,
+    params: dict,
+    compute: Callable[[], Any]
+) -> Union[Any, Response]:
+    """Result of ``compute()``, cached per user, endpoint and params."""
+    if not settings.REPORT_CACHE_ENABLED:
+        return compute()
+    key, result = _lookup(request, response, user_id, endpoint, params)
+    if result is None:
+        result = compute()
+        report_cache.set(key, result)
+    return result
+
+
+async def cached_report_async(
+    request: Request,
+    response: Response,
+    user_id: int,
+    endpoint: str,
+    params: dict,
+    compute: Callable[[], Awaitable[Any]]
+) -> Union[Any, Response]:
+    """Async variant of cached_report for the async routers."""
+    if not settings.REPORT_CACHE_ENABLED:
+        return await compute()
+    key, result = _lookup(request, response, user_id, endpoint, params)
+    if result is None:
+        result = await compute()
+        report_cache.set(key, result)
+    return result
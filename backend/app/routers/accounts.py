@@ -1,12 +1,12 @@
 """Account routes."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
+from app.reports import cached_report
 
 router = APIRouter(prefix="/api/accounts", tags=["accounts"])
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/accounts", tags=["accounts"])
 def get_accounts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of accounts."""
@@ -27,7 +27,7 @@ def get_accounts(
 @router.get("/{account_id}", response_model=schemas.AccountResponse)
 def get_account(
     account_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific account."""
@@ -41,7 +41,7 @@ def get_account(
 @router.post("", response_model=schemas.AccountResponse, status_code=status.HTTP_201_CREATED)
 def create_account(
     account: schemas.AccountCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new account."""
@@ -54,7 +54,7 @@ def create_account(
 def update_account(
     account_id: int,
     account_update: schemas.AccountUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update an account."""
@@ -68,7 +68,7 @@ def update_account(
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_account(
     account_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete an account."""
@@ -80,16 +80,21 @@ def delete_account(
 
 @router.get("/summary/total-balance")
 def get_total_balance(
-    current_user: models.User = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get total balance using database function."""
-    result = db.execute(
-        text("SELECT get_user_total_balance(:user_id) as total_balance"),
-        {"user_id": current_user.id}
-    )
-    row = result.first()
-    return {"total_balance": float(row[0]) if row else 0.0}
+    """Get total balance using database function (cached, supports ETag)."""
+    def compute():
+        result = db.execute(
+            text("SELECT get_user_total_balance(:user_id) as total_balance"),
+            {"user_id": current_user.id}
+        )
+        row = result.first()
+        return {"total_balance": float(row[0]) if row else 0.0}
+    
+    return cached_report(request, response, current_user.id, "accounts.total_balance", {}, compute)
 
 
 
@@ -0,0 +1,212 @@
+"""Async versions of the read and report routes (ASYNC_DATABASE).
+
+When enabled, this router is included before the sync routers, so these
+handlers take over the same paths and run on the event loop instead of
+the threadpool. Write routes keep using the sync routers.
+"""
+from typing import List, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app import async_crud, schemas
+from app.auth import get_current_active_user_async, UserPrincipal
+from app import models
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.reports import cached_report_async
+
+router = APIRouter(tags=["async"])
+
+
+# Transactions
+@router.get("/api/transactions", response_model=List[schemas.TransactionResponse])
+async def get_transactions(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get list of transactions."""
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    trans_type = None
+    if transaction_type:
+        try:
+            trans_type = models.TransactionType(transaction_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid transaction type. Must be one of: {[e.value for e in models.TransactionType]}"
+            )
+
+    transactions = await async_crud.get_transactions(
+        db,
+        user_id=current_user.id,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=trans_type,
+        category_id=category_id,
+        after=after
+    )
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date, last.id)
+    return transactions
+
+
+@router.get("/api/transactions/search", response_model=List[schemas.TransactionResponse])
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search transactions by description (full-text) and payee, best matches first."""
+    return await async_crud.search_transactions(
+        db,
+        user_id=current_user.id,
+        q=q,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
+@router.get("/api/transactions/{transaction_id}", response_model=schemas.TransactionResponse)
+async def get_transaction(
+    transaction_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific transaction."""
+    transaction = await async_crud.get_transaction(db, transaction_id, current_user.id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
+
+@router.get("/api/transactions/reports/financial", response_model=List[schemas.FinancialReportResponse])
+async def get_financial_report(
+    request: Request,
+    response: Response,
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get financial report using database function (cached, supports ETag)."""
+    params = {"start_date": start_date, "end_date": end_date}
+    return await cached_report_async(
+        request, response, current_user.id, "transactions.financial", params,
+        lambda: async_crud.fetch_all(
+            db,
+            "SELECT * FROM get_user_financial_report(:user_id, :start_date, :end_date)",
+            {"user_id": current_user.id, **params}
+        )
+    )
+
+
+@router.get("/api/transactions/reports/top-expenses", response_model=List[schemas.TopExpenseCategoryResponse])
+async def get_top_expense_categories(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=50),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get top expense categories using database function (cached, supports ETag)."""
+    params = {"limit": limit, "start_date": start_date, "end_date": end_date}
+    return await cached_report_async(
+        request, response, current_user.id, "transactions.top_expenses", params,
+        lambda: async_crud.fetch_all(
+            db,
+            "SELECT * FROM get_top_expense_categories(:user_id, :limit, :start_date, :end_date)",
+            {"user_id": current_user.id, **params}
+        )
+    )
+
+
+# Accounts
+@router.get("/api/accounts", response_model=List[schemas.AccountResponse])
+async def get_accounts(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get list of accounts."""
+    return await async_crud.get_accounts(db, user_id=current_user.id, skip=skip, limit=limit)
+
+
+@router.get("/api/accounts/{account_id}", response_model=schemas.AccountResponse)
+async def get_account(
+    account_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific account."""
+    account = await async_crud.get_account(db, account_id, current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account
+
+
+@router.get("/api/accounts/summary/total-balance")
+async def get_total_balance(
+    request: Request,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get total balance using database function (cached, supports ETag)."""
+    async def compute():
+        rows = await async_crud.fetch_all(
+            db,
+            "SELECT get_user_total_balance(:user_id) as total_balance",
+            {"user_id": current_user.id}
+        )
+        return {"total_balance": float(rows[0]["total_balance"]) if rows else 0.0}
+    
+    return await cached_report_async(
+        request, response, current_user.id, "accounts.total_balance", {}, compute
+    )
+
+
+# Budgets
+@router.get("/api/budgets/reports/status", response_model=List[schemas.BudgetStatusResponse])
+async def get_budget_status(
+    request: Request,
+    response: Response,
+    year: int = Query(...),
+    month: int = Query(..., ge=1, le=12),
+    current_user: UserPrincipal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get budget status report using database function (cached, supports ETag)."""
+    params = {"year": year, "month": month}
+    return await cached_report_async(
+        request, response, current_user.id, "budgets.status", params,
+        lambda: async_crud.fetch_all(
+            db,
+            "SELECT * FROM get_budget_status_report(:user_id, :year, :month)",
+            {"user_id": current_user.id, **params}
+        )
+    )
@@ -0,0 +1,57 @@
+"""Audit history routes."""
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import crud, schemas
+from app.auth import get_current_active_user, UserPrincipal
+from app.config import settings
+
+router = APIRouter(prefix="/api/audit", tags=["audit"])
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive query datetimes as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@router.get("/{table_name}/{record_id}", response_model=List[schemas.AuditLogResponse])
+def get_audit_history(
+    table_name: str,
+    record_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the change history of a record within a time range.
+    
+    Defaults to the last AUDIT_HISTORY_DEFAULT_DAYS days; only the audit_log
+    partitions overlapping [start, end) are scanned.
+    """
+    if table_name not in crud.AUDITED_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid table name. Must be one of: {list(crud.AUDITED_MODELS)}"
+        )
+    
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=settings.AUDIT_HISTORY_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    if not crud.audited_record_owned(db, table_name, record_id, current_user.id, start):
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    return crud.get_audit_history(
+        db,
+        table_name=table_name,
+        record_id=record_id,
+        start=start,
+        end=end,
+        skip=skip,
+        limit=limit
+    )
@@ -5,9 +5,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import verify_password, get_password_hash, create_access_token, get_current_active_user
+from app.auth import (
+    verify_password, get_password_hash, create_access_token,
+    get_current_active_user, UserPrincipal
+)
 from app.config import settings
-from app import models
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -62,7 +64,13 @@ def login(
 
 
 @router.get("/me", response_model=schemas.UserResponse)
-def read_users_me(current_user: models.User = Depends(get_current_active_user)):
+def read_users_me(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
     """Get current user information."""
-    return current_user
+    user = crud.get_user(db, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
@@ -1,12 +1,12 @@
 """Budget routes."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
+from app.reports import cached_report
 
 router = APIRouter(prefix="/api/budgets", tags=["budgets"])
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/budgets", tags=["budgets"])
 def get_budgets(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of budgets."""
@@ -27,7 +27,7 @@ def get_budgets(
 @router.get("/{budget_id}", response_model=schemas.BudgetResponse)
 def get_budget(
     budget_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific budget."""
@@ -41,7 +41,7 @@ def get_budget(
 @router.post("", response_model=schemas.BudgetResponse, status_code=status.HTTP_201_CREATED)
 def create_budget(
     budget: schemas.BudgetCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new budget."""
@@ -54,7 +54,7 @@ def create_budget(
 def update_budget(
     budget_id: int,
     budget_update: schemas.BudgetUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a budget."""
@@ -68,7 +68,7 @@ def update_budget(
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_budget(
     budget_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a budget."""
@@ -80,17 +80,28 @@ def delete_budget(
 
 @router.get("/reports/status", response_model=List[schemas.BudgetStatusResponse])
 def get_budget_status(
+    request: Request,
+    response: Response,
     year: int = Query(...),
     month: int = Query(..., ge=1, le=12),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get budget status report using database function."""
-    result = db.execute(
-        text("SELECT * FROM get_budget_status_report(:user_id, :year, :month)"),
-        {"user_id": current_user.id, "year": year, "month": month}
-    )
-    return [dict(row) for row in result]
+    """Get budget status report using database function (cached, supports ETag).
+    
+    Monthly budgets are evaluated for the given month and yearly budgets for
+    its year, both clipped to the budget's start and end dates.
+    """
+    params = {"year": year, "month": month}
+    
+    def compute():
+        result = db.execute(
+            text("SELECT * FROM get_budget_status_report(:user_id, :year, :month)"),
+            {"user_id": current_user.id, **params}
+        )
+        return [dict(row) for row in result.mappings()]
+    
+    return cached_report(request, response, current_user.id, "budgets.status", params, compute)
 
 
 
@@ -4,8 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
@@ -14,7 +13,7 @@ router = APIRouter(prefix="/api/categories", tags=["categories"])
 def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of categories."""
@@ -26,7 +25,7 @@ def get_categories(
 @router.get("/{category_id}", response_model=schemas.CategoryResponse)
 def get_category(
     category_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific category."""
@@ -40,7 +39,7 @@ def get_category(
 @router.post("", response_model=schemas.CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
     category: schemas.CategoryCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new category."""
@@ -53,7 +52,7 @@ def create_category(
 def update_category(
     category_id: int,
     category_update: schemas.CategoryUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a category."""
@@ -67,7 +66,7 @@ def update_category(
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_category(
     category_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a category."""
@@ -0,0 +1,112 @@
+"""Dashboard routes.
+
+Read the materialised views of database/08_materialized_views.sql by their
+(user_id, ...) unique indexes. The data is as of ``refreshed_at`` and lags
+writes by up to the view's refresh interval, see app.dashboard.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.database import get_db
+from app import schemas
+from app.auth import get_current_active_user, UserPrincipal
+from app.dashboard import refreshed_at
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+
+@router.get("/accounts", response_model=schemas.DashboardAccountsSummary)
+def get_accounts_summary(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Account count and active balances by account type."""
+    row = db.execute(
+        text("SELECT * FROM mv_user_accounts_summary WHERE user_id = :user_id"),
+        {"user_id": current_user.id}
+    ).mappings().first()
+    return {**(row or {}), "refreshed_at": refreshed_at(db, "mv_user_accounts_summary")}
+
+
+@router.get("/monthly-summary", response_model=schemas.DashboardMonthlySummaryResponse)
+def get_monthly_summary(
+    months: int = Query(12, ge=1, le=120),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Income, expense and net income of the last ``months`` months with transactions, newest first."""
+    result = db.execute(
+        text("""
+            SELECT * FROM mv_monthly_financial_summary
+            WHERE user_id = :user_id
+            ORDER BY month DESC
+            LIMIT :months
+        """),
+        {"user_id": current_user.id, "months": months}
+    )
+    return {
+        "refreshed_at": refreshed_at(db, "mv_monthly_financial_summary"),
+        "items": [dict(row) for row in result.mappings()],
+    }
+
+
+@router.get("/current-month-expenses", response_model=schemas.DashboardCategoryExpensesResponse)
+def get_current_month_expenses(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Expenses of the current month by category, largest first."""
+    items = [dict(row) for row in db.execute(
+        text("""
+            SELECT * FROM mv_current_month_expenses_by_category
+            WHERE user_id = :user_id
+            ORDER BY total_amount DESC
+        """),
+        {"user_id": current_user.id}
+    ).mappings()]
+    return {
+        "refreshed_at": refreshed_at(db, "mv_current_month_expenses_by_category"),
+        # The month the view was last refreshed for (None if it has no rows)
+        "month": items[0]["month"] if items else None,
+        "items": items,
+    }
+
+
+@router.get("/tags", response_model=schemas.DashboardTagsResponse)
+def get_tags_summary(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Usage of every tag, most used first."""
+    result = db.execute(
+        text("""
+            SELECT * FROM mv_tags_summary
+            WHERE user_id = :user_id
+            ORDER BY transaction_count DESC, tag_id
+        """),
+        {"user_id": current_user.id}
+    )
+    return {
+        "refreshed_at": refreshed_at(db, "mv_tags_summary"),
+        "items": [dict(row) for row in result.mappings()],
+    }
+
+
+@router.get("/budgets", response_model=schemas.DashboardBudgetsResponse)
+def get_budgets_status(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Status of the active budgets for the current month or year."""
+    result = db.execute(
+        text("""
+            SELECT * FROM mv_budgets_with_status
+            WHERE user_id = :user_id
+            ORDER BY percentage_used DESC, budget_id
+        """),
+        {"user_id": current_user.id}
+    )
+    return {
+        "refreshed_at": refreshed_at(db, "mv_budgets_with_status"),
+        "items": [dict(row) for row in result.mappings()],
+    }
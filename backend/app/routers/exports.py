@@ -0,0 +1,68 @@
+"""Transaction export route.
+
+Kept apart from the transactions router so it can be included before
+every router with a /api/transactions/{transaction_id} route.
+"""
+from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app import crud, exporters
+from app.auth import get_current_active_user, UserPrincipal
+from app import models
+
+router = APIRouter(prefix="/api/transactions", tags=["transactions"])
+
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", description="csv, ndjson or parquet"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    chunk_size: int = Query(settings.EXPORT_CHUNK_SIZE, ge=100, le=100000),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream all matching transactions with account, category and tag names.
+    
+    Rows are read through a server-side cursor ``chunk_size`` at a time and
+    written to the response as they arrive, newest first.
+    """
+    export_format = format.lower()
+    if export_format not in exporters.SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format. Must be one of: {list(exporters.SUPPORTED_FORMATS)}"
+        )
+    if not exporters.format_available(export_format):
+        raise HTTPException(status_code=400, detail="Parquet export is not available on this server")
+    
+    trans_type = None
+    if transaction_type:
+        try:
+            trans_type = models.TransactionType(transaction_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid transaction type. Must be one of: {[e.value for e in models.TransactionType]}"
+            )
+    
+    chunks = crud.iter_transaction_export(
+        db,
+        current_user.id,
+        chunk_size,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=trans_type,
+        category_id=category_id
+    )
+    return StreamingResponse(
+        exporters.WRITERS[export_format](chunks),
+        media_type=exporters.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'}
+    )
@@ -5,8 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
 
 router = APIRouter(prefix="/api/goals", tags=["goals"])
 
@@ -15,7 +14,7 @@ router = APIRouter(prefix="/api/goals", tags=["goals"])
 def get_goals(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of goals."""
@@ -27,7 +26,7 @@ def get_goals(
 @router.get("/{goal_id}", response_model=schemas.GoalResponse)
 def get_goal(
     goal_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific goal."""
@@ -41,7 +40,7 @@ def get_goal(
 @router.post("", response_model=schemas.GoalResponse, status_code=status.HTTP_201_CREATED)
 def create_goal(
     goal: schemas.GoalCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new goal."""
@@ -54,7 +53,7 @@ def create_goal(
 def update_goal(
     goal_id: int,
     goal_update: schemas.GoalUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a goal."""
@@ -68,7 +67,7 @@ def update_goal(
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_goal(
     goal_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a goal."""
@@ -81,7 +80,7 @@ def delete_goal(
 @router.get("/{goal_id}/progress")
 def get_goal_progress(
     goal_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get goal progress using database function."""
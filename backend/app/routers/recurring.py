@@ -4,8 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
 
 router = APIRouter(prefix="/api/recurring-transactions", tags=["recurring-transactions"])
 
@@ -14,7 +13,7 @@ router = APIRouter(prefix="/api/recurring-transactions", tags=["recurring-transa
 def get_recurring_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of recurring transactions."""
@@ -26,7 +25,7 @@ def get_recurring_transactions(
 @router.get("/{recurring_id}", response_model=schemas.RecurringTransactionResponse)
 def get_recurring_transaction(
     recurring_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific recurring transaction."""
@@ -40,7 +39,7 @@ def get_recurring_transaction(
 @router.post("", response_model=schemas.RecurringTransactionResponse, status_code=status.HTTP_201_CREATED)
 def create_recurring_transaction(
     recurring: schemas.RecurringTransactionCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new recurring transaction."""
@@ -56,7 +55,7 @@ def create_recurring_transaction(
 def update_recurring_transaction(
     recurring_id: int,
     recurring_update: schemas.RecurringTransactionUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a recurring transaction."""
@@ -70,7 +69,7 @@ def update_recurring_transaction(
 @router.delete("/{recurring_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_recurring_transaction(
     recurring_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a recurring transaction."""
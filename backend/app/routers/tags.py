@@ -4,8 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from app.database import get_db, set_user_id_for_audit
 from app import crud, schemas
-from app.auth import get_current_active_user
-from app import models
+from app.auth import get_current_active_user, UserPrincipal
 
 router = APIRouter(prefix="/api/tags", tags=["tags"])
 
@@ -14,7 +13,7 @@ router = APIRouter(prefix="/api/tags", tags=["tags"])
 def get_tags(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of tags."""
@@ -26,7 +25,7 @@ def get_tags(
 @router.get("/{tag_id}", response_model=schemas.TagResponse)
 def get_tag(
     tag_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific tag."""
@@ -40,7 +39,7 @@ def get_tag(
 @router.post("", response_model=schemas.TagResponse, status_code=status.HTTP_201_CREATED)
 def create_tag(
     tag: schemas.TagCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new tag."""
@@ -53,7 +52,7 @@ def create_tag(
 def update_tag(
     tag_id: int,
     tag_update: schemas.TagUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a tag."""
@@ -67,7 +66,7 @@ def update_tag(
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_tag(
     tag_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a tag."""
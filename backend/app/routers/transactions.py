@@ -1,12 +1,16 @@
 """Transaction routes."""
 from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from app.config import settings
 from app.database import get_db, set_user_id_for_audit
-from app import crud, schemas
-from app.auth import get_current_active_user
+from app import crud, schemas, importers, analytics
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.reports import cached_report
+from app.auth import get_current_active_user, UserPrincipal
 from app import models
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
@@ -14,18 +18,30 @@ router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 
 @router.get("", response_model=List[schemas.TransactionResponse])
 def get_transactions(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     transaction_type: Optional[str] = None,
     category_id: Optional[int] = None,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get list of transactions."""
+    """Get list of transactions.
+    
+    When the page is full, the cursor for the next page is returned in the
+    X-Next-Cursor header; pass it back as ``cursor`` instead of using ``skip``.
+    """
     set_user_id_for_audit(db, current_user.id)
     
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     # Convert string to enum if provided
     trans_type = None
     if transaction_type:
@@ -45,15 +61,41 @@ def get_transactions(
         start_date=start_date,
         end_date=end_date,
         transaction_type=trans_type,
-        category_id=category_id
+        category_id=category_id,
+        after=after
     )
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date, last.id)
     return transactions
 
 
+@router.get("/search", response_model=List[schemas.TransactionResponse])
+def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Search transactions by description (full-text) and payee, best matches first."""
+    return crud.search_transactions(
+        db,
+        user_id=current_user.id,
+        q=q,
+        skip=skip,
+        limit=limit,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
 @router.get("/{transaction_id}", response_model=schemas.TransactionResponse)
 def get_transaction(
     transaction_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific transaction."""
@@ -67,7 +109,7 @@ def get_transaction(
 @router.post("", response_model=schemas.TransactionResponse, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     transaction: schemas.TransactionCreate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new transaction."""
@@ -83,7 +125,7 @@ def create_transaction(
 def update_transaction(
     transaction_id: int,
     transaction_update: schemas.TransactionUpdate,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a transaction."""
@@ -97,7 +139,7 @@ def update_transaction(
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_transaction(
     transaction_id: int,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a transaction."""
@@ -110,76 +152,190 @@ def delete_transaction(
 @router.post("/batch-import", response_model=schemas.BatchImportResponse)
 def batch_import_transactions(
     batch_data: schemas.BatchImportRequest,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Batch import transactions with error logging."""
     set_user_id_for_audit(db, current_user.id)
     
-    successful = 0
-    failed = 0
-    errors = []
-    
-    for idx, item in enumerate(batch_data.transactions):
-        try:
-            transaction = schemas.TransactionCreate(**item.model_dump())
-            crud.create_transaction(db, transaction, current_user.id)
-            successful += 1
-        except Exception as e:
-            failed += 1
-            errors.append({
-                "index": idx,
-                "data": item.model_dump(),
-                "error": str(e)
-            })
+    successful, errors = crud.bulk_create_transactions(
+        db, batch_data.transactions, current_user.id
+    )
     
     return schemas.BatchImportResponse(
         total=len(batch_data.transactions),
         successful=successful,
-        failed=failed,
+        failed=len(errors),
         errors=errors
     )
 
 
+@router.post("/bulk-update", response_model=schemas.BulkTransactionResult)
+def bulk_update_transactions(
+    bulk: schemas.BulkTransactionUpdate,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Change fields and tags of all transactions matching a filter or id list."""
+    set_user_id_for_audit(db, current_user.id)
+    try:
+        return crud.bulk_update_transactions(db, bulk, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk-delete", response_model=schemas.BulkTransactionResult)
+def bulk_delete_transactions(
+    bulk: schemas.BulkTransactionDelete,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete all transactions matching a filter or id list."""
+    set_user_id_for_audit(db, current_user.id)
+    try:
+        return crud.bulk_delete_transactions(db, bulk, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/import")
+def import_statement(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ofx; detected from the file name if omitted"),
+    account_id: Optional[int] = Query(None, description="Account for rows that do not specify one"),
+    encoding: str = Query("utf-8-sig"),
+    delimiter: str = Query(",", min_length=1, max_length=1),
+    chunk_size: int = Query(settings.BATCH_IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a CSV/OFX statement into transactions, reporting progress per chunk as NDJSON."""
+    statement_format = (format or importers.detect_format(file.filename) or "").lower()
+    if statement_format not in importers.SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported statement format. Must be one of: {list(importers.SUPPORTED_FORMATS)}"
+        )
+    
+    # Fail with 400 before the 200 streaming response has started
+    try:
+        importers.check_encoding(encoding)
+        if statement_format == "ofx":
+            rows = importers.iter_ofx_rows(file.file, account_id=account_id, encoding=encoding)
+        else:
+            rows = importers.iter_csv_rows(
+                file.file, account_id=account_id, encoding=encoding, delimiter=delimiter
+            )
+    except importers.StatementError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    progress = importers.import_rows(db, rows, current_user.id, chunk_size)
+    return StreamingResponse(
+        (report.model_dump_json() + "\n" for report in progress),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/reports/financial", response_model=List[schemas.FinancialReportResponse])
 def get_financial_report(
+    request: Request,
+    response: Response,
     start_date: date = Query(...),
     end_date: date = Query(...),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get financial report using database function."""
-    result = db.execute(
-        text("SELECT * FROM get_user_financial_report(:user_id, :start_date, :end_date)"),
-        {"user_id": current_user.id, "start_date": start_date, "end_date": end_date}
-    )
-    return [dict(row) for row in result]
+    """Get financial report using database function (cached, supports ETag)."""
+    params = {"start_date": start_date, "end_date": end_date}
+    
+    def compute():
+        result = db.execute(
+            text("SELECT * FROM get_user_financial_report(:user_id, :start_date, :end_date)"),
+            {"user_id": current_user.id, **params}
+        )
+        return [dict(row) for row in result.mappings()]
+    
+    return cached_report(request, response, current_user.id, "transactions.financial", params, compute)
 
 
 @router.get("/reports/top-expenses", response_model=List[schemas.TopExpenseCategoryResponse])
 def get_top_expense_categories(
+    request: Request,
+    response: Response,
     limit: int = Query(10, ge=1, le=50),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get top expense categories using database function."""
-    result = db.execute(
-        text("""
-            SELECT * FROM get_top_expense_categories(
-                :user_id, 
-                :limit, 
-                :start_date, 
-                :end_date
-            )
-        """),
-        {
-            "user_id": current_user.id,
-            "limit": limit,
-            "start_date": start_date,
-            "end_date": end_date
-        }
+    """Get top expense categories using database function (cached, supports ETag)."""
+    params = {"limit": limit, "start_date": start_date, "end_date": end_date}
+    
+    def compute():
+        result = db.execute(
+            text("""
+                SELECT * FROM get_top_expense_categories(
+                    :user_id, 
+                    :limit, 
+                    :start_date, 
+                    :end_date
+                )
+            """),
+            {"user_id": current_user.id, **params}
+        )
+        return [dict(row) for row in result.mappings()]
+    
+    return cached_report(request, response, current_user.id, "transactions.top_expenses", params, compute)
+
+
+@router.get("/reports/cash-flow", response_model=schemas.CashFlowResponse)
+def get_cash_flow(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = Query(None, description="Defaults to one year before end_date"),
+    end_date: Optional[date] = Query(None, description="Defaults to today in the user's timezone"),
+    granularity: str = Query("month", description="day, week or month"),
+    window: int = Query(3, ge=1, le=90, description="Periods in the rolling average of net"),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Income, expense, net and balance series with rolling average and
+    year-over-year deltas (cached, supports ETag)."""
+    if granularity not in analytics.GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity. Must be one of: {list(analytics.GRANULARITIES)}"
+        )
+    start_date, end_date = analytics.default_range(current_user.timezone, start_date, end_date)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    params = {"start_date": start_date, "end_date": end_date, "granularity": granularity, "window": window}
+    
+    return cached_report(
+        request, response, current_user.id, "transactions.cash_flow", params,
+        lambda: analytics.cash_flow(db, current_user.id, **params)
     )
-    return [dict(row) for row in result]
 
+
+@router.get("/reports/forecast", response_model=schemas.ForecastResponse)
+def get_forecast(
+    request: Request,
+    response: Response,
+    months: int = Query(12, ge=1, le=60),
+    history_months: int = Query(6, ge=1, le=36, description="Months of history behind the daily averages"),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Daily projected balances from recurring schedules and historical
+    category averages, starting tomorrow in the user's timezone (cached,
+    supports ETag)."""
+    params = {
+        "today": analytics.user_today(current_user.timezone),
+        "months": months,
+        "history_months": history_months,
+    }
+    
+    return cached_report(
+        request, response, current_user.id, "transactions.forecast", params,
+        lambda: analytics.forecast(db, current_user.id, **params)
+    )
@@ -0,0 +1,152 @@
+"""Materialisation of due recurring transactions.
+
+The work itself is done by the materialize_recurring_transactions() database
+function, one batch of schedules per call; this module walks the batches by
+their (next_date, id) key, commits each one and keeps throughput metrics.
+It runs either inside the API process (RECURRING_SCHEDULER_ENABLED) or as
+``python -m app.commands.materialize_recurring``.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.cache import report_cache
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZE_BATCH = text(
+    "SELECT * FROM materialize_recurring_transactions("
+    ":as_of, :batch_size, :after_date, :after_id, :max_occurrences)"
+)
+
+
+@dataclass
+class RunStats:
+    """Counters of one materialisation run."""
+    as_of: date
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    duration_seconds: float = 0.0
+    batches: int = 0
+    schedules: int = 0
+    transactions_created: int = 0
+    schedules_skipped: int = 0
+    
+    @property
+    def schedules_per_second(self) -> float:
+        return self.schedules / self.duration_seconds if self.duration_seconds else 0.0
+    
+    @property
+    def transactions_per_second(self) -> float:
+        return self.transactions_created / self.duration_seconds if self.duration_seconds else 0.0
+    
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["schedules_per_second"] = round(self.schedules_per_second, 1)
+        data["transactions_per_second"] = round(self.transactions_per_second, 1)
+        return data
+
+
+class SchedulerMetrics:
+    """Thread-safe totals and the last run of this process."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.schedules = 0
+        self.transactions_created = 0
+        self.last_run: Optional[RunStats] = None
+        self.last_error: Optional[str] = None
+    
+    def record(self, stats: RunStats) -> None:
+        with self._lock:
+            self.runs += 1
+            self.schedules += stats.schedules
+            self.transactions_created += stats.transactions_created
+            self.last_run = stats
+    
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = repr(error)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "failures": self.failures,
+                "schedules": self.schedules,
+                "transactions_created": self.transactions_created,
+                "last_run": self.last_run.as_dict() if self.last_run else None,
+                "last_error": self.last_error,
+            }
+
+
+metrics = SchedulerMetrics()
+
+
+def materialize_due(
+    as_of: Optional[date] = None,
+    batch_size: Optional[int] = None,
+    max_occurrences: Optional[int] = None
+) -> RunStats:
+    """Create the transactions of all schedules due on or before as_of."""
+    stats = RunStats(as_of=as_of or date.today())
+    batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+    max_occurrences = max_occurrences or settings.RECURRING_MAX_OCCURRENCES
+    after_date, after_id = date.min, 0
+    started = time.perf_counter()
+    
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(MATERIALIZE_BATCH, {
+                "as_of": stats.as_of,
+                "batch_size": batch_size,
+                "after_date": after_date,
+                "after_id": after_id,
+                "max_occurrences": max_occurrences,
+            }).one()
+        if not batch.batch_schedules:
+            break
+        
+        stats.batches += 1
+        stats.schedules += batch.batch_schedules
+        stats.transactions_created += batch.created_transactions
+        stats.schedules_skipped += batch.skipped_schedules
+        after_date, after_id = batch.cursor_date, batch.cursor_id
+        # A short batch means the due set is exhausted (or the rest is
+        # locked by another worker and will be picked up on its next tick)
+        if batch.batch_schedules < batch_size:
+            break
+    
+    stats.duration_seconds = time.perf_counter() - started
+    metrics.record(stats)
+    if stats.transactions_created:
+        # The affected users are not known here; drop every cached report
+        report_cache.clear()
+    logger.info(
+        "Recurring run for %s: %d schedules in %d batches, %d transactions created, "
+        "%d skipped, %.1fs (%.0f transactions/s)",
+        stats.as_of, stats.schedules, stats.batches, stats.transactions_created,
+        stats.schedules_skipped, stats.duration_seconds, stats.transactions_per_second
+    )
+    return stats
+
+
+async def run_scheduler(interval: float) -> None:
+    """Run materialize_due every ``interval`` seconds until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(materialize_due)
+        except Exception as error:
+            metrics.record_failure(error)
+            logger.exception("Recurring transaction run failed")
+        await asyncio.sleep(interval)
@@ -1,11 +1,12 @@
 """Pydantic schemas for request/response validation."""
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional, List
+import datetime as dt
 from datetime import date, datetime
 from decimal import Decimal
 from app.models import (
     AccountType, TransactionType, CategoryType, 
-    BudgetPeriod, RecurringInterval
+    BudgetPeriod, RecurringInterval, AuditAction
 )
 
 
@@ -125,7 +126,8 @@ class TransactionUpdate(BaseModel):
     category_id: Optional[int] = None
     amount: Optional[Decimal] = Field(None, gt=0)
     type: Optional[TransactionType] = None
-    date: Optional[date] = None
+    # dt.date: the field name shadows ``date`` once it has a default
+    date: Optional[dt.date] = None
     description: Optional[str] = None
     payee: Optional[str] = None
     location: Optional[str] = None
@@ -165,6 +167,10 @@ class TagResponse(TagBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Resolve the "TagResponse" forward reference
+TransactionResponse.model_rebuild()
+
+
 # Budget Schemas
 class BudgetBase(BaseModel):
     category_id: Optional[int] = None
@@ -262,6 +268,8 @@ class RecurringTransactionUpdate(BaseModel):
 class RecurringTransactionResponse(RecurringTransactionBase):
     id: int
     user_id: int
+    start_date: date
+    occurrence_count: int
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -292,6 +300,70 @@ class BatchImportResponse(BaseModel):
     errors: List[dict]
 
 
+class StatementImportProgress(BaseModel):
+    chunk: int
+    processed: int
+    successful: int
+    failed: int
+    errors: List[dict]
+    done: bool = False
+    # Set on the final record when the import stopped early
+    error: Optional[str] = None
+
+
+# Bulk update/delete Schemas
+class TransactionFilter(BaseModel):
+    """Selects the user's transactions: by id list and/or the list filters."""
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    transaction_type: Optional[TransactionType] = None
+    category_id: Optional[int] = None
+
+
+class TransactionBulkChanges(BaseModel):
+    """Fields to set on every selected transaction; unset fields are kept."""
+    account_id: Optional[int] = None
+    category_id: Optional[int] = None
+    type: Optional[TransactionType] = None
+    # dt.date: the field name shadows ``date`` once it has a default
+    date: Optional[dt.date] = None
+    description: Optional[str] = None
+    payee: Optional[str] = None
+    location: Optional[str] = None
+    add_tag_ids: Optional[List[int]] = None
+    remove_tag_ids: Optional[List[int]] = None
+
+
+class BulkTransactionUpdate(BaseModel):
+    filter: TransactionFilter
+    changes: TransactionBulkChanges
+
+
+class BulkTransactionDelete(BaseModel):
+    filter: TransactionFilter
+
+
+class BulkTransactionResult(BaseModel):
+    affected: int
+    tags_added: int = 0
+    tags_removed: int = 0
+
+
+# Audit Schemas
+class AuditLogResponse(BaseModel):
+    id: int
+    table_name: str
+    record_id: int
+    action: AuditAction
+    old_data: Optional[dict] = None
+    new_data: Optional[dict] = None
+    changed_by: Optional[int] = None
+    changed_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Report Schemas
 class FinancialReportResponse(BaseModel):
     category_name: str
@@ -313,6 +385,9 @@ class TopExpenseCategoryResponse(BaseModel):
 class BudgetStatusResponse(BaseModel):
     budget_id: int
     category_name: str
+    period: BudgetPeriod
+    period_start: date
+    period_end: date
     budget_amount: Decimal
     spent_amount: Decimal
     remaining: Decimal
@@ -320,6 +395,119 @@ class BudgetStatusResponse(BaseModel):
     is_exceeded: bool
 
 
+class CashFlowPoint(BaseModel):
+    period_start: date
+    income: float
+    expense: float
+    net: float
+    balance: float
+    net_rolling_avg: Optional[float] = None
+    income_yoy_delta: Optional[float] = None
+    expense_yoy_delta: Optional[float] = None
+    net_yoy_delta: Optional[float] = None
+
+
+class CashFlowResponse(BaseModel):
+    granularity: str
+    start_date: date
+    end_date: date
+    window: int
+    points: List[CashFlowPoint]
+
+
+class ForecastAccount(BaseModel):
+    account_id: int
+    name: str
+    current_balance: float
+    daily_baseline: float
+    balances: List[float]
+
+
+class ForecastCategory(BaseModel):
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    daily_amount: float
+
+
+class ForecastResponse(BaseModel):
+    """Projected balances; ``total`` and every account's ``balances`` are
+    aligned with ``dates``."""
+    start_date: date
+    end_date: date
+    history_months: int
+    dates: List[date]
+    total: List[float]
+    accounts: List[ForecastAccount]
+    category_baseline: List[ForecastCategory]
+
+
+# Dashboard Schemas (materialised views, refreshed in the background)
+class DashboardAccountsSummary(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    total_accounts: int = 0
+    active_accounts: int = 0
+    total_balance: Decimal = Decimal("0.00")
+    cash_balance: Decimal = Decimal("0.00")
+    debit_balance: Decimal = Decimal("0.00")
+    credit_balance: Decimal = Decimal("0.00")
+    deposit_balance: Decimal = Decimal("0.00")
+
+
+class MonthlySummaryItem(BaseModel):
+    month: date
+    total_income: Decimal
+    total_expense: Decimal
+    net_income: Decimal
+    income_count: int
+    expense_count: int
+    total_transactions: int
+
+
+class DashboardMonthlySummaryResponse(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    items: List[MonthlySummaryItem]
+
+
+class CategoryExpenseItem(BaseModel):
+    category_id: int
+    category_name: str
+    parent_id: Optional[int] = None
+    parent_category_name: str
+    total_amount: Decimal
+    transaction_count: int
+    avg_amount: Decimal
+    min_amount: Decimal
+    max_amount: Decimal
+    budget_limit: Optional[Decimal] = None
+    budget_usage_percent: Optional[Decimal] = None
+
+
+class DashboardCategoryExpensesResponse(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    month: Optional[date] = None
+    items: List[CategoryExpenseItem]
+
+
+class TagSummaryItem(BaseModel):
+    tag_id: int
+    tag_name: str
+    transaction_count: int
+    total_amount: Decimal
+    avg_amount: Optional[Decimal] = None
+    first_use_date: Optional[date] = None
+    last_use_date: Optional[date] = None
+
+
+class DashboardTagsResponse(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    items: List[TagSummaryItem]
+
+
+class DashboardBudgetsResponse(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    items: List[BudgetStatusResponse]
+
+
 
 
 
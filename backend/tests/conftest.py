@@ -0,0 +1,71 @@
+"""Shared fixtures.
+
+Tests that use the ``db`` or ``connection`` fixtures run against the
+PostgreSQL database in TEST_DATABASE_URL, initialised with database/init.sql,
+and are skipped when it is not set. Every such test runs inside a transaction
+that is rolled back afterwards; commits made by the code under test only
+release savepoints.
+"""
+import os
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Before app.config is imported, so app.database connects to the test database
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def connection():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app.database import engine
+    
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        yield conn
+        transaction.rollback()
+
+
+@pytest.fixture
+def db(connection):
+    session = Session(bind=connection, join_transaction_mode="create_savepoint", autoflush=False)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(connection):
+    """A user with one debit account (balance 10000) and one expense category."""
+    user_id = connection.execute(text(
+        "INSERT INTO users (email, password_hash) VALUES ('pytest@finflow.test', 'x') RETURNING id"
+    )).scalar()
+    account_id = connection.execute(text("""
+        INSERT INTO accounts (user_id, name, type, balance, opening_balance)
+        VALUES (:user_id, 'Карта', 'debit_card', 10000.00, 10000.00) RETURNING id
+    """), {"user_id": user_id}).scalar()
+    category_id = connection.execute(text("""
+        INSERT INTO categories (user_id, name, type) VALUES (:user_id, 'Продукты', 'expense') RETURNING id
+    """), {"user_id": user_id}).scalar()
+    return {"id": user_id, "account_id": account_id, "category_id": category_id}
+
+
+@pytest.fixture
+def client(db, user):
+    """API client authenticated as ``user`` whose requests use the test session."""
+    from fastapi.testclient import TestClient
+    from app.auth import UserPrincipal, get_current_active_user
+    from app.database import get_db
+    from app.main import app
+    
+    principal = UserPrincipal(id=user["id"], is_active=True, currency="RUB", timezone="Europe/Moscow")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: principal
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
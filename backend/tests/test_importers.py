@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from app import importers
+
+HEADER = b"account_id,category_id,amount,type,date,description,payee,tag_ids\n"
+
+
+def test_csv_rows_are_parsed():
+    stream = io.BytesIO(HEADER + b"1,,150.00,expense,2024-03-01,Coffee,Cafe,1|2\n")
+    rows = list(importers.iter_csv_rows(stream))
+    assert rows == [{
+        "account_id": "1", "category_id": None, "amount": "150.00", "type": "expense",
+        "date": "2024-03-01", "description": "Coffee", "payee": "Cafe", "tag_ids": ["1", "2"]
+    }]
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(importers.StatementError):
+        importers.check_encoding("no-such-encoding")
+
+
+def test_undecodable_header_is_rejected_before_iteration():
+    with pytest.raises(importers.StatementError):
+        importers.iter_csv_rows(io.BytesIO("сумма,тип\n".encode("cp1251")))
+
+
+def test_header_without_required_columns_is_rejected():
+    with pytest.raises(importers.StatementError, match="missing columns"):
+        importers.iter_csv_rows(io.BytesIO(b"foo,bar\n1,2\n"))
+
+
+def test_undecodable_row_raises_statement_error():
+    # Past the first read block, so the header itself decodes
+    rows = [b"1,,1.00,expense,2024-03-01,ok,,\n"] * 2000
+    stream = io.BytesIO(HEADER + b"".join(rows) + b"1,,1.00,expense,2024-03-01,\xff\xfe,,\n")
+    iterator = importers.iter_csv_rows(stream)
+    with pytest.raises(importers.StatementError, match="after line"):
+        for _ in iterator:
+            pass
+
+
+def test_import_stops_with_error_record_on_unreadable_statement(monkeypatch):
+    def rows():
+        yield {"account_id": 1}
+        raise importers.StatementError("Cannot read CSV after line 2")
+    
+    class Session:
+        def execute(self, *args, **kwargs):
+            pass
+    
+    monkeypatch.setattr(
+        importers.crud, "bulk_create_transactions",
+        lambda db, items, user_id, indexes: (len(items), [])
+    )
+    progress = list(importers.import_rows(Session(), rows(), user_id=1, chunk_size=10))
+    
+    final = progress[-1]
+    assert final.done and final.error == "Cannot read CSV after line 2"
+    assert final.processed == 1
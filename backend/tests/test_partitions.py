@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import text
+
+
+def snapshot(connection, user):
+    return {
+        "audit": connection.execute(text("SELECT COUNT(*) FROM audit_log")).scalar(),
+        "balance": connection.execute(text(
+            "SELECT balance FROM accounts WHERE id = :id"
+        ), {"id": user["account_id"]}).scalar(),
+        "totals": connection.execute(text("""
+            SELECT month, total_expense, transaction_count FROM monthly_category_totals
+            WHERE user_id = :user_id ORDER BY month
+        """), {"user_id": user["id"]}).all(),
+        "transactions": connection.execute(text("""
+            SELECT t.tableoid::regclass::TEXT, t.id, t.amount, COUNT(tt.tag_id)
+            FROM transactions t
+            LEFT JOIN transaction_tags tt ON tt.transaction_id = t.id AND tt.transaction_date = t.date
+            WHERE t.user_id = :user_id
+            GROUP BY t.tableoid, t.id, t.amount ORDER BY t.id
+        """), {"user_id": user["id"]}).all(),
+    }
+
+
+@pytest.mark.parametrize("audit_mode", ["row", "statement"])
+def test_partition_move_leaves_audit_and_balances_unchanged(connection, user, audit_mode):
+    if connection.execute(text("SELECT to_regclass('transactions_y2015')")).scalar() is not None:
+        pytest.skip("transactions_y2015 already exists")
+    connection.execute(text("SELECT set_audit_mode(:mode)"), {"mode": audit_mode})
+    rows = connection.execute(text("""
+        INSERT INTO transactions (account_id, category_id, amount, type, date, description)
+        VALUES (:account_id, :category_id, 100.00, 'expense', '2015-03-01', 'old statement'),
+               (:account_id, :category_id, 50.00, 'expense', '2015-07-15', 'old statement')
+        RETURNING id, date
+    """), {"account_id": user["account_id"], "category_id": user["category_id"]}).all()
+    tag_id = connection.execute(text(
+        "INSERT INTO tags (user_id, name) VALUES (:user_id, 'archive') RETURNING id"
+    ), {"user_id": user["id"]}).scalar()
+    connection.execute(
+        text("INSERT INTO transaction_tags (transaction_id, transaction_date, tag_id) VALUES (:id, :date, :tag_id)"),
+        [{"id": row.id, "date": row.date, "tag_id": tag_id} for row in rows]
+    )
+    before = snapshot(connection, user)
+    assert {row[0] for row in before["transactions"]} == {"transactions_default"}
+
+    created = connection.execute(text("SELECT * FROM create_transaction_partitions(0, 0)")).scalars().all()
+
+    assert "transactions_y2015" in created
+    after = snapshot(connection, user)
+    assert {row[0] for row in after["transactions"]} == {"transactions_y2015"}
+    assert [row[1:] for row in after["transactions"]] == [row[1:] for row in before["transactions"]]
+    assert after["audit"] == before["audit"]
+    assert after["balance"] == before["balance"]
+    assert after["totals"] == before["totals"]
+
+    # The triggers are back on for the new partition
+    connection.execute(text(
+        "UPDATE transactions SET amount = 60.00 WHERE id = :id AND date = :date"
+    ), {"id": rows[1].id, "date": rows[1].date})
+    assert snapshot(connection, user)["balance"] == before["balance"] - 10
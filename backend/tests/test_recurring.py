@@ -0,0 +1,60 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import text
+
+from app.analytics import expand_schedules
+
+
+def add_monthly_schedule(connection, user, next_date):
+    return connection.execute(text("""
+        INSERT INTO recurring_transactions (user_id, account_id, description, amount, type, interval, next_date)
+        VALUES (:user_id, :account_id, 'rent', 10.00, 'expense', 'monthly', :next_date)
+        RETURNING id
+    """), {"user_id": user["id"], "account_id": user["account_id"], "next_date": next_date}).scalar()
+
+
+def test_month_end_schedule_does_not_drift_across_runs(connection, user):
+    schedule_id = add_monthly_schedule(connection, user, date(2024, 1, 31))
+    # One run per month, so every run starts from the previous clamped next_date
+    for as_of in (date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)):
+        connection.execute(text("SELECT * FROM materialize_recurring_transactions(:as_of)"), {"as_of": as_of})
+
+    dates = connection.execute(text(
+        "SELECT date FROM transactions WHERE recurring_transaction_id = :id ORDER BY date"
+    ), {"id": schedule_id}).scalars().all()
+    assert dates == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+    schedule = connection.execute(text(
+        "SELECT start_date, occurrence_count, next_date FROM recurring_transactions WHERE id = :id"
+    ), {"id": schedule_id}).one()
+    assert tuple(schedule) == (date(2024, 1, 31), 4, date(2024, 5, 31))
+
+
+def test_changing_next_date_restarts_the_anchor(connection, user):
+    schedule_id = add_monthly_schedule(connection, user, date(2024, 1, 31))
+    connection.execute(text("SELECT * FROM materialize_recurring_transactions('2024-02-29')"))
+    connection.execute(text(
+        "UPDATE recurring_transactions SET next_date = '2024-06-15' WHERE id = :id"
+    ), {"id": schedule_id})
+
+    schedule = connection.execute(text(
+        "SELECT start_date, occurrence_count FROM recurring_transactions WHERE id = :id"
+    ), {"id": schedule_id}).one()
+    assert tuple(schedule) == (date(2024, 6, 15), 0)
+
+
+def test_expand_schedules_counts_months_from_the_start_date():
+    schedule, dates = expand_schedules(
+        np.array(["2024-01-31", "2024-01-01"], dtype="datetime64[D]"),
+        # The first schedule has already been materialised up to February
+        np.array([2, 0]),
+        np.array([0, 7]),
+        np.array([1, 0]),
+        np.array(["2024-06-30", "2024-01-20"], dtype="datetime64[D]")
+    )
+
+    assert schedule.tolist() == [0, 0, 0, 0, 1, 1, 1]
+    assert dates.astype(str).tolist() == [
+        "2024-03-31", "2024-04-30", "2024-05-31", "2024-06-30",
+        "2024-01-01", "2024-01-08", "2024-01-15",
+    ]
@@ -0,0 +1,118 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app import crud
+from app.instrumentation import QUERY_COUNT_HEADER
+
+
+def add_tagged_transactions(connection, user, count, tags_per_transaction=3):
+    tag_ids = connection.execute(text("""
+        INSERT INTO tags (user_id, name)
+        SELECT :user_id, 'tag ' || n FROM generate_series(1, :tags) n
+        ON CONFLICT (user_id, name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id
+    """), {"user_id": user["id"], "tags": tags_per_transaction}).scalars().all()
+    rows = connection.execute(text("""
+        INSERT INTO transactions (account_id, category_id, amount, type, date, description)
+        SELECT :account_id, :category_id, 10.00, 'expense', CURRENT_DATE - n, 'purchase ' || n
+        FROM generate_series(1, :count) n
+        RETURNING id, date
+    """), {"account_id": user["account_id"], "category_id": user["category_id"], "count": count}).all()
+    connection.execute(
+        text("INSERT INTO transaction_tags (transaction_id, transaction_date, tag_id) VALUES (:id, :date, :tag_id)"),
+        [{"id": row.id, "date": row.date, "tag_id": tag_id} for row in rows for tag_id in tag_ids]
+    )
+
+
+def list_query_count(client):
+    response = client.get("/api/transactions", params={"limit": 100})
+    assert response.status_code == 200
+    return response.json(), int(response.headers[QUERY_COUNT_HEADER])
+
+
+def test_listing_with_tags_issues_constant_number_of_queries(client, connection, user):
+    # The first request also opens the test session's savepoint
+    list_query_count(client)
+    add_tagged_transactions(connection, user, 1)
+    body, few = list_query_count(client)
+    assert len(body) == 1 and len(body[0]["tags"]) == 3
+    
+    add_tagged_transactions(connection, user, 40)
+    body, many = list_query_count(client)
+    assert len(body) == 41 and all(len(item["tags"]) == 3 for item in body)
+    assert many == few
+
+
+def plan_index_names(connection, statement):
+    sql = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    names, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+def partition_indexes(connection, index_name):
+    """The partitioned index and its per-partition indexes."""
+    return set(connection.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:name)
+    """), {"name": index_name}).scalars()) | {index_name}
+
+
+def test_search_uses_full_text_and_trigram_indexes(connection, user):
+    if connection.execute(text("SELECT to_regclass('idx_transactions_payee_trgm')")).scalar() is None:
+        pytest.skip("pg_trgm is not available")
+    # Enough non-matching rows that the user's other indexes are not selective
+    connection.execute(text("""
+        INSERT INTO transactions (account_id, category_id, amount, type, date, description, payee)
+        SELECT :account_id, :category_id, 1.00, 'expense', CURRENT_DATE - n % 700, 'purchase ' || n, 'shop ' || n
+        FROM generate_series(1, 5000) n
+    """), {"account_id": user["account_id"], "category_id": user["category_id"]})
+    connection.execute(text("""
+        INSERT INTO transactions (account_id, category_id, amount, type, date, description, payee)
+        VALUES (:account_id, :category_id, 10.00, 'expense', CURRENT_DATE, 'Покупка продуктов', 'Пятерочка')
+    """), {"account_id": user["account_id"], "category_id": user["category_id"]})
+    connection.execute(text("ANALYZE transactions"))
+    
+    used = plan_index_names(connection, crud.transactions_search_select(user["id"], "пятерочка"))
+    assert used & partition_indexes(connection, "idx_transactions_description_gin")
+    assert used & partition_indexes(connection, "idx_transactions_payee_trgm")
+
+
+def test_bulk_update_moves_transactions_to_another_date(client, connection, user):
+    add_tagged_transactions(connection, user, 3)
+    new_date = date.today() - timedelta(days=400)
+    
+    response = client.post("/api/transactions/bulk-update", json={
+        "filter": {"start_date": str(date.today() - timedelta(days=2))},
+        "changes": {"date": str(new_date)},
+    })
+    
+    assert response.status_code == 200
+    assert response.json()["affected"] == 2
+    dates = connection.execute(text(
+        "SELECT date, COUNT(*) FROM transactions WHERE user_id = :user_id GROUP BY date ORDER BY date"
+    ), {"user_id": user["id"]}).all()
+    assert dates == [(new_date, 2), (date.today() - timedelta(days=3), 1)]
+
+
+def test_bulk_update_rejects_future_date(client, connection, user):
+    add_tagged_transactions(connection, user, 1)
+    
+    response = client.post("/api/transactions/bulk-update", json={
+        "filter": {"start_date": str(date.today() - timedelta(days=1))},
+        "changes": {"date": str(date.today() + timedelta(days=1))},
+    })
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Transaction date cannot be in the future"
@@ -12,6 +12,7 @@ DROP TABLE IF EXISTS categories CASCADE;
 DROP TABLE IF EXISTS accounts CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 DROP TABLE IF EXISTS audit_log CASCADE;
+DROP TABLE IF EXISTS monthly_category_totals CASCADE;
 
 -- Удаление типов
 DROP TYPE IF EXISTS account_type CASCADE;
@@ -50,13 +51,17 @@ CREATE TABLE accounts (
     name VARCHAR(255) NOT NULL,
     type account_type NOT NULL,
     balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+    -- Баланс при открытии счета, база для сверки balance с транзакциями
+    opening_balance DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
     currency VARCHAR(3) NOT NULL DEFAULT 'RUB',
     bank_name VARCHAR(255),
     account_number VARCHAR(50),
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT balance_non_negative CHECK (balance >= 0)
+    CONSTRAINT balance_non_negative CHECK (balance >= 0),
+    -- Цель составного внешнего ключа transactions (account_id, user_id)
+    CONSTRAINT unique_account_user UNIQUE (id, user_id)
 );
 
 -- 3. Таблица категорий
@@ -75,10 +80,14 @@ CREATE TABLE categories (
     CONSTRAINT budget_limit_positive CHECK (budget_limit IS NULL OR budget_limit > 0)
 );
 
--- 4. Таблица транзакций
+-- 4. Таблица транзакций (секционирована по годам по date)
+-- Первичный и уникальные ключи секционированной таблицы обязаны включать date
 CREATE TABLE transactions (
-    id SERIAL PRIMARY KEY,
-    account_id INTEGER NOT NULL REFERENCES accounts(id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    id SERIAL,
+    account_id INTEGER NOT NULL,
+    -- Владелец счета, денормализован для выборок по пользователю без JOIN accounts;
+    -- согласованность со счетом обеспечивает составной внешний ключ
+    user_id INTEGER NOT NULL,
     category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL ON UPDATE CASCADE,
     amount DECIMAL(15, 2) NOT NULL,
     type transaction_type NOT NULL,
@@ -90,9 +99,16 @@ CREATE TABLE transactions (
     recurring_transaction_id INTEGER,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date),
+    CONSTRAINT transactions_account_user_fkey FOREIGN KEY (account_id, user_id)
+        REFERENCES accounts(id, user_id) ON DELETE RESTRICT ON UPDATE CASCADE,
     CONSTRAINT amount_positive CHECK (amount > 0),
     CONSTRAINT date_not_future CHECK (date <= CURRENT_DATE)
-);
+) PARTITION BY RANGE (date);
+
+-- Секция по умолчанию для дат вне созданных годовых секций
+-- (годовые секции transactions_yYYYY создает create_transaction_partitions)
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
 
 -- 5. Таблица тегов
 CREATE TABLE tags (
@@ -106,9 +122,14 @@ CREATE TABLE tags (
 
 -- 6. Связующая таблица транзакций и тегов (N:M)
 CREATE TABLE transaction_tags (
-    transaction_id INTEGER NOT NULL REFERENCES transactions(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    transaction_id INTEGER NOT NULL,
+    -- Дата транзакции: часть ключа секционированной transactions, при изменении
+    -- даты транзакции обновляется каскадно
+    transaction_date DATE NOT NULL,
     tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE ON UPDATE CASCADE,
-    PRIMARY KEY (transaction_id, tag_id)
+    PRIMARY KEY (transaction_id, tag_id),
+    CONSTRAINT transaction_tags_transaction_fkey FOREIGN KEY (transaction_id, transaction_date)
+        REFERENCES transactions(id, date) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
 -- 7. Таблица бюджетов
@@ -157,18 +178,28 @@ CREATE TABLE recurring_transactions (
     amount DECIMAL(15, 2) NOT NULL,
     type transaction_type NOT NULL,
     interval recurring_interval NOT NULL,
+    -- Даты платежа отсчитываются от start_date: n-я дата -
+    -- recurring_occurrence(start_date, interval, n), поэтому 31-е число не
+    -- сдвигается после короткого месяца. occurrence_count - число наступивших
+    -- дат, next_date - дата с номером occurrence_count. Без start_date
+    -- отсчет начинается с next_date (триггер set_recurring_anchor_trigger)
+    start_date DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL DEFAULT 0,
     next_date DATE NOT NULL,
     end_date DATE,
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT amount_positive CHECK (amount > 0),
-    CONSTRAINT valid_end_date CHECK (end_date IS NULL OR end_date >= next_date)
+    CONSTRAINT valid_end_date CHECK (end_date IS NULL OR end_date >= next_date),
+    CONSTRAINT occurrence_count_non_negative CHECK (occurrence_count >= 0)
 );
 
--- 10. Таблица журнала аудита
+-- 10. Таблица журнала аудита (секционирована по месяцам по changed_at)
+-- Месячные секции audit_log_pYYYY_MM создаются create_audit_log_partitions(),
+-- старые отсоединяются и архивируются командой app.commands.audit_partitions
 CREATE TABLE audit_log (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     table_name VARCHAR(100) NOT NULL,
     record_id INTEGER NOT NULL,
     action audit_action NOT NULL,
@@ -177,7 +208,26 @@ CREATE TABLE audit_log (
     changed_by INTEGER REFERENCES users(id) ON DELETE SET NULL ON UPDATE CASCADE,
     changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     ip_address INET,
-    user_agent TEXT
+    user_agent TEXT,
+    PRIMARY KEY (id, changed_at)
+) PARTITION BY RANGE (changed_at);
+
+-- Секция по умолчанию для записей вне созданных месячных секций
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+
+-- 11. Помесячные агрегаты транзакций (поддерживаются триггерами)
+CREATE TABLE monthly_category_totals (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    category_id INTEGER,
+    month DATE NOT NULL,
+    total_income DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+    total_expense DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+    total_amount DECIMAL(15, 2) NOT NULL DEFAULT 0.00,
+    income_count BIGINT NOT NULL DEFAULT 0,
+    expense_count BIGINT NOT NULL DEFAULT 0,
+    transaction_count BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT unique_user_category_month UNIQUE NULLS NOT DISTINCT (user_id, category_id, month),
+    CONSTRAINT month_is_first_day CHECK (month = DATE_TRUNC('month', month)::DATE)
 );
 
 -- Создание индексов для оптимизации запросов
@@ -190,7 +240,14 @@ CREATE INDEX idx_transactions_category_id ON transactions(category_id);
 CREATE INDEX idx_transactions_date ON transactions(date);
 CREATE INDEX idx_transactions_type ON transactions(type);
 CREATE INDEX idx_transactions_date_type ON transactions(date, type);
-CREATE INDEX idx_transaction_tags_transaction_id ON transaction_tags(transaction_id);
+-- Выборки пользователя и ключ постраничной выборки (keyset): WHERE user_id
+-- ORDER BY date DESC, id DESC; INCLUDE покрывает отчеты (index-only scan)
+CREATE INDEX idx_transactions_user_date_id ON transactions(user_id, date DESC, id DESC)
+    INCLUDE (account_id, category_id, type, amount);
+-- Идемпотентность материализации: не более одной транзакции на регулярный платеж и дату
+CREATE UNIQUE INDEX idx_transactions_recurring_date ON transactions(recurring_transaction_id, date)
+    WHERE recurring_transaction_id IS NOT NULL;
+CREATE INDEX idx_transaction_tags_transaction_id ON transaction_tags(transaction_id, transaction_date);
 CREATE INDEX idx_transaction_tags_tag_id ON transaction_tags(tag_id);
 CREATE INDEX idx_tags_user_id ON tags(user_id);
 CREATE INDEX idx_budgets_user_id ON budgets(user_id);
@@ -201,9 +258,13 @@ CREATE INDEX idx_goals_deadline ON goals(deadline);
 CREATE INDEX idx_goals_is_completed ON goals(is_completed);
 CREATE INDEX idx_recurring_transactions_user_id ON recurring_transactions(user_id);
 CREATE INDEX idx_recurring_transactions_next_date ON recurring_transactions(next_date);
-CREATE INDEX idx_audit_log_table_record ON audit_log(table_name, record_id);
+-- Выборка наступивших регулярных платежей пачками по ключу (next_date, id)
+CREATE INDEX idx_recurring_transactions_due ON recurring_transactions(next_date, id) WHERE is_active = TRUE;
+-- История записи: WHERE table_name, record_id AND changed_at в диапазоне
+CREATE INDEX idx_audit_log_table_record ON audit_log(table_name, record_id, changed_at DESC);
 CREATE INDEX idx_audit_log_changed_at ON audit_log(changed_at);
 CREATE INDEX idx_audit_log_action ON audit_log(action);
+CREATE INDEX idx_monthly_category_totals_user_month ON monthly_category_totals(user_id, month);
 
 -- Комментарии к таблицам
 COMMENT ON TABLE users IS 'Пользователи системы';
@@ -216,6 +277,7 @@ COMMENT ON TABLE budgets IS 'Бюджеты по категориям на пе
 COMMENT ON TABLE goals IS 'Финансовые цели пользователей';
 COMMENT ON TABLE recurring_transactions IS 'Регулярные платежи и доходы';
 COMMENT ON TABLE audit_log IS 'Журнал аудита изменений в базе данных';
+COMMENT ON TABLE monthly_category_totals IS 'Помесячные суммы транзакций по пользователю и категории для отчетов';
 
 
 
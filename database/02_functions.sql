@@ -31,8 +31,7 @@ DECLARE
 BEGIN
     SELECT COALESCE(SUM(t.amount), 0.00) INTO v_sum
     FROM transactions t
-    JOIN accounts a ON t.account_id = a.id
-    WHERE a.user_id = p_user_id
+    WHERE t.user_id = p_user_id
       AND t.date BETWEEN p_start_date AND p_end_date
       AND (p_type IS NULL OR t.type = p_type);
     
@@ -85,8 +84,7 @@ BEGIN
     -- Получаем сумму потраченных средств
     SELECT COALESCE(SUM(t.amount), 0.00) INTO v_spent
     FROM transactions t
-    JOIN accounts a ON t.account_id = a.id
-    JOIN budgets b ON b.category_id = t.category_id
+    JOIN budgets b ON b.category_id = t.category_id AND b.user_id = t.user_id
     WHERE b.id = p_budget_id
       AND t.type = 'expense'
       AND t.date BETWEEN p_period_start AND p_period_end;
@@ -127,6 +125,94 @@ COMMENT ON FUNCTION get_category_avg_expense(INTEGER, INTEGER) IS
 -- ТАБЛИЧНЫЕ ФУНКЦИИ
 -- ============================================
 
+-- Функция получения сумм транзакций по категориям за период
+-- Полные месяцы читаются из monthly_category_totals, сырые транзакции
+-- сканируются только для неполных крайних месяцев периода
+CREATE OR REPLACE FUNCTION get_category_totals(
+    p_user_id INTEGER,
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    category_id INTEGER,
+    total_income DECIMAL(15, 2),
+    total_expense DECIMAL(15, 2),
+    total_amount DECIMAL(15, 2),
+    income_count BIGINT,
+    expense_count BIGINT,
+    transaction_count BIGINT
+) AS $$
+DECLARE
+    v_start DATE := COALESCE(p_start_date, DATE '0001-01-01');
+    v_end DATE := COALESCE(p_end_date, DATE '9999-12-31');
+    v_full_start DATE;
+    v_full_end DATE; -- не включительно
+BEGIN
+    -- Диапазон полных месяцев внутри периода
+    v_full_start := CASE 
+        WHEN v_start = DATE_TRUNC('month', v_start)::DATE THEN v_start
+        ELSE (DATE_TRUNC('month', v_start) + INTERVAL '1 month')::DATE
+    END;
+    v_full_end := DATE_TRUNC('month', v_end + 1)::DATE;
+    
+    IF v_full_start >= v_full_end THEN
+        -- Полных месяцев нет: весь период считается по сырым транзакциям
+        v_full_start := v_end + 1;
+        v_full_end := v_end + 1;
+    END IF;
+    
+    RETURN QUERY
+    SELECT 
+        s.category_id,
+        SUM(s.total_income)::DECIMAL(15, 2),
+        SUM(s.total_expense)::DECIMAL(15, 2),
+        SUM(s.total_amount)::DECIMAL(15, 2),
+        SUM(s.income_count)::BIGINT,
+        SUM(s.expense_count)::BIGINT,
+        SUM(s.transaction_count)::BIGINT
+    FROM (
+        SELECT 
+            m.category_id, m.total_income, m.total_expense, m.total_amount,
+            m.income_count, m.expense_count, m.transaction_count
+        FROM monthly_category_totals m
+        WHERE m.user_id = p_user_id
+          AND m.month >= v_full_start
+          AND m.month < v_full_end
+        UNION ALL
+        SELECT 
+            t.category_id,
+            CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END,
+            t.amount,
+            CASE WHEN t.type = 'income' THEN 1 ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN 1 ELSE 0 END,
+            1
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.date >= v_start
+          AND t.date < LEAST(v_full_start, v_end + 1)
+        UNION ALL
+        SELECT 
+            t.category_id,
+            CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END,
+            t.amount,
+            CASE WHEN t.type = 'income' THEN 1 ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN 1 ELSE 0 END,
+            1
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.date >= v_full_end
+          AND t.date <= v_end
+    ) s
+    GROUP BY s.category_id
+    HAVING SUM(s.transaction_count) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_category_totals(INTEGER, DATE, DATE) IS 
+'Возвращает суммы транзакций пользователя по категориям за период (по помесячным агрегатам)';
+
 -- Функция получения финансового отчета пользователя
 CREATE OR REPLACE FUNCTION get_user_financial_report(
     p_user_id INTEGER,
@@ -146,17 +232,13 @@ BEGIN
     SELECT 
         c.name AS category_name,
         c.type AS category_type,
-        COALESCE(SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END), 0.00) AS total_income,
-        COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END), 0.00) AS total_expense,
-        COUNT(t.id) AS transaction_count,
-        COALESCE(AVG(t.amount), 0.00) AS avg_amount
+        COALESCE(ct.total_income, 0.00) AS total_income,
+        COALESCE(ct.total_expense, 0.00) AS total_expense,
+        COALESCE(ct.transaction_count, 0) AS transaction_count,
+        COALESCE(ct.total_amount / NULLIF(ct.transaction_count, 0), 0.00)::DECIMAL(15, 2) AS avg_amount
     FROM categories c
-    LEFT JOIN transactions t ON c.id = t.category_id
-        AND t.date BETWEEN p_start_date AND p_end_date
-    LEFT JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN get_category_totals(p_user_id, p_start_date, p_end_date) ct ON ct.category_id = c.id
     WHERE c.user_id = p_user_id
-      AND (a.user_id = p_user_id OR a.user_id IS NULL)
-    GROUP BY c.id, c.name, c.type
     ORDER BY total_expense DESC, total_income DESC;
 END;
 $$ LANGUAGE plpgsql;
@@ -178,39 +260,32 @@ RETURNS TABLE (
     transaction_count BIGINT,
     percentage DECIMAL(5, 2)
 ) AS $$
-DECLARE
-    v_total DECIMAL(15, 2);
 BEGIN
-    -- Общая сумма расходов
-    SELECT COALESCE(SUM(t.amount), 0.00) INTO v_total
-    FROM transactions t
-    JOIN accounts a ON t.account_id = a.id
-    WHERE a.user_id = p_user_id
-      AND t.type = 'expense'
-      AND (p_start_date IS NULL OR t.date >= p_start_date)
-      AND (p_end_date IS NULL OR t.date <= p_end_date);
-    
     RETURN QUERY
+    WITH totals AS MATERIALIZED (
+        SELECT ct.category_id, ct.total_expense, ct.expense_count
+        FROM get_category_totals(p_user_id, p_start_date, p_end_date) ct
+    ),
+    -- Общая сумма расходов (включая транзакции без категории)
+    overall AS (
+        SELECT COALESCE(SUM(x.total_expense), 0.00) AS total
+        FROM totals x
+    )
     SELECT 
         c.id AS category_id,
         c.name AS category_name,
-        COALESCE(SUM(t.amount), 0.00) AS total_amount,
-        COUNT(t.id) AS transaction_count,
-        CASE 
-            WHEN v_total > 0 THEN (SUM(t.amount) / v_total) * 100.00
+        t.total_expense AS total_amount,
+        t.expense_count AS transaction_count,
+        (CASE 
+            WHEN o.total > 0 THEN (t.total_expense / o.total) * 100.00
             ELSE 0.00
-        END AS percentage
-    FROM categories c
-    LEFT JOIN transactions t ON c.id = t.category_id
-        AND t.type = 'expense'
-        AND (p_start_date IS NULL OR t.date >= p_start_date)
-        AND (p_end_date IS NULL OR t.date <= p_end_date)
-    LEFT JOIN accounts a ON t.account_id = a.id
+        END)::DECIMAL(5, 2) AS percentage
+    FROM totals t
+    JOIN categories c ON c.id = t.category_id
+    CROSS JOIN overall o
     WHERE c.user_id = p_user_id
       AND c.type = 'expense'
-      AND (a.user_id = p_user_id OR a.user_id IS NULL)
-    GROUP BY c.id, c.name
-    HAVING SUM(t.amount) > 0
+      AND t.total_expense > 0
     ORDER BY total_amount DESC
     LIMIT p_limit;
 END;
@@ -219,7 +294,97 @@ $$ LANGUAGE plpgsql;
 COMMENT ON FUNCTION get_top_expense_categories(INTEGER, INTEGER, DATE, DATE) IS 
 'Возвращает топ категорий расходов с процентами';
 
--- Функция получения месячного отчета по бюджетам
+-- Функция оценки бюджетов пользователя на дату
+-- Период бюджета - календарный месяц или год, содержащий p_on_date, обрезанный
+-- по start_date/end_date бюджета; бюджеты, не действующие в этом периоде,
+-- не возвращаются. Расходы всех бюджетов считаются за один проход по
+-- idx_transactions_user_date_id (index-only scan по user_id и общему диапазону
+-- дат), бюджет без категории учитывает все расходы пользователя
+CREATE OR REPLACE FUNCTION evaluate_user_budgets(
+    p_user_id INTEGER,
+    p_on_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    budget_id INTEGER,
+    category_id INTEGER,
+    category_name VARCHAR(255),
+    period budget_period,
+    period_start DATE,
+    period_end DATE,
+    budget_amount DECIMAL(15, 2),
+    spent_amount DECIMAL(15, 2),
+    remaining DECIMAL(15, 2),
+    percentage_used DECIMAL(5, 2),
+    is_exceeded BOOLEAN
+) AS $$
+    WITH windows AS MATERIALIZED (
+        SELECT 
+            b.id,
+            b.category_id,
+            b.period,
+            b.amount,
+            GREATEST(p.period_start, b.start_date) AS window_start,
+            LEAST(p.period_end, b.end_date) AS window_end
+        FROM budgets b
+        CROSS JOIN LATERAL (
+            SELECT 
+                DATE_TRUNC(b.period::TEXT, p_on_date)::DATE AS period_start,
+                (DATE_TRUNC(b.period::TEXT, p_on_date) + CASE b.period
+                    WHEN 'month' THEN INTERVAL '1 month - 1 day'
+                    ELSE INTERVAL '1 year - 1 day'
+                END)::DATE AS period_end
+        ) p
+        WHERE b.user_id = p_user_id
+          AND b.is_active = TRUE
+          AND b.start_date <= p.period_end
+          AND (b.end_date IS NULL OR b.end_date >= p.period_start)
+    ),
+    daily AS (
+        SELECT t.date, t.category_id, SUM(t.amount) AS amount
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.type = 'expense'
+          AND t.date >= (SELECT MIN(w.window_start) FROM windows w)
+          AND t.date <= (SELECT MAX(w.window_end) FROM windows w)
+        GROUP BY t.date, t.category_id
+    ),
+    spent AS (
+        SELECT w.id, COALESCE(SUM(d.amount), 0.00) AS amount
+        FROM windows w
+        LEFT JOIN daily d ON d.date BETWEEN w.window_start AND w.window_end
+            AND (w.category_id IS NULL OR d.category_id = w.category_id)
+        GROUP BY w.id
+    )
+    SELECT 
+        w.id AS budget_id,
+        w.category_id,
+        COALESCE(c.name, 'Общий бюджет')::VARCHAR(255) AS category_name,
+        w.period,
+        w.window_start AS period_start,
+        w.window_end AS period_end,
+        w.amount AS budget_amount,
+        s.amount::DECIMAL(15, 2) AS spent_amount,
+        GREATEST(0.00, w.amount - s.amount)::DECIMAL(15, 2) AS remaining,
+        (CASE 
+            WHEN w.amount > 0 THEN LEAST(100.00, (s.amount / w.amount) * 100.00)
+            ELSE 0.00
+        END)::DECIMAL(5, 2) AS percentage_used,
+        s.amount > w.amount AS is_exceeded
+    FROM windows w
+    JOIN spent s ON s.id = w.id
+    LEFT JOIN categories c ON c.id = w.category_id
+    ORDER BY percentage_used DESC, w.id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION evaluate_user_budgets(INTEGER, DATE) IS 
+'Возвращает статус месячных и годовых бюджетов пользователя за период, содержащий дату';
+
+-- Функция получения отчета по бюджетам за месяц: месячные бюджеты - за этот
+-- месяц, годовые - за его год
+-- Набор столбцов изменился (period, period_start, period_end), поэтому
+-- прежняя версия удаляется
+DROP FUNCTION IF EXISTS get_budget_status_report(INTEGER, INTEGER, INTEGER);
+
 CREATE OR REPLACE FUNCTION get_budget_status_report(
     p_user_id INTEGER,
     p_year INTEGER,
@@ -228,50 +393,32 @@ CREATE OR REPLACE FUNCTION get_budget_status_report(
 RETURNS TABLE (
     budget_id INTEGER,
     category_name VARCHAR(255),
+    period budget_period,
+    period_start DATE,
+    period_end DATE,
     budget_amount DECIMAL(15, 2),
     spent_amount DECIMAL(15, 2),
     remaining DECIMAL(15, 2),
     percentage_used DECIMAL(5, 2),
     is_exceeded BOOLEAN
 ) AS $$
-DECLARE
-    v_start_date DATE;
-    v_end_date DATE;
-BEGIN
-    v_start_date := DATE_TRUNC('month', MAKE_DATE(p_year, p_month, 1));
-    v_end_date := (v_start_date + INTERVAL '1 month - 1 day')::DATE;
-    
-    RETURN QUERY
     SELECT 
-        b.id AS budget_id,
-        COALESCE(c.name, 'Общий бюджет') AS category_name,
-        b.amount AS budget_amount,
-        COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END), 0.00) AS spent_amount,
-        GREATEST(0.00, b.amount - COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END), 0.00)) AS remaining,
-        CASE 
-            WHEN b.amount > 0 THEN 
-                LEAST(100.00, (COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END), 0.00) / b.amount) * 100.00)
-            ELSE 0.00
-        END AS percentage_used,
-        COALESCE(SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END), 0.00) > b.amount AS is_exceeded
-    FROM budgets b
-    LEFT JOIN categories c ON b.category_id = c.id
-    LEFT JOIN transactions t ON (
-        (b.category_id IS NULL OR t.category_id = b.category_id)
-        AND t.date BETWEEN v_start_date AND v_end_date
-    )
-    LEFT JOIN accounts a ON t.account_id = a.id
-    WHERE b.user_id = p_user_id
-      AND b.is_active = TRUE
-      AND b.period = 'month'
-      AND (a.user_id = p_user_id OR a.user_id IS NULL)
-    GROUP BY b.id, c.name, b.amount
-    ORDER BY percentage_used DESC;
-END;
-$$ LANGUAGE plpgsql;
+        e.budget_id,
+        e.category_name,
+        e.period,
+        e.period_start,
+        e.period_end,
+        e.budget_amount,
+        e.spent_amount,
+        e.remaining,
+        e.percentage_used,
+        e.is_exceeded
+    FROM evaluate_user_budgets(p_user_id, MAKE_DATE(p_year, p_month, 1)) e
+    ORDER BY e.percentage_used DESC, e.budget_id;
+$$ LANGUAGE sql STABLE;
 
 COMMENT ON FUNCTION get_budget_status_report(INTEGER, INTEGER, INTEGER) IS 
-'Возвращает отчет о статусе бюджетов за указанный месяц';
+'Возвращает отчет о статусе месячных и годовых бюджетов за указанный месяц';
 
 -- Функция получения транзакций с тегами
 CREATE OR REPLACE FUNCTION get_transactions_with_tags(
@@ -304,9 +451,9 @@ BEGIN
     FROM transactions t
     JOIN accounts a ON t.account_id = a.id
     LEFT JOIN categories c ON t.category_id = c.id
-    LEFT JOIN transaction_tags tt ON t.id = tt.transaction_id
+    LEFT JOIN transaction_tags tt ON t.id = tt.transaction_id AND t.date = tt.transaction_date
     LEFT JOIN tags tg ON tt.tag_id = tg.id
-    WHERE a.user_id = p_user_id
+    WHERE t.user_id = p_user_id
       AND (p_start_date IS NULL OR t.date >= p_start_date)
       AND (p_end_date IS NULL OR t.date <= p_end_date)
       AND (p_tag_ids IS NULL OR tg.id = ANY(p_tag_ids))
@@ -318,7 +465,451 @@ $$ LANGUAGE plpgsql;
 COMMENT ON FUNCTION get_transactions_with_tags(INTEGER, DATE, DATE, INTEGER[]) IS 
 'Возвращает транзакции с привязанными тегами';
 
+-- ============================================
+-- ОБСЛУЖИВАНИЕ ПОМЕСЯЧНЫХ АГРЕГАТОВ
+-- ============================================
+
+-- Функция полного пересчета помесячных агрегатов (для пользователя или всех)
+-- Используется после загрузки данных в обход триггеров и для проверки расхождений
+CREATE OR REPLACE FUNCTION rebuild_monthly_category_totals(p_user_id INTEGER DEFAULT NULL)
+RETURNS VOID AS $$
+BEGIN
+    -- Блокируем запись в transactions на время пересчета
+    LOCK TABLE transactions IN SHARE MODE;
+    
+    DELETE FROM monthly_category_totals
+    WHERE p_user_id IS NULL OR user_id = p_user_id;
+    
+    INSERT INTO monthly_category_totals (
+        user_id, category_id, month,
+        total_income, total_expense, total_amount,
+        income_count, expense_count, transaction_count
+    )
+    SELECT 
+        t.user_id,
+        t.category_id,
+        DATE_TRUNC('month', t.date)::DATE,
+        SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END),
+        SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END),
+        SUM(t.amount),
+        COUNT(*) FILTER (WHERE t.type = 'income'),
+        COUNT(*) FILTER (WHERE t.type = 'expense'),
+        COUNT(*)
+    FROM transactions t
+    WHERE p_user_id IS NULL OR t.user_id = p_user_id
+    GROUP BY t.user_id, t.category_id, DATE_TRUNC('month', t.date);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION rebuild_monthly_category_totals(INTEGER) IS 
+'Полностью пересчитывает помесячные агрегаты транзакций';
+
+-- ============================================
+-- РЕГУЛЯРНЫЕ ТРАНЗАКЦИИ
+-- ============================================
+
+-- Функция расчета n-й даты регулярного платежа, начиная с p_start (n = 0)
+-- Месяцы и годы отсчитываются от p_start, поэтому 31-е число
+-- не сдвигается после короткого месяца; p_start - дата отсчета
+-- (recurring_transactions.start_date), а не next_date, которая могла
+-- быть ограничена концом месяца
+CREATE OR REPLACE FUNCTION recurring_occurrence(
+    p_start DATE,
+    p_interval recurring_interval,
+    p_n INTEGER
+)
+RETURNS DATE AS $$
+    SELECT CASE p_interval
+        WHEN 'daily' THEN p_start + p_n
+        WHEN 'weekly' THEN p_start + 7 * p_n
+        WHEN 'monthly' THEN (p_start + make_interval(months => p_n))::DATE
+        WHEN 'yearly' THEN (p_start + make_interval(years => p_n))::DATE
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+COMMENT ON FUNCTION recurring_occurrence(DATE, recurring_interval, INTEGER) IS 
+'Возвращает n-ю дату регулярного платежа';
+
+-- Функция оценки сверху числа дат регулярного платежа в [p_start, p_until]
+-- Для месяцев и лет берется запас в одну дату, лишние отсекаются по p_until
+CREATE OR REPLACE FUNCTION recurring_occurrence_count(
+    p_start DATE,
+    p_interval recurring_interval,
+    p_until DATE
+)
+RETURNS INTEGER AS $$
+    SELECT CASE
+        WHEN p_until < p_start THEN 0
+        ELSE CASE p_interval
+            WHEN 'daily' THEN p_until - p_start + 1
+            WHEN 'weekly' THEN (p_until - p_start) / 7 + 1
+            WHEN 'monthly' THEN (
+                EXTRACT(YEAR FROM AGE(p_until, p_start)) * 12
+                + EXTRACT(MONTH FROM AGE(p_until, p_start))
+            )::INTEGER + 2
+            WHEN 'yearly' THEN EXTRACT(YEAR FROM AGE(p_until, p_start))::INTEGER + 2
+        END
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+COMMENT ON FUNCTION recurring_occurrence_count(DATE, recurring_interval, DATE) IS 
+'Оценивает сверху число дат регулярного платежа в периоде';
+
+-- Функция материализации наступивших регулярных платежей (одна пачка)
+-- Берет до p_batch_size активных расписаний с next_date <= p_as_of после ключа
+-- (p_after_date, p_after_id), создает транзакции за все пропущенные даты
+-- (не более p_max_occurrences на расписание) одним INSERT и сдвигает next_date.
+-- Даты считаются от start_date по номерам начиная с occurrence_count, поэтому
+-- ограничение концом месяца не переносится на следующие даты.
+-- Повторный запуск не создает дублей: ON CONFLICT по (recurring_transaction_id, date).
+-- Расписания счетов, баланс которых ушел бы в минус, пропускаются.
+-- Возвращает счетчики пачки и ключ последнего расписания для следующего вызова
+CREATE OR REPLACE FUNCTION materialize_recurring_transactions(
+    p_as_of DATE DEFAULT CURRENT_DATE,
+    p_batch_size INTEGER DEFAULT 10000,
+    p_after_date DATE DEFAULT '-infinity',
+    p_after_id INTEGER DEFAULT 0,
+    p_max_occurrences INTEGER DEFAULT 366
+)
+RETURNS TABLE (
+    batch_schedules INTEGER,
+    created_transactions INTEGER,
+    skipped_schedules INTEGER,
+    cursor_date DATE,
+    cursor_id INTEGER
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH batch AS (
+        SELECT 
+            r.id,
+            r.account_id,
+            r.category_id,
+            r.description,
+            r.amount,
+            r.type,
+            r.interval,
+            r.start_date,
+            r.occurrence_count,
+            r.next_date,
+            LEAST(p_as_of, COALESCE(r.end_date, p_as_of)) AS until_date
+        FROM recurring_transactions r
+        WHERE r.is_active = TRUE
+          AND r.next_date <= p_as_of
+          AND (r.next_date, r.id) > (p_after_date, p_after_id)
+        ORDER BY r.next_date, r.id
+        LIMIT p_batch_size
+        -- Параллельные обработчики не ждут друг друга
+        FOR UPDATE SKIP LOCKED
+    ),
+    occurrences AS (
+        SELECT b.*, o.occ_date
+        FROM batch b
+        CROSS JOIN LATERAL (
+            SELECT recurring_occurrence(b.start_date, b.interval, gs.n) AS occ_date
+            FROM generate_series(
+                b.occurrence_count,
+                b.occurrence_count
+                    + LEAST(p_max_occurrences, recurring_occurrence_count(b.next_date, b.interval, b.until_date)) - 1
+            ) AS gs(n)
+        ) o
+        WHERE o.occ_date <= b.until_date
+    ),
+    blocked AS (
+        SELECT o.account_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        GROUP BY o.account_id, a.balance
+        HAVING a.balance + SUM(CASE o.type
+            WHEN 'income' THEN o.amount
+            WHEN 'expense' THEN -o.amount
+            ELSE 0
+        END) < 0
+    ),
+    ready AS (
+        SELECT o.*, a.user_id AS account_user_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        WHERE o.account_id NOT IN (SELECT bl.account_id FROM blocked bl)
+    ),
+    inserted AS (
+        INSERT INTO transactions (
+            account_id, user_id, category_id, amount, type, date,
+            description, is_recurring, recurring_transaction_id
+        )
+        SELECT 
+            rd.account_id, rd.account_user_id, rd.category_id, rd.amount, rd.type, rd.occ_date,
+            rd.description, TRUE, rd.id
+        FROM ready rd
+        ON CONFLICT (recurring_transaction_id, date)
+            WHERE recurring_transaction_id IS NOT NULL
+            DO NOTHING
+        RETURNING 1
+    ),
+    advanced AS (
+        UPDATE recurring_transactions r
+        SET next_date = CASE 
+                WHEN r.end_date IS NOT NULL AND s.new_next > r.end_date THEN s.last_date
+                ELSE s.new_next
+            END,
+            occurrence_count = s.new_count,
+            is_active = (r.end_date IS NULL OR s.new_next <= r.end_date)
+        FROM (
+            SELECT 
+                rd.id,
+                MAX(rd.occ_date) AS last_date,
+                rd.occurrence_count + COUNT(*)::INTEGER AS new_count,
+                recurring_occurrence(rd.start_date, rd.interval, rd.occurrence_count + COUNT(*)::INTEGER) AS new_next
+            FROM ready rd
+            GROUP BY rd.id, rd.start_date, rd.occurrence_count, rd.interval
+        ) s
+        WHERE r.id = s.id
+    )
+    -- Изменяющие CTE выполняются полностью, даже если на них нет ссылок
+    SELECT 
+        (SELECT COUNT(*) FROM batch)::INTEGER,
+        (SELECT COUNT(*) FROM inserted)::INTEGER,
+        (SELECT COUNT(DISTINCT o.id) FROM occurrences o
+         WHERE o.account_id IN (SELECT bl.account_id FROM blocked bl))::INTEGER,
+        (SELECT b.next_date FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1),
+        (SELECT b.id FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION materialize_recurring_transactions(DATE, INTEGER, DATE, INTEGER, INTEGER) IS 
+'Создает транзакции по наступившим регулярным платежам (одна пачка расписаний)';
+
+-- ============================================
+-- СВЕРКА БАЛАНСОВ СЧЕТОВ
+-- ============================================
+
+-- Функция поиска расхождений баланса счетов с транзакциями
+-- Ожидаемый баланс = opening_balance + доходы - расходы; возвращает только
+-- счета, у которых хранимый баланс отличается от ожидаемого
+CREATE OR REPLACE FUNCTION get_account_balance_drift(p_user_id INTEGER DEFAULT NULL)
+RETURNS TABLE (
+    account_id INTEGER,
+    user_id INTEGER,
+    balance DECIMAL(15, 2),
+    expected_balance DECIMAL(15, 2),
+    drift DECIMAL(15, 2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        a.id,
+        a.user_id,
+        a.balance,
+        (a.opening_balance + COALESCE(s.total, 0))::DECIMAL(15, 2),
+        (a.balance - a.opening_balance - COALESCE(s.total, 0))::DECIMAL(15, 2)
+    FROM accounts a
+    LEFT JOIN (
+        SELECT 
+            t.account_id,
+            SUM(CASE 
+                WHEN t.type = 'income' THEN t.amount
+                WHEN t.type = 'expense' THEN -t.amount
+                ELSE 0
+            END) AS total
+        FROM transactions t
+        WHERE p_user_id IS NULL OR t.user_id = p_user_id
+        GROUP BY t.account_id
+    ) s ON s.account_id = a.id
+    WHERE (p_user_id IS NULL OR a.user_id = p_user_id)
+      AND a.balance <> a.opening_balance + COALESCE(s.total, 0)
+    ORDER BY a.id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_account_balance_drift(INTEGER) IS 
+'Возвращает счета, баланс которых расходится с суммой транзакций';
 
+-- Функция исправления расхождений: устанавливает ожидаемый баланс
+-- Возвращает исправленные счета с расхождением до исправления
+CREATE OR REPLACE FUNCTION reconcile_account_balances(p_user_id INTEGER DEFAULT NULL)
+RETURNS TABLE (
+    account_id INTEGER,
+    user_id INTEGER,
+    balance DECIMAL(15, 2),
+    expected_balance DECIMAL(15, 2),
+    drift DECIMAL(15, 2)
+) AS $$
+BEGIN
+    -- Блокируем запись в transactions на время сверки
+    LOCK TABLE transactions IN SHARE MODE;
+    
+    RETURN QUERY
+    WITH d AS (
+        SELECT * FROM get_account_balance_drift(p_user_id)
+    )
+    UPDATE accounts a
+    SET balance = d.expected_balance
+    FROM d
+    WHERE a.id = d.account_id
+    RETURNING d.account_id, d.user_id, d.balance, d.expected_balance, d.drift;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION reconcile_account_balances(INTEGER) IS 
+'Исправляет балансы счетов по сумме транзакций и возвращает исправленные расхождения';
 
+-- ============================================
+-- СЕКЦИИ ЖУРНАЛА АУДИТА
+-- ============================================
+
+-- Функция создания месячных секций audit_log (audit_log_pYYYY_MM)
+-- Создает секции с p_months_back месяцев назад по p_months_ahead вперед,
+-- уже существующие пропускает. Записи нужного диапазона, успевшие попасть
+-- в audit_log_default, переносятся в новую секцию.
+-- Возвращает имена созданных секций
+CREATE OR REPLACE FUNCTION create_audit_log_partitions(
+    p_months_ahead INTEGER DEFAULT 3,
+    p_months_back INTEGER DEFAULT 0
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_month DATE;
+    v_from TIMESTAMP WITH TIME ZONE;
+    v_to TIMESTAMP WITH TIME ZONE;
+    v_name TEXT;
+    v_has_default_rows BOOLEAN;
+BEGIN
+    FOR v_month IN
+        SELECT generate_series(
+            DATE_TRUNC('month', CURRENT_DATE) - make_interval(months => p_months_back),
+            DATE_TRUNC('month', CURRENT_DATE) + make_interval(months => p_months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        v_name := 'audit_log_p' || TO_CHAR(v_month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+        
+        -- Границы секций в UTC, чтобы не зависеть от часового пояса сессии
+        v_from := v_month::TIMESTAMP AT TIME ZONE 'UTC';
+        v_to := (v_month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC';
+        
+        SELECT EXISTS (
+            SELECT 1 FROM audit_log_default
+            WHERE changed_at >= v_from AND changed_at < v_to
+        ) INTO v_has_default_rows;
+        
+        IF v_has_default_rows THEN
+            CREATE TEMP TABLE audit_log_moved (LIKE audit_log) ON COMMIT DROP;
+            WITH moved AS (
+                DELETE FROM audit_log_default
+                WHERE changed_at >= v_from AND changed_at < v_to
+                RETURNING *
+            )
+            INSERT INTO audit_log_moved SELECT * FROM moved;
+        END IF;
+        
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_to
+        );
+        
+        IF v_has_default_rows THEN
+            INSERT INTO audit_log SELECT * FROM audit_log_moved;
+            DROP TABLE audit_log_moved;
+        END IF;
+        
+        RETURN NEXT v_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION create_audit_log_partitions(INTEGER, INTEGER) IS 
+'Создает месячные секции журнала аудита на p_months_ahead месяцев вперед';
+
+-- Создание секций на текущий и ближайшие месяцы при инициализации
+SELECT create_audit_log_partitions(3);
+
+-- ============================================
+-- СЕКЦИИ ТРАНЗАКЦИЙ
+-- ============================================
+
+-- Функция создания годовых секций transactions (transactions_yYYYY)
+-- Создает секции с p_years_back лет назад по p_years_ahead вперед, а также
+-- для всех лет, транзакции которых попали в transactions_default
+-- (например, при импорте старой выписки); существующие секции пропускает.
+-- Строки из transactions_default переносятся напрямую между секциями с
+-- отключенными пользовательскими триггерами секций: баланс, агрегаты и аудит
+-- (в режимах 'row' и 'statement') не меняются, теги переносятся вместе
+-- с транзакциями.
+-- Возвращает имена созданных секций
+CREATE OR REPLACE FUNCTION create_transaction_partitions(
+    p_years_ahead INTEGER DEFAULT 1,
+    p_years_back INTEGER DEFAULT 0
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_years DATE[];
+    v_year DATE;
+    v_name TEXT;
+    v_has_default_rows BOOLEAN;
+BEGIN
+    -- Годы выбираются заранее: открытый курсор по transactions_default
+    -- не дал бы отключить ее триггеры
+    SELECT ARRAY_AGG(y ORDER BY y) INTO v_years
+    FROM (
+        SELECT generate_series(
+            DATE_TRUNC('year', CURRENT_DATE) - make_interval(years => p_years_back),
+            DATE_TRUNC('year', CURRENT_DATE) + make_interval(years => p_years_ahead),
+            INTERVAL '1 year'
+        )::DATE AS y
+        UNION
+        SELECT DISTINCT DATE_TRUNC('year', date)::DATE FROM transactions_default
+    ) years;
+    
+    FOREACH v_year IN ARRAY v_years
+    LOOP
+        v_name := 'transactions_y' || TO_CHAR(v_year, 'YYYY');
+        CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+        
+        SELECT EXISTS (
+            SELECT 1 FROM transactions_default
+            WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+        ) INTO v_has_default_rows;
+        
+        IF v_has_default_rows THEN
+            -- Удаление из секции каскадно удаляет теги, поэтому они сохраняются заранее
+            CREATE TEMP TABLE transaction_tags_moved ON COMMIT DROP AS
+            SELECT * FROM transaction_tags
+            WHERE transaction_date >= v_year AND transaction_date < (v_year + INTERVAL '1 year')::DATE;
+            
+            CREATE TEMP TABLE transactions_moved (LIKE transactions) ON COMMIT DROP;
+            -- Перенос не меняет данных: балансы, агрегаты и аудит не трогаются
+            ALTER TABLE transactions_default DISABLE TRIGGER USER;
+            WITH moved AS (
+                DELETE FROM transactions_default
+                WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+                RETURNING *
+            )
+            INSERT INTO transactions_moved SELECT * FROM moved;
+            ALTER TABLE transactions_default ENABLE TRIGGER USER;
+        END IF;
+        
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_year, (v_year + INTERVAL '1 year')::DATE
+        );
+        
+        IF v_has_default_rows THEN
+            EXECUTE format('ALTER TABLE %I DISABLE TRIGGER USER', v_name);
+            EXECUTE format('INSERT INTO %I SELECT * FROM transactions_moved', v_name);
+            EXECUTE format('ALTER TABLE %I ENABLE TRIGGER USER', v_name);
+            INSERT INTO transaction_tags SELECT * FROM transaction_tags_moved;
+            DROP TABLE transactions_moved;
+            DROP TABLE transaction_tags_moved;
+        END IF;
+        
+        RETURN NEXT v_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
 
+COMMENT ON FUNCTION create_transaction_partitions(INTEGER, INTEGER) IS 
+'Создает годовые секции транзакций на p_years_ahead лет вперед и для дат из секции по умолчанию';
 
+-- Создание секций на прошлый, текущий и следующий год при инициализации
+SELECT create_transaction_partitions(1, 1);
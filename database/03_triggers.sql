@@ -14,7 +14,7 @@ DECLARE
     v_new_data JSONB;
 BEGIN
     -- Получаем ID пользователя из сессии (если установлен)
-    v_user_id := current_setting('app.user_id', TRUE)::INTEGER;
+    v_user_id := NULLIF(current_setting('app.user_id', TRUE), '')::INTEGER;
     
     -- Формируем JSONB данные
     IF TG_OP = 'DELETE' THEN
@@ -37,7 +37,9 @@ BEGIN
         new_data,
         changed_by
     ) VALUES (
-        TG_TABLE_NAME,
+        -- Для секционированных таблиц триггер срабатывает на секции,
+        -- имя исходной таблицы передается аргументом
+        COALESCE(TG_ARGV[0], TG_TABLE_NAME),
         COALESCE((NEW.id)::INTEGER, (OLD.id)::INTEGER),
         TG_OP::audit_action,
         v_old_data,
@@ -53,137 +55,336 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Функция аудита уровня оператора
+-- Все строки, затронутые оператором, записываются в audit_log одним INSERT
+-- по таблицам переходов. Аргумент 'changed_only' у триггера UPDATE сохраняет
+-- в old_data/new_data только изменившиеся столбцы
+CREATE OR REPLACE FUNCTION audit_statement_trigger_function()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_user_id INTEGER;
+    v_rows TEXT;
+BEGIN
+    v_user_id := NULLIF(current_setting('app.user_id', TRUE), '')::INTEGER;
+    
+    -- Таблицы переходов, не объявленные триггером, недоступны,
+    -- поэтому источник строк выбирается в зависимости от операции
+    IF TG_OP = 'INSERT' THEN
+        v_rows := 'SELECT n.id, NULL::JSONB, to_jsonb(n) FROM new_rows n';
+    ELSIF TG_OP = 'DELETE' THEN
+        v_rows := 'SELECT o.id, to_jsonb(o), NULL::JSONB FROM old_rows o';
+    ELSIF TG_NARGS > 0 AND TG_ARGV[0] = 'changed_only' THEN
+        v_rows := 'SELECT n.id, d.old_data, d.new_data
+                   FROM new_rows n
+                   JOIN old_rows o ON o.id = n.id
+                   CROSS JOIN LATERAL (SELECT to_jsonb(o) AS old_row, to_jsonb(n) AS new_row) j
+                   CROSS JOIN LATERAL (
+                       SELECT 
+                           jsonb_object_agg(kv.key, kv.value) AS old_data,
+                           jsonb_object_agg(kv.key, j.new_row -> kv.key) AS new_data
+                       FROM jsonb_each(j.old_row) kv
+                       WHERE kv.value IS DISTINCT FROM j.new_row -> kv.key
+                   ) d';
+    ELSE
+        v_rows := 'SELECT n.id, to_jsonb(o), to_jsonb(n)
+                   FROM new_rows n
+                   JOIN old_rows o ON o.id = n.id';
+    END IF;
+    
+    EXECUTE format(
+        'INSERT INTO audit_log (table_name, record_id, action, old_data, new_data, changed_by)
+         SELECT $1, r.id, $2::audit_action, r.old_data, r.new_data, $3
+         FROM (%s) AS r(id, old_data, new_data)',
+        v_rows
+    ) USING TG_TABLE_NAME, TG_OP, v_user_id;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================
 -- ТРИГГЕРЫ АУДИТА
 -- ============================================
 
--- Триггеры аудита для таблицы users
-CREATE TRIGGER audit_users_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON users
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы accounts
-CREATE TRIGGER audit_accounts_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON accounts
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы categories
-CREATE TRIGGER audit_categories_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON categories
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы transactions
-CREATE TRIGGER audit_transactions_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON transactions
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы budgets
-CREATE TRIGGER audit_budgets_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON budgets
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы goals
-CREATE TRIGGER audit_goals_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON goals
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
-
--- Триггеры аудита для таблицы recurring_transactions
-CREATE TRIGGER audit_recurring_transactions_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON recurring_transactions
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
+-- Функция переключения режима аудита для всех аудируемых таблиц
+--   'statement' - триггеры уровня оператора (по умолчанию)
+--   'row'       - построчный триггер audit_trigger_function()
+--   'off'       - аудит отключен
+-- p_changed_only действует только в режиме 'statement' (для UPDATE)
+CREATE OR REPLACE FUNCTION set_audit_mode(
+    p_mode TEXT,
+    p_changed_only BOOLEAN DEFAULT FALSE
+)
+RETURNS VOID AS $$
+DECLARE
+    v_tables TEXT[] := ARRAY[
+        'users', 'accounts', 'categories', 'transactions',
+        'budgets', 'goals', 'recurring_transactions', 'tags'
+    ];
+    v_table TEXT;
+BEGIN
+    IF p_mode NOT IN ('statement', 'row', 'off') THEN
+        RAISE EXCEPTION 'Unknown audit mode: %', p_mode;
+    END IF;
+    
+    FOREACH v_table IN ARRAY v_tables LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_insert_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_update_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_delete_trigger ON %1$I', v_table);
+        
+        IF p_mode = 'row' THEN
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_trigger
+                    AFTER INSERT OR UPDATE OR DELETE ON %1$I
+                    FOR EACH ROW
+                    EXECUTE FUNCTION audit_trigger_function(%1$L)',
+                v_table
+            );
+        ELSIF p_mode = 'statement' THEN
+            -- Таблицы переходов допускают только одно событие на триггер
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_insert_trigger
+                    AFTER INSERT ON %1$I
+                    REFERENCING NEW TABLE AS new_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function()',
+                v_table
+            );
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_update_trigger
+                    AFTER UPDATE ON %1$I
+                    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function(%2$L)',
+                v_table,
+                CASE WHEN p_changed_only THEN 'changed_only' ELSE 'full' END
+            );
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_delete_trigger
+                    AFTER DELETE ON %1$I
+                    REFERENCING OLD TABLE AS old_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function()',
+                v_table
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
 
--- Триггеры аудита для таблицы tags
-CREATE TRIGGER audit_tags_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON tags
-    FOR EACH ROW
-    EXECUTE FUNCTION audit_trigger_function();
+-- Триггеры аудита для таблиц users, accounts, categories, transactions,
+-- budgets, goals, recurring_transactions и tags
+SELECT set_audit_mode('statement');
 
 -- ============================================
 -- ТРИГГЕРЫ АВТОМАТИЧЕСКОГО ОБНОВЛЕНИЯ
 -- ============================================
 
--- Функция автоматического обновления баланса счета при транзакции
+-- Функция обновления балансов счетов при изменении транзакций
+-- Триггер уровня оператора: дельты всех затронутых строк суммируются по счету
+-- и применяются одним UPDATE на счет (доход +amount, расход -amount, перевод 0)
 CREATE OR REPLACE FUNCTION update_account_balance()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_old_amount DECIMAL(15, 2);
-    v_new_amount DECIMAL(15, 2);
-    v_account_id INTEGER;
+    v_delta TEXT;
 BEGIN
-    -- Определяем account_id и суммы
-    IF TG_OP = 'DELETE' THEN
-        v_account_id := OLD.account_id;
-        v_old_amount := OLD.amount;
-        v_new_amount := 0;
-    ELSIF TG_OP = 'UPDATE' THEN
-        v_account_id := NEW.account_id;
-        v_old_amount := OLD.amount;
-        v_new_amount := NEW.amount;
-    ELSE -- INSERT
-        v_account_id := NEW.account_id;
-        v_old_amount := 0;
-        v_new_amount := NEW.amount;
+    IF TG_OP = 'INSERT' THEN
+        v_delta := 'SELECT account_id, type, amount, 1 AS sign FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        v_delta := 'SELECT account_id, type, amount, -1 AS sign FROM old_rows';
+    ELSE
+        v_delta := 'SELECT account_id, type, amount, 1 AS sign FROM new_rows
+                    UNION ALL
+                    SELECT account_id, type, amount, -1 AS sign FROM old_rows';
     END IF;
     
-    -- Обновляем баланс счета
-    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.account_id = NEW.account_id) THEN
-        -- Обратная операция для старой транзакции
-        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.type = 'income') THEN
-            UPDATE accounts 
-            SET balance = balance - v_old_amount,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = v_account_id;
-        ELSIF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.type = 'expense') THEN
-            UPDATE accounts 
-            SET balance = balance + v_old_amount,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = v_account_id;
-        END IF;
-    END IF;
+    -- Счета блокируются в порядке id, чтобы параллельные операторы,
+    -- затрагивающие несколько счетов, не взаимоблокировались
+    EXECUTE format($sql$
+        WITH deltas AS (
+            SELECT 
+                d.account_id,
+                SUM(d.sign * CASE d.type
+                    WHEN 'income' THEN d.amount
+                    WHEN 'expense' THEN -d.amount
+                    ELSE 0
+                END) AS delta
+            FROM (%s) d
+            GROUP BY d.account_id
+        ),
+        locked AS (
+            SELECT a.id
+            FROM accounts a
+            JOIN deltas ON deltas.account_id = a.id
+            WHERE deltas.delta <> 0
+            ORDER BY a.id
+            FOR UPDATE OF a
+        )
+        UPDATE accounts a
+        SET balance = a.balance + deltas.delta,
+            updated_at = CURRENT_TIMESTAMP
+        FROM deltas
+        WHERE a.id = deltas.account_id
+          AND a.id IN (SELECT id FROM locked)
+    $sql$, v_delta);
     
-    -- Применяем новую транзакцию
-    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND (OLD.account_id != NEW.account_id OR OLD.type != NEW.type OR OLD.amount != NEW.amount)) THEN
-        IF NEW.type = 'income' THEN
-            UPDATE accounts 
-            SET balance = balance + v_new_amount,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = NEW.account_id;
-        ELSIF NEW.type = 'expense' THEN
-            UPDATE accounts 
-            SET balance = balance - v_new_amount,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = NEW.account_id;
-        END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER account_balance_insert_trigger
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+CREATE TRIGGER account_balance_update_trigger
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+CREATE TRIGGER account_balance_delete_trigger
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+-- Функция заполнения владельца транзакции по счету
+-- Приложение передает user_id само; триггер нужен для вставок без него
+-- и для смены счета. Согласованность проверяет внешний ключ (account_id, user_id)
+CREATE OR REPLACE FUNCTION set_transaction_user_id()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.user_id IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.account_id <> OLD.account_id AND NEW.user_id = OLD.user_id) THEN
+        SELECT user_id INTO NEW.user_id FROM accounts WHERE id = NEW.account_id;
     END IF;
-    
-    -- Обработка переводов между счетами
-    IF TG_OP = 'INSERT' AND NEW.type = 'transfer' THEN
-        -- Для переводов нужно обработать оба счета
-        -- В данной реализации transfer обрабатывается как expense на одном счете
-        -- и income на другом (требует дополнительной логики в приложении)
-        NULL;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_transaction_user_id_trigger
+    BEFORE INSERT OR UPDATE OF account_id ON transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_transaction_user_id();
+
+-- Функция закрепления даты отсчета регулярного платежа
+-- При вставке без start_date отсчет начинается с next_date. Изменение
+-- next_date или interval извне (материализация меняет и occurrence_count)
+-- начинает отсчет заново с новой next_date
+CREATE OR REPLACE FUNCTION set_recurring_anchor()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.start_date IS NULL THEN
+            NEW.start_date := NEW.next_date;
+            NEW.occurrence_count := 0;
+        END IF;
+    ELSIF NEW.occurrence_count = OLD.occurrence_count
+          AND NEW.start_date = OLD.start_date
+          AND (NEW.next_date <> OLD.next_date OR NEW.interval <> OLD.interval) THEN
+        NEW.start_date := NEW.next_date;
+        NEW.occurrence_count := 0;
     END IF;
-    
-    IF TG_OP = 'DELETE' THEN
-        RETURN OLD;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_recurring_anchor_trigger
+    BEFORE INSERT OR UPDATE OF next_date, interval ON recurring_transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_recurring_anchor();
+
+-- Функция фиксации начального баланса при создании счета
+CREATE OR REPLACE FUNCTION set_account_opening_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.opening_balance := NEW.balance;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_account_opening_balance_trigger
+    BEFORE INSERT ON accounts
+    FOR EACH ROW
+    EXECUTE FUNCTION set_account_opening_balance();
+
+-- Функция инкрементального обновления помесячных агрегатов
+-- Триггер уровня оператора: дельты всех затронутых строк агрегируются
+-- и применяются одним INSERT ... ON CONFLICT на (пользователь, категория, месяц)
+CREATE OR REPLACE FUNCTION update_monthly_category_totals()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta TEXT;
+BEGIN
+    -- В триггере видны только объявленные им таблицы переходов,
+    -- поэтому источник дельт подставляется в зависимости от операции
+    IF TG_OP = 'INSERT' THEN
+        v_delta := 'SELECT user_id, category_id, date, type, amount, 1 AS sign FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        v_delta := 'SELECT user_id, category_id, date, type, amount, -1 AS sign FROM old_rows';
     ELSE
-        RETURN NEW;
+        v_delta := 'SELECT user_id, category_id, date, type, amount, 1 AS sign FROM new_rows
+                    UNION ALL
+                    SELECT user_id, category_id, date, type, amount, -1 AS sign FROM old_rows';
     END IF;
+    
+    EXECUTE format($sql$
+        INSERT INTO monthly_category_totals AS m (
+            user_id, category_id, month,
+            total_income, total_expense, total_amount,
+            income_count, expense_count, transaction_count
+        )
+        SELECT 
+            d.user_id,
+            d.category_id,
+            DATE_TRUNC('month', d.date)::DATE,
+            SUM(CASE WHEN d.type = 'income' THEN d.sign * d.amount ELSE 0 END),
+            SUM(CASE WHEN d.type = 'expense' THEN d.sign * d.amount ELSE 0 END),
+            SUM(d.sign * d.amount),
+            SUM(CASE WHEN d.type = 'income' THEN d.sign ELSE 0 END),
+            SUM(CASE WHEN d.type = 'expense' THEN d.sign ELSE 0 END),
+            SUM(d.sign)
+        FROM (%s) d
+        GROUP BY d.user_id, d.category_id, DATE_TRUNC('month', d.date)
+        -- UPDATE без изменения суммы, типа, даты и категории не трогает агрегаты
+        HAVING SUM(d.sign) <> 0
+            OR SUM(d.sign * d.amount) <> 0
+            OR SUM(CASE WHEN d.type = 'income' THEN d.sign ELSE 0 END) <> 0
+            OR SUM(CASE WHEN d.type = 'expense' THEN d.sign ELSE 0 END) <> 0
+        ON CONFLICT (user_id, category_id, month) DO UPDATE SET
+            total_income = m.total_income + EXCLUDED.total_income,
+            total_expense = m.total_expense + EXCLUDED.total_expense,
+            total_amount = m.total_amount + EXCLUDED.total_amount,
+            income_count = m.income_count + EXCLUDED.income_count,
+            expense_count = m.expense_count + EXCLUDED.expense_count,
+            transaction_count = m.transaction_count + EXCLUDED.transaction_count
+    $sql$, v_delta);
+    
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Триггер для автоматического обновления баланса
-CREATE TRIGGER update_account_balance_trigger
-    AFTER INSERT OR UPDATE OR DELETE ON transactions
-    FOR EACH ROW
-    EXECUTE FUNCTION update_account_balance();
+-- Таблицы переходов допускают только одно событие на триггер
+CREATE TRIGGER monthly_totals_insert_trigger
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
+
+CREATE TRIGGER monthly_totals_update_trigger
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
+
+CREATE TRIGGER monthly_totals_delete_trigger
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
 
 -- Функция автоматического обновления updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -277,7 +478,12 @@ $$ LANGUAGE plpgsql;
 -- Этот триггер будет вызываться из приложения, но можно создать функцию для автоматической обработки
 
 COMMENT ON FUNCTION audit_trigger_function() IS 'Функция для записи изменений в журнал аудита';
+COMMENT ON FUNCTION audit_statement_trigger_function() IS 'Пакетная запись изменений оператора в журнал аудита';
+COMMENT ON FUNCTION set_audit_mode(TEXT, BOOLEAN) IS 'Переключает режим аудита: statement, row или off';
 COMMENT ON FUNCTION update_account_balance() IS 'Автоматически обновляет баланс счета при изменении транзакций';
+COMMENT ON FUNCTION set_transaction_user_id() IS 'Заполняет владельца транзакции по ее счету';
+COMMENT ON FUNCTION set_recurring_anchor() IS 'Закрепляет дату отсчета регулярного платежа';
+COMMENT ON FUNCTION update_monthly_category_totals() IS 'Инкрементально обновляет помесячные агрегаты транзакций';
 COMMENT ON FUNCTION update_updated_at_column() IS 'Автоматически обновляет поле updated_at';
 COMMENT ON FUNCTION update_goal_status() IS 'Автоматически обновляет статус выполнения цели';
 
@@ -26,7 +26,7 @@ COMMENT ON VIEW v_user_accounts_summary IS 'Сводная информация
 -- 2. Представление: Месячные доходы и расходы
 CREATE OR REPLACE VIEW v_monthly_financial_summary AS
 SELECT 
-    a.user_id,
+    t.user_id,
     DATE_TRUNC('month', t.date)::DATE AS month,
     SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
     SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
@@ -36,16 +36,15 @@ SELECT
     COUNT(CASE WHEN t.type = 'expense' THEN 1 END) AS expense_count,
     COUNT(*) AS total_transactions
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
-GROUP BY a.user_id, DATE_TRUNC('month', t.date)
-ORDER BY a.user_id, month DESC;
+GROUP BY t.user_id, DATE_TRUNC('month', t.date)
+ORDER BY t.user_id, month DESC;
 
 COMMENT ON VIEW v_monthly_financial_summary IS 'Месячная сводка доходов и расходов по пользователям';
 
 -- 3. Представление: Расходы по категориям за текущий месяц
 CREATE OR REPLACE VIEW v_current_month_expenses_by_category AS
 SELECT 
-    a.user_id,
+    t.user_id,
     c.id AS category_id,
     c.name AS category_name,
     c.parent_id,
@@ -62,13 +61,12 @@ SELECT
         ELSE NULL
     END AS budget_usage_percent
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
 JOIN categories c ON t.category_id = c.id
 LEFT JOIN categories parent_cat ON c.parent_id = parent_cat.id
 WHERE t.type = 'expense'
-  AND DATE_TRUNC('month', t.date) = DATE_TRUNC('month', CURRENT_DATE)
-GROUP BY a.user_id, c.id, c.name, c.parent_id, parent_cat.name, c.budget_limit
-ORDER BY a.user_id, total_amount DESC;
+  AND t.date >= DATE_TRUNC('month', CURRENT_DATE)::DATE
+GROUP BY t.user_id, c.id, c.name, c.parent_id, parent_cat.name, c.budget_limit
+ORDER BY t.user_id, total_amount DESC;
 
 COMMENT ON VIEW v_current_month_expenses_by_category IS 'Расходы по категориям за текущий месяц с анализом бюджета';
 
@@ -116,7 +114,7 @@ COMMENT ON VIEW v_goals_status IS 'Детальный статус финанс
 CREATE OR REPLACE VIEW v_top_transactions AS
 SELECT 
     t.id AS transaction_id,
-    a.user_id,
+    t.user_id,
     a.name AS account_name,
     c.name AS category_name,
     t.amount,
@@ -125,13 +123,13 @@ SELECT
     t.description,
     t.payee,
     ROW_NUMBER() OVER (
-        PARTITION BY a.user_id, t.type 
+        PARTITION BY t.user_id, t.type 
         ORDER BY t.amount DESC, t.date DESC
     ) AS rank_by_type
 FROM transactions t
 JOIN accounts a ON t.account_id = a.id
 LEFT JOIN categories c ON t.category_id = c.id
-ORDER BY a.user_id, t.type, t.amount DESC;
+ORDER BY t.user_id, t.type, t.amount DESC;
 
 COMMENT ON VIEW v_top_transactions IS 'Топ транзакций по сумме с ранжированием';
 
@@ -188,79 +186,31 @@ ORDER BY tg.user_id, transaction_count DESC;
 COMMENT ON VIEW v_tags_summary IS 'Сводная информация по использованию тегов';
 
 -- 8. Представление: Бюджеты с текущим статусом
-CREATE OR REPLACE VIEW v_budgets_with_status AS
+-- Статус считается evaluate_user_budgets отдельно для каждого пользователя,
+-- поэтому выборка с WHERE user_id = ... читает только его транзакции.
+-- Набор и типы столбцов изменились, поэтому прежняя версия удаляется
+DROP VIEW IF EXISTS v_budgets_with_status;
+
+CREATE VIEW v_budgets_with_status AS
 SELECT 
     b.id AS budget_id,
-    b.user_id,
+    u.id AS user_id,
     b.category_id,
-    COALESCE(c.name, 'Общий бюджет') AS category_name,
+    s.category_name,
     b.amount AS budget_amount,
     b.period,
     b.start_date,
     b.end_date,
     b.is_active,
-    CASE 
-        WHEN b.period = 'month' THEN 
-            DATE_TRUNC('month', CURRENT_DATE)::DATE
-        WHEN b.period = 'year' THEN 
-            DATE_TRUNC('year', CURRENT_DATE)::DATE
-    END AS current_period_start,
-    CASE 
-        WHEN b.period = 'month' THEN 
-            (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
-        WHEN b.period = 'year' THEN 
-            (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
-    END AS current_period_end,
-    COALESCE(SUM(CASE 
-        WHEN t.type = 'expense' 
-        AND t.date >= CASE 
-            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
-            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
-        END
-        AND t.date <= CASE 
-            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
-            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
-        END
-        THEN t.amount ELSE 0 
-    END), 0.00) AS spent_amount,
-    GREATEST(0.00, b.amount - COALESCE(SUM(CASE 
-        WHEN t.type = 'expense' 
-        AND t.date >= CASE 
-            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
-            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
-        END
-        AND t.date <= CASE 
-            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
-            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
-        END
-        THEN t.amount ELSE 0 
-    END), 0.00)) AS remaining_amount,
-    CASE 
-        WHEN b.amount > 0 THEN 
-            LEAST(100.00, (COALESCE(SUM(CASE 
-                WHEN t.type = 'expense' 
-                AND t.date >= CASE 
-                    WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
-                    WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
-                END
-                AND t.date <= CASE 
-                    WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
-                    WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
-                END
-                THEN t.amount ELSE 0 
-            END), 0.00) / b.amount) * 100.00)
-        ELSE 0.00
-    END AS usage_percent
-FROM budgets b
-LEFT JOIN categories c ON b.category_id = c.id
-LEFT JOIN transactions t ON (
-    (b.category_id IS NULL OR t.category_id = b.category_id)
-)
-LEFT JOIN accounts a ON t.account_id = a.id AND a.user_id = b.user_id
-WHERE b.is_active = TRUE
-GROUP BY b.id, b.user_id, b.category_id, c.name, b.amount, b.period, 
-         b.start_date, b.end_date, b.is_active
-ORDER BY b.user_id, usage_percent DESC;
+    s.period_start AS current_period_start,
+    s.period_end AS current_period_end,
+    s.spent_amount,
+    s.remaining AS remaining_amount,
+    s.percentage_used AS usage_percent
+FROM users u
+CROSS JOIN LATERAL evaluate_user_budgets(u.id, CURRENT_DATE) s
+JOIN budgets b ON b.id = s.budget_id
+ORDER BY u.id, usage_percent DESC;
 
 COMMENT ON VIEW v_budgets_with_status IS 'Бюджеты с текущим статусом использования за текущий период';
 
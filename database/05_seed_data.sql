@@ -12,6 +12,7 @@ TRUNCATE TABLE categories CASCADE;
 TRUNCATE TABLE accounts CASCADE;
 TRUNCATE TABLE users CASCADE;
 TRUNCATE TABLE audit_log CASCADE;
+TRUNCATE TABLE monthly_category_totals;
 
 -- Сброс последовательностей
 ALTER SEQUENCE users_id_seq RESTART WITH 1;
@@ -170,13 +171,13 @@ BEGIN
 END $$;
 
 -- Вставка связей транзакций и тегов
-INSERT INTO transaction_tags (transaction_id, tag_id)
+INSERT INTO transaction_tags (transaction_id, transaction_date, tag_id)
 SELECT 
     t.id,
+    t.date,
     tg.id
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
-JOIN tags tg ON a.user_id = tg.user_id
+JOIN tags tg ON t.user_id = tg.user_id
 WHERE RANDOM() > 0.7  -- 30% транзакций получат теги
 LIMIT 1500;
 
@@ -262,7 +263,8 @@ END $$;
 
 -- Обновление балансов счетов на основе транзакций
 UPDATE accounts a
-SET balance = COALESCE((
+SET opening_balance = 0.00,
+    balance = COALESCE((
     SELECT 
         SUM(CASE 
             WHEN t.type = 'income' THEN t.amount
@@ -19,6 +19,11 @@ CREATE INDEX IF NOT EXISTS idx_transactions_payee
 ON transactions(payee) 
 WHERE payee IS NOT NULL;
 
+-- Триграммный индекс для поиска по подстроке получателя (ILIKE '%...%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_transactions_payee_trgm 
+ON transactions USING gin(payee gin_trgm_ops);
+
 -- Частичный индекс для активных счетов
 CREATE INDEX IF NOT EXISTS idx_accounts_active_user 
 ON accounts(user_id, type) 
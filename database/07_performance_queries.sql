@@ -6,13 +6,14 @@
 -- ============================================
 
 -- Пример 1: Получение транзакций пользователя за период
+-- Фильтр по t.user_id использует idx_transactions_user_date_id
 -- БЕЗ ИНДЕКСА (если удалить индекс idx_transactions_date):
 EXPLAIN ANALYZE
 SELECT t.*, c.name as category_name, a.name as account_name
 FROM transactions t
 JOIN accounts a ON t.account_id = a.id
 LEFT JOIN categories c ON t.category_id = c.id
-WHERE a.user_id = 1
+WHERE t.user_id = 1
   AND t.date BETWEEN '2023-01-01' AND '2023-12-31'
 ORDER BY t.date DESC
 LIMIT 100;
@@ -21,6 +22,26 @@ LIMIT 100;
 -- Тот же запрос, но с использованием индексов
 -- Время выполнения должно значительно уменьшиться
 
+-- Пример 1а: Отсечение секций transactions
+-- В плане должна остаться только секция transactions_y2023 (без transactions_default)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT t.*
+FROM transactions t
+WHERE t.user_id = 1
+  AND t.date BETWEEN '2023-01-01' AND '2023-12-31'
+ORDER BY t.date DESC, t.id DESC
+LIMIT 100;
+
+-- Секции и число строк в них
+SELECT 
+    c.relname AS partition_name,
+    pg_get_expr(c.relpartbound, c.oid) AS bounds,
+    c.reltuples::BIGINT AS estimated_rows
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'transactions'::regclass
+ORDER BY c.relname;
+
 -- Пример 2: Агрегация расходов по категориям за месяц
 EXPLAIN ANALYZE
 SELECT 
@@ -29,9 +50,8 @@ SELECT
     COUNT(*) as count,
     AVG(t.amount) as avg_amount
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
 JOIN categories c ON t.category_id = c.id
-WHERE a.user_id = 1
+WHERE t.user_id = 1
   AND t.type = 'expense'
   AND t.date >= DATE_TRUNC('month', CURRENT_DATE)
   AND t.date < DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month'
@@ -43,10 +63,26 @@ EXPLAIN ANALYZE
 SELECT t.*, a.name as account_name
 FROM transactions t
 JOIN accounts a ON t.account_id = a.id
-WHERE a.user_id = 1
+WHERE t.user_id = 1
   AND to_tsvector('russian', COALESCE(t.description, '')) 
       @@ to_tsquery('russian', 'продукты | магазин');
 
+-- Пример 3а: Поиск GET /api/transactions/search (описание + получатель)
+-- В плане должен быть BitmapOr по idx_transactions_description_gin
+-- и idx_transactions_payee_trgm
+EXPLAIN ANALYZE
+SELECT t.*
+FROM transactions t
+WHERE t.user_id = 1
+  AND (to_tsvector('russian'::regconfig, COALESCE(t.description, ''))
+           @@ websearch_to_tsquery('russian'::regconfig, 'продукты')
+       OR t.payee ILIKE '%продукты%')
+ORDER BY ts_rank(to_tsvector('russian'::regconfig, COALESCE(t.description, '')),
+                 websearch_to_tsquery('russian'::regconfig, 'продукты'))
+         + COALESCE(similarity(t.payee, 'продукты'), 0) DESC,
+         t.date DESC, t.id DESC
+LIMIT 50;
+
 -- Пример 4: Получение топ категорий расходов
 EXPLAIN ANALYZE
 SELECT 
@@ -55,9 +91,8 @@ SELECT
     SUM(t.amount) as total_amount,
     COUNT(t.id) as transaction_count
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
 JOIN categories c ON t.category_id = c.id
-WHERE a.user_id = 1
+WHERE t.user_id = 1
   AND t.type = 'expense'
   AND t.date >= CURRENT_DATE - INTERVAL '3 months'
 GROUP BY c.id, c.name
@@ -75,11 +110,11 @@ SELECT
 FROM budgets b
 LEFT JOIN categories c ON b.category_id = c.id
 LEFT JOIN transactions t ON (
-    (b.category_id IS NULL OR t.category_id = b.category_id)
+    t.user_id = b.user_id
+    AND (b.category_id IS NULL OR t.category_id = b.category_id)
     AND t.date >= DATE_TRUNC('month', CURRENT_DATE)
     AND t.date < DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month'
 )
-LEFT JOIN accounts a ON t.account_id = a.id AND a.user_id = b.user_id
 WHERE b.user_id = 1
   AND b.is_active = TRUE
   AND b.period = 'month'
@@ -94,10 +129,9 @@ SELECT
     t.description,
     ARRAY_AGG(tg.name) as tags
 FROM transactions t
-JOIN accounts a ON t.account_id = a.id
 LEFT JOIN transaction_tags tt ON t.id = tt.transaction_id
 LEFT JOIN tags tg ON tt.tag_id = tg.id
-WHERE a.user_id = 1
+WHERE t.user_id = 1
   AND t.date >= CURRENT_DATE - INTERVAL '1 month'
 GROUP BY t.id, t.amount, t.date, t.description
 ORDER BY t.date DESC;
@@ -0,0 +1,92 @@
+-- FinFlow Audit Benchmark
+-- Сравнение пропускной способности массового импорта транзакций
+-- при разных режимах аудита (off / row / statement / statement + changed_only)
+--
+-- Запуск (на тестовой базе, скрипт переключает триггеры аудита):
+--   psql -U finflow_user -d finflow_db -v rows=50000 -f database/benchmarks/audit_benchmark.sql
+--
+-- Все изменения выполняются в одной транзакции и откатываются в конце
+
+\if :{?rows}
+\else
+    \set rows 50000
+\endif
+
+BEGIN;
+
+CREATE TEMP TABLE audit_benchmark_results (
+    mode TEXT,
+    operation TEXT,
+    row_count BIGINT,
+    audit_rows BIGINT,
+    elapsed_ms NUMERIC,
+    rows_per_sec NUMERIC
+) ON COMMIT DROP;
+
+SELECT set_config('benchmark.rows', :'rows', TRUE);
+
+DO $$
+DECLARE
+    v_rows INTEGER := current_setting('benchmark.rows')::INTEGER;
+    v_modes TEXT[] := ARRAY['off', 'row', 'statement', 'statement_changed_only'];
+    v_mode TEXT;
+    v_user_id INTEGER;
+    v_account_id INTEGER;
+    v_audit_before BIGINT;
+    v_started TIMESTAMPTZ;
+    v_elapsed NUMERIC;
+    v_operation TEXT;
+BEGIN
+    INSERT INTO users (email, password_hash, full_name)
+    VALUES ('audit-benchmark@example.com', 'benchmark', 'Audit Benchmark')
+    RETURNING id INTO v_user_id;
+    
+    INSERT INTO accounts (user_id, name, type)
+    VALUES (v_user_id, 'Benchmark', 'debit_card')
+    RETURNING id INTO v_account_id;
+    
+    FOREACH v_mode IN ARRAY v_modes LOOP
+        PERFORM set_audit_mode(split_part(v_mode, '_', 1), v_mode LIKE '%changed_only');
+        
+        FOREACH v_operation IN ARRAY ARRAY['insert', 'update', 'delete'] LOOP
+            SELECT COUNT(*) INTO v_audit_before FROM audit_log;
+            v_started := clock_timestamp();
+            
+            IF v_operation = 'insert' THEN
+                -- Одним оператором, как пакетный импорт
+                INSERT INTO transactions (account_id, amount, type, date, description)
+                SELECT v_account_id, 100.00, 'income', CURRENT_DATE - (g % 365), 'benchmark ' || g
+                FROM generate_series(1, v_rows) g;
+            ELSIF v_operation = 'update' THEN
+                UPDATE transactions SET description = description || ' (updated)'
+                WHERE account_id = v_account_id;
+            ELSE
+                DELETE FROM transactions WHERE account_id = v_account_id;
+            END IF;
+            
+            v_elapsed := EXTRACT(EPOCH FROM clock_timestamp() - v_started) * 1000;
+            INSERT INTO audit_benchmark_results VALUES (
+                v_mode,
+                v_operation,
+                v_rows,
+                (SELECT COUNT(*) FROM audit_log) - v_audit_before,
+                ROUND(v_elapsed, 1),
+                ROUND(v_rows / NULLIF(v_elapsed, 0) * 1000)
+            );
+        END LOOP;
+    END LOOP;
+END $$;
+
+SELECT 
+    operation,
+    mode,
+    row_count,
+    audit_rows,
+    elapsed_ms,
+    rows_per_sec
+FROM audit_benchmark_results
+ORDER BY 
+    ARRAY_POSITION(ARRAY['insert', 'update', 'delete'], operation),
+    ARRAY_POSITION(ARRAY['off', 'row', 'statement', 'statement_changed_only'], mode);
+
+ROLLBACK;
@@ -0,0 +1,125 @@
+-- FinFlow user_id Benchmark
+-- Сравнение выборок транзакций пользователя: фильтр через JOIN accounts
+-- (до денормализации) и по transactions.user_id (idx_transactions_user_date_id)
+--
+-- Запуск на базе с загруженным объемом данных (например, 50 млн транзакций):
+--   psql -U finflow_user -d finflow_db -v user_id=1 -v runs=20 -f database/benchmarks/user_id_benchmark.sql
+--
+-- Каждый запрос выполняется runs раз после одного прогревочного прогона;
+-- данные не изменяются. На базе после миграции 001 вариант join работает
+-- без idx_transactions_date_id, поэтому для сравнения до/после его время
+-- берется с базы до миграции с теми же данными
+--
+-- Результаты до и после миграции 001 (одни и те же данные
+-- app.commands.generate_data --users 2000 --transactions 2000000 --seed 42:
+-- 2,06 млн транзакций, у выбранного пользователя 10 223). Вариант join
+-- выполнялся на базе со схемой до миграции 001 (с idx_transactions_date_id),
+-- вариант user_id - на текущей схеме; runs=100, данные в кэше, медиана
+-- средних трех запусков / минимум, мс. PostgreSQL 16 на 4 ядрах, а не
+-- целевой 15; на шумной машине разница менее ~30% не значима:
+--   latest_page        до 6,91 / 4,32   после 0,60 / 0,23
+--   year_by_category   до 2,54 / 1,29   после 2,13 / 1,37
+--   month_expense_sum  до 0,37 / 0,18   после 0,43 / 0,27
+-- Выигрыш дает страница списка; отчетные выборки по году и месяцу
+-- в пределах погрешности не изменились
+
+\if :{?user_id}
+\else
+    \set user_id 1
+\endif
+\if :{?runs}
+\else
+    \set runs 20
+\endif
+
+CREATE TEMP TABLE user_id_benchmark_results (
+    query TEXT,
+    variant TEXT,
+    runs INTEGER,
+    avg_ms NUMERIC,
+    min_ms NUMERIC,
+    max_ms NUMERIC
+);
+
+SELECT 
+    set_config('benchmark.user_id', :'user_id', FALSE),
+    set_config('benchmark.runs', :'runs', FALSE);
+
+DO $$
+DECLARE
+    v_user_id INTEGER := current_setting('benchmark.user_id')::INTEGER;
+    v_runs INTEGER := current_setting('benchmark.runs')::INTEGER;
+    v_queries TEXT[][] := ARRAY[
+        -- Страница списка транзакций (GET /api/transactions)
+        ARRAY['latest_page', 'join',
+              'SELECT t.* FROM transactions t JOIN accounts a ON t.account_id = a.id
+               WHERE a.user_id = $1 ORDER BY t.date DESC, t.id DESC LIMIT 100'],
+        ARRAY['latest_page', 'user_id',
+              'SELECT t.* FROM transactions t
+               WHERE t.user_id = $1 ORDER BY t.date DESC, t.id DESC LIMIT 100'],
+        -- Суммы по категориям за год (отчеты)
+        ARRAY['year_by_category', 'join',
+              'SELECT t.category_id, t.type, SUM(t.amount), COUNT(*)
+               FROM transactions t JOIN accounts a ON t.account_id = a.id
+               WHERE a.user_id = $1 AND t.date >= CURRENT_DATE - 365
+               GROUP BY t.category_id, t.type'],
+        ARRAY['year_by_category', 'user_id',
+              'SELECT t.category_id, t.type, SUM(t.amount), COUNT(*)
+               FROM transactions t
+               WHERE t.user_id = $1 AND t.date >= CURRENT_DATE - 365
+               GROUP BY t.category_id, t.type'],
+        -- Расходы за месяц
+        ARRAY['month_expense_sum', 'join',
+              'SELECT SUM(t.amount) FROM transactions t JOIN accounts a ON t.account_id = a.id
+               WHERE a.user_id = $1 AND t.type = ''expense''
+                 AND t.date >= DATE_TRUNC(''month'', CURRENT_DATE)::DATE'],
+        ARRAY['month_expense_sum', 'user_id',
+              'SELECT SUM(t.amount) FROM transactions t
+               WHERE t.user_id = $1 AND t.type = ''expense''
+                 AND t.date >= DATE_TRUNC(''month'', CURRENT_DATE)::DATE']
+    ];
+    v_timings NUMERIC[];
+    v_started TIMESTAMPTZ;
+    i INTEGER;
+    r INTEGER;
+BEGIN
+    FOR i IN 1 .. array_length(v_queries, 1) LOOP
+        EXECUTE v_queries[i][3] USING v_user_id;
+        v_timings := ARRAY[]::NUMERIC[];
+        FOR r IN 1 .. v_runs LOOP
+            v_started := clock_timestamp();
+            EXECUTE v_queries[i][3] USING v_user_id;
+            v_timings := v_timings || (EXTRACT(EPOCH FROM clock_timestamp() - v_started) * 1000)::NUMERIC;
+        END LOOP;
+        
+        INSERT INTO user_id_benchmark_results
+        SELECT 
+            v_queries[i][1],
+            v_queries[i][2],
+            v_runs,
+            ROUND(AVG(ms), 2),
+            ROUND(MIN(ms), 2),
+            ROUND(MAX(ms), 2)
+        FROM UNNEST(v_timings) AS ms;
+    END LOOP;
+END $$;
+
+SELECT 
+    j.query,
+    j.avg_ms AS join_avg_ms,
+    u.avg_ms AS user_id_avg_ms,
+    j.min_ms AS join_min_ms,
+    u.min_ms AS user_id_min_ms
+FROM user_id_benchmark_results j
+JOIN user_id_benchmark_results u ON u.query = j.query AND u.variant = 'user_id'
+WHERE j.variant = 'join'
+ORDER BY j.query;
+
+-- Планы: ожидается Index Only Scan / Index Scan по idx_transactions_user_date_id
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT t.category_id, t.type, SUM(t.amount), COUNT(*)
+FROM transactions t
+WHERE t.user_id = :user_id AND t.date >= CURRENT_DATE - 365
+GROUP BY t.category_id, t.type;
+
+DROP TABLE user_id_benchmark_results;
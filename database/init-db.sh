@@ -19,6 +19,9 @@ psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-E
     \echo 'Creating additional indexes...'
     \i /docker-entrypoint-initdb.d/06_indexes_analysis.sql
     
+    \echo 'Creating materialized views...'
+    \i /docker-entrypoint-initdb.d/08_materialized_views.sql
+    
     \echo 'Database initialization completed!'
 EOSQL
 
@@ -16,6 +16,9 @@
 \echo 'Creating additional indexes...'
 \i 06_indexes_analysis.sql
 
+\echo 'Creating materialized views...'
+\i 08_materialized_views.sql
+
 \echo 'Database initialization completed!'
 \echo 'To load test data, run: psql -d finflow -f 05_seed_data.sql'
 
@@ -0,0 +1,650 @@
+-- FinFlow Migration 001
+-- Денормализация user_id в transactions для существующей базы
+-- (новые базы получают эту схему из 01_schema.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/001_transactions_user_id.sql
+--
+-- Заполнение user_id выполняется с отключенными пользовательскими триггерами:
+-- значение берется из счета, балансы, агрегаты и аудит не меняются
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+ALTER TABLE accounts ADD CONSTRAINT unique_account_user UNIQUE (id, user_id);
+
+ALTER TABLE transactions ADD COLUMN user_id INTEGER;
+
+ALTER TABLE transactions DISABLE TRIGGER USER;
+UPDATE transactions t
+SET user_id = a.user_id
+FROM accounts a
+WHERE a.id = t.account_id;
+ALTER TABLE transactions ENABLE TRIGGER USER;
+
+ALTER TABLE transactions ALTER COLUMN user_id SET NOT NULL;
+
+ALTER TABLE transactions DROP CONSTRAINT transactions_account_id_fkey;
+ALTER TABLE transactions ADD CONSTRAINT transactions_account_user_fkey
+    FOREIGN KEY (account_id, user_id)
+    REFERENCES accounts(id, user_id) ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- Функция заполнения владельца транзакции по счету
+-- Приложение передает user_id само; триггер нужен для вставок без него
+-- и для смены счета. Согласованность проверяет внешний ключ (account_id, user_id)
+CREATE OR REPLACE FUNCTION set_transaction_user_id()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.user_id IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.account_id <> OLD.account_id AND NEW.user_id = OLD.user_id) THEN
+        SELECT user_id INTO NEW.user_id FROM accounts WHERE id = NEW.account_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_transaction_user_id_trigger
+    BEFORE INSERT OR UPDATE OF account_id ON transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_transaction_user_id();
+
+COMMENT ON FUNCTION set_transaction_user_id() IS 'Заполняет владельца транзакции по ее счету';
+
+-- Помесячные агрегаты берут user_id из таблиц переходов без JOIN accounts
+CREATE OR REPLACE FUNCTION update_monthly_category_totals()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta TEXT;
+BEGIN
+    -- В триггере видны только объявленные им таблицы переходов,
+    -- поэтому источник дельт подставляется в зависимости от операции
+    IF TG_OP = 'INSERT' THEN
+        v_delta := 'SELECT user_id, category_id, date, type, amount, 1 AS sign FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        v_delta := 'SELECT user_id, category_id, date, type, amount, -1 AS sign FROM old_rows';
+    ELSE
+        v_delta := 'SELECT user_id, category_id, date, type, amount, 1 AS sign FROM new_rows
+                    UNION ALL
+                    SELECT user_id, category_id, date, type, amount, -1 AS sign FROM old_rows';
+    END IF;
+    
+    EXECUTE format($sql$
+        INSERT INTO monthly_category_totals AS m (
+            user_id, category_id, month,
+            total_income, total_expense, total_amount,
+            income_count, expense_count, transaction_count
+        )
+        SELECT 
+            d.user_id,
+            d.category_id,
+            DATE_TRUNC('month', d.date)::DATE,
+            SUM(CASE WHEN d.type = 'income' THEN d.sign * d.amount ELSE 0 END),
+            SUM(CASE WHEN d.type = 'expense' THEN d.sign * d.amount ELSE 0 END),
+            SUM(d.sign * d.amount),
+            SUM(CASE WHEN d.type = 'income' THEN d.sign ELSE 0 END),
+            SUM(CASE WHEN d.type = 'expense' THEN d.sign ELSE 0 END),
+            SUM(d.sign)
+        FROM (%s) d
+        GROUP BY d.user_id, d.category_id, DATE_TRUNC('month', d.date)
+        -- UPDATE без изменения суммы, типа, даты и категории не трогает агрегаты
+        HAVING SUM(d.sign) <> 0
+            OR SUM(d.sign * d.amount) <> 0
+            OR SUM(CASE WHEN d.type = 'income' THEN d.sign ELSE 0 END) <> 0
+            OR SUM(CASE WHEN d.type = 'expense' THEN d.sign ELSE 0 END) <> 0
+        ON CONFLICT (user_id, category_id, month) DO UPDATE SET
+            total_income = m.total_income + EXCLUDED.total_income,
+            total_expense = m.total_expense + EXCLUDED.total_expense,
+            total_amount = m.total_amount + EXCLUDED.total_amount,
+            income_count = m.income_count + EXCLUDED.income_count,
+            expense_count = m.expense_count + EXCLUDED.expense_count,
+            transaction_count = m.transaction_count + EXCLUDED.transaction_count
+    $sql$, v_delta);
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Функции и представления, читающие transactions.user_id вместо JOIN accounts
+
+-- Функция расчета суммы транзакций за период
+CREATE OR REPLACE FUNCTION get_transactions_sum(
+    p_user_id INTEGER,
+    p_start_date DATE,
+    p_end_date DATE,
+    p_type transaction_type DEFAULT NULL
+)
+RETURNS DECIMAL(15, 2) AS $$
+DECLARE
+    v_sum DECIMAL(15, 2);
+BEGIN
+    SELECT COALESCE(SUM(t.amount), 0.00) INTO v_sum
+    FROM transactions t
+    WHERE t.user_id = p_user_id
+      AND t.date BETWEEN p_start_date AND p_end_date
+      AND (p_type IS NULL OR t.type = p_type);
+    
+    RETURN v_sum;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_transactions_sum(INTEGER, DATE, DATE, transaction_type) IS 
+'Возвращает сумму транзакций пользователя за указанный период';
+
+-- Функция расчета превышения бюджета
+CREATE OR REPLACE FUNCTION get_budget_exceeded(
+    p_budget_id INTEGER,
+    p_period_start DATE,
+    p_period_end DATE
+)
+RETURNS DECIMAL(15, 2) AS $$
+DECLARE
+    v_budget_amount DECIMAL(15, 2);
+    v_spent DECIMAL(15, 2);
+    v_exceeded DECIMAL(15, 2);
+BEGIN
+    -- Получаем сумму бюджета
+    SELECT amount INTO v_budget_amount
+    FROM budgets
+    WHERE id = p_budget_id;
+    
+    -- Получаем сумму потраченных средств
+    SELECT COALESCE(SUM(t.amount), 0.00) INTO v_spent
+    FROM transactions t
+    JOIN budgets b ON b.category_id = t.category_id AND b.user_id = t.user_id
+    WHERE b.id = p_budget_id
+      AND t.type = 'expense'
+      AND t.date BETWEEN p_period_start AND p_period_end;
+    
+    -- Рассчитываем превышение
+    v_exceeded := v_spent - v_budget_amount;
+    
+    RETURN GREATEST(0.00, v_exceeded);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_budget_exceeded(INTEGER, DATE, DATE) IS 
+'Возвращает сумму превышения бюджета за указанный период';
+
+-- Функция получения сумм транзакций по категориям за период
+-- Полные месяцы читаются из monthly_category_totals, сырые транзакции
+-- сканируются только для неполных крайних месяцев периода
+CREATE OR REPLACE FUNCTION get_category_totals(
+    p_user_id INTEGER,
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    category_id INTEGER,
+    total_income DECIMAL(15, 2),
+    total_expense DECIMAL(15, 2),
+    total_amount DECIMAL(15, 2),
+    income_count BIGINT,
+    expense_count BIGINT,
+    transaction_count BIGINT
+) AS $$
+DECLARE
+    v_start DATE := COALESCE(p_start_date, DATE '0001-01-01');
+    v_end DATE := COALESCE(p_end_date, DATE '9999-12-31');
+    v_full_start DATE;
+    v_full_end DATE; -- не включительно
+BEGIN
+    -- Диапазон полных месяцев внутри периода
+    v_full_start := CASE 
+        WHEN v_start = DATE_TRUNC('month', v_start)::DATE THEN v_start
+        ELSE (DATE_TRUNC('month', v_start) + INTERVAL '1 month')::DATE
+    END;
+    v_full_end := DATE_TRUNC('month', v_end + 1)::DATE;
+    
+    IF v_full_start >= v_full_end THEN
+        -- Полных месяцев нет: весь период считается по сырым транзакциям
+        v_full_start := v_end + 1;
+        v_full_end := v_end + 1;
+    END IF;
+    
+    RETURN QUERY
+    SELECT 
+        s.category_id,
+        SUM(s.total_income)::DECIMAL(15, 2),
+        SUM(s.total_expense)::DECIMAL(15, 2),
+        SUM(s.total_amount)::DECIMAL(15, 2),
+        SUM(s.income_count)::BIGINT,
+        SUM(s.expense_count)::BIGINT,
+        SUM(s.transaction_count)::BIGINT
+    FROM (
+        SELECT 
+            m.category_id, m.total_income, m.total_expense, m.total_amount,
+            m.income_count, m.expense_count, m.transaction_count
+        FROM monthly_category_totals m
+        WHERE m.user_id = p_user_id
+          AND m.month >= v_full_start
+          AND m.month < v_full_end
+        UNION ALL
+        SELECT 
+            t.category_id,
+            CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END,
+            t.amount,
+            CASE WHEN t.type = 'income' THEN 1 ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN 1 ELSE 0 END,
+            1
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.date >= v_start
+          AND t.date < LEAST(v_full_start, v_end + 1)
+        UNION ALL
+        SELECT 
+            t.category_id,
+            CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END,
+            t.amount,
+            CASE WHEN t.type = 'income' THEN 1 ELSE 0 END,
+            CASE WHEN t.type = 'expense' THEN 1 ELSE 0 END,
+            1
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.date >= v_full_end
+          AND t.date <= v_end
+    ) s
+    GROUP BY s.category_id
+    HAVING SUM(s.transaction_count) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_category_totals(INTEGER, DATE, DATE) IS 
+'Возвращает суммы транзакций пользователя по категориям за период (по помесячным агрегатам)';
+
+-- Функция получения транзакций с тегами
+CREATE OR REPLACE FUNCTION get_transactions_with_tags(
+    p_user_id INTEGER,
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL,
+    p_tag_ids INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    transaction_id INTEGER,
+    account_name VARCHAR(255),
+    category_name VARCHAR(255),
+    amount DECIMAL(15, 2),
+    type transaction_type,
+    date DATE,
+    description TEXT,
+    tags TEXT[]
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        t.id AS transaction_id,
+        a.name AS account_name,
+        c.name AS category_name,
+        t.amount,
+        t.type,
+        t.date,
+        t.description,
+        ARRAY_AGG(DISTINCT tg.name ORDER BY tg.name) FILTER (WHERE tg.name IS NOT NULL) AS tags
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN categories c ON t.category_id = c.id
+    LEFT JOIN transaction_tags tt ON t.id = tt.transaction_id
+    LEFT JOIN tags tg ON tt.tag_id = tg.id
+    WHERE t.user_id = p_user_id
+      AND (p_start_date IS NULL OR t.date >= p_start_date)
+      AND (p_end_date IS NULL OR t.date <= p_end_date)
+      AND (p_tag_ids IS NULL OR tg.id = ANY(p_tag_ids))
+    GROUP BY t.id, a.name, c.name, t.amount, t.type, t.date, t.description
+    ORDER BY t.date DESC, t.id DESC;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_transactions_with_tags(INTEGER, DATE, DATE, INTEGER[]) IS 
+'Возвращает транзакции с привязанными тегами';
+
+-- Функция полного пересчета помесячных агрегатов (для пользователя или всех)
+-- Используется после загрузки данных в обход триггеров и для проверки расхождений
+CREATE OR REPLACE FUNCTION rebuild_monthly_category_totals(p_user_id INTEGER DEFAULT NULL)
+RETURNS VOID AS $$
+BEGIN
+    -- Блокируем запись в transactions на время пересчета
+    LOCK TABLE transactions IN SHARE MODE;
+    
+    DELETE FROM monthly_category_totals
+    WHERE p_user_id IS NULL OR user_id = p_user_id;
+    
+    INSERT INTO monthly_category_totals (
+        user_id, category_id, month,
+        total_income, total_expense, total_amount,
+        income_count, expense_count, transaction_count
+    )
+    SELECT 
+        t.user_id,
+        t.category_id,
+        DATE_TRUNC('month', t.date)::DATE,
+        SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END),
+        SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END),
+        SUM(t.amount),
+        COUNT(*) FILTER (WHERE t.type = 'income'),
+        COUNT(*) FILTER (WHERE t.type = 'expense'),
+        COUNT(*)
+    FROM transactions t
+    WHERE p_user_id IS NULL OR t.user_id = p_user_id
+    GROUP BY t.user_id, t.category_id, DATE_TRUNC('month', t.date);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION rebuild_monthly_category_totals(INTEGER) IS 
+'Полностью пересчитывает помесячные агрегаты транзакций';
+
+-- Функция материализации наступивших регулярных платежей (одна пачка)
+-- Берет до p_batch_size активных расписаний с next_date <= p_as_of после ключа
+-- (p_after_date, p_after_id), создает транзакции за все пропущенные даты
+-- (не более p_max_occurrences на расписание) одним INSERT и сдвигает next_date.
+-- Повторный запуск не создает дублей: ON CONFLICT по (recurring_transaction_id, date).
+-- Расписания счетов, баланс которых ушел бы в минус, пропускаются.
+-- Возвращает счетчики пачки и ключ последнего расписания для следующего вызова
+CREATE OR REPLACE FUNCTION materialize_recurring_transactions(
+    p_as_of DATE DEFAULT CURRENT_DATE,
+    p_batch_size INTEGER DEFAULT 10000,
+    p_after_date DATE DEFAULT '-infinity',
+    p_after_id INTEGER DEFAULT 0,
+    p_max_occurrences INTEGER DEFAULT 366
+)
+RETURNS TABLE (
+    batch_schedules INTEGER,
+    created_transactions INTEGER,
+    skipped_schedules INTEGER,
+    cursor_date DATE,
+    cursor_id INTEGER
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH batch AS (
+        SELECT 
+            r.id,
+            r.account_id,
+            r.category_id,
+            r.description,
+            r.amount,
+            r.type,
+            r.interval,
+            r.next_date,
+            LEAST(p_as_of, COALESCE(r.end_date, p_as_of)) AS until_date
+        FROM recurring_transactions r
+        WHERE r.is_active = TRUE
+          AND r.next_date <= p_as_of
+          AND (r.next_date, r.id) > (p_after_date, p_after_id)
+        ORDER BY r.next_date, r.id
+        LIMIT p_batch_size
+        -- Параллельные обработчики не ждут друг друга
+        FOR UPDATE SKIP LOCKED
+    ),
+    occurrences AS (
+        SELECT b.*, o.occ_date
+        FROM batch b
+        CROSS JOIN LATERAL (
+            SELECT recurring_occurrence(b.next_date, b.interval, gs.n) AS occ_date
+            FROM generate_series(
+                0,
+                LEAST(p_max_occurrences, recurring_occurrence_count(b.next_date, b.interval, b.until_date)) - 1
+            ) AS gs(n)
+        ) o
+        WHERE o.occ_date <= b.until_date
+    ),
+    blocked AS (
+        SELECT o.account_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        GROUP BY o.account_id, a.balance
+        HAVING a.balance + SUM(CASE o.type
+            WHEN 'income' THEN o.amount
+            WHEN 'expense' THEN -o.amount
+            ELSE 0
+        END) < 0
+    ),
+    ready AS (
+        SELECT o.*, a.user_id AS account_user_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        WHERE o.account_id NOT IN (SELECT bl.account_id FROM blocked bl)
+    ),
+    inserted AS (
+        INSERT INTO transactions (
+            account_id, user_id, category_id, amount, type, date,
+            description, is_recurring, recurring_transaction_id
+        )
+        SELECT 
+            rd.account_id, rd.account_user_id, rd.category_id, rd.amount, rd.type, rd.occ_date,
+            rd.description, TRUE, rd.id
+        FROM ready rd
+        ON CONFLICT (recurring_transaction_id, date)
+            WHERE recurring_transaction_id IS NOT NULL
+            DO NOTHING
+        RETURNING 1
+    ),
+    advanced AS (
+        UPDATE recurring_transactions r
+        SET next_date = CASE 
+                WHEN r.end_date IS NOT NULL AND s.new_next > r.end_date THEN s.last_date
+                ELSE s.new_next
+            END,
+            is_active = (r.end_date IS NULL OR s.new_next <= r.end_date)
+        FROM (
+            SELECT 
+                rd.id,
+                MAX(rd.occ_date) AS last_date,
+                recurring_occurrence(rd.next_date, rd.interval, COUNT(*)::INTEGER) AS new_next
+            FROM ready rd
+            GROUP BY rd.id, rd.next_date, rd.interval
+        ) s
+        WHERE r.id = s.id
+    )
+    -- Изменяющие CTE выполняются полностью, даже если на них нет ссылок
+    SELECT 
+        (SELECT COUNT(*) FROM batch)::INTEGER,
+        (SELECT COUNT(*) FROM inserted)::INTEGER,
+        (SELECT COUNT(DISTINCT o.id) FROM occurrences o
+         WHERE o.account_id IN (SELECT bl.account_id FROM blocked bl))::INTEGER,
+        (SELECT b.next_date FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1),
+        (SELECT b.id FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION materialize_recurring_transactions(DATE, INTEGER, DATE, INTEGER, INTEGER) IS 
+'Создает транзакции по наступившим регулярным платежам (одна пачка расписаний)';
+
+-- Функция поиска расхождений баланса счетов с транзакциями
+-- Ожидаемый баланс = opening_balance + доходы - расходы; возвращает только
+-- счета, у которых хранимый баланс отличается от ожидаемого
+CREATE OR REPLACE FUNCTION get_account_balance_drift(p_user_id INTEGER DEFAULT NULL)
+RETURNS TABLE (
+    account_id INTEGER,
+    user_id INTEGER,
+    balance DECIMAL(15, 2),
+    expected_balance DECIMAL(15, 2),
+    drift DECIMAL(15, 2)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        a.id,
+        a.user_id,
+        a.balance,
+        (a.opening_balance + COALESCE(s.total, 0))::DECIMAL(15, 2),
+        (a.balance - a.opening_balance - COALESCE(s.total, 0))::DECIMAL(15, 2)
+    FROM accounts a
+    LEFT JOIN (
+        SELECT 
+            t.account_id,
+            SUM(CASE 
+                WHEN t.type = 'income' THEN t.amount
+                WHEN t.type = 'expense' THEN -t.amount
+                ELSE 0
+            END) AS total
+        FROM transactions t
+        WHERE p_user_id IS NULL OR t.user_id = p_user_id
+        GROUP BY t.account_id
+    ) s ON s.account_id = a.id
+    WHERE (p_user_id IS NULL OR a.user_id = p_user_id)
+      AND a.balance <> a.opening_balance + COALESCE(s.total, 0)
+    ORDER BY a.id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_account_balance_drift(INTEGER) IS 
+'Возвращает счета, баланс которых расходится с суммой транзакций';
+
+-- Представление: Месячные доходы и расходы
+CREATE OR REPLACE VIEW v_monthly_financial_summary AS
+SELECT 
+    t.user_id,
+    DATE_TRUNC('month', t.date)::DATE AS month,
+    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
+    SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
+    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) - 
+    SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS net_income,
+    COUNT(CASE WHEN t.type = 'income' THEN 1 END) AS income_count,
+    COUNT(CASE WHEN t.type = 'expense' THEN 1 END) AS expense_count,
+    COUNT(*) AS total_transactions
+FROM transactions t
+GROUP BY t.user_id, DATE_TRUNC('month', t.date)
+ORDER BY t.user_id, month DESC;
+
+COMMENT ON VIEW v_monthly_financial_summary IS 'Месячная сводка доходов и расходов по пользователям';
+
+-- Представление: Расходы по категориям за текущий месяц
+CREATE OR REPLACE VIEW v_current_month_expenses_by_category AS
+SELECT 
+    t.user_id,
+    c.id AS category_id,
+    c.name AS category_name,
+    c.parent_id,
+    COALESCE(parent_cat.name, 'Без родительской категории') AS parent_category_name,
+    SUM(t.amount) AS total_amount,
+    COUNT(t.id) AS transaction_count,
+    AVG(t.amount) AS avg_amount,
+    MIN(t.amount) AS min_amount,
+    MAX(t.amount) AS max_amount,
+    c.budget_limit,
+    CASE 
+        WHEN c.budget_limit > 0 THEN 
+            (SUM(t.amount) / c.budget_limit) * 100.00
+        ELSE NULL
+    END AS budget_usage_percent
+FROM transactions t
+JOIN categories c ON t.category_id = c.id
+LEFT JOIN categories parent_cat ON c.parent_id = parent_cat.id
+WHERE t.type = 'expense'
+  AND t.date >= DATE_TRUNC('month', CURRENT_DATE)::DATE
+GROUP BY t.user_id, c.id, c.name, c.parent_id, parent_cat.name, c.budget_limit
+ORDER BY t.user_id, total_amount DESC;
+
+COMMENT ON VIEW v_current_month_expenses_by_category IS 'Расходы по категориям за текущий месяц с анализом бюджета';
+
+-- Представление: Топ транзакций по сумме
+CREATE OR REPLACE VIEW v_top_transactions AS
+SELECT 
+    t.id AS transaction_id,
+    t.user_id,
+    a.name AS account_name,
+    c.name AS category_name,
+    t.amount,
+    t.type,
+    t.date,
+    t.description,
+    t.payee,
+    ROW_NUMBER() OVER (
+        PARTITION BY t.user_id, t.type 
+        ORDER BY t.amount DESC, t.date DESC
+    ) AS rank_by_type
+FROM transactions t
+JOIN accounts a ON t.account_id = a.id
+LEFT JOIN categories c ON t.category_id = c.id
+ORDER BY t.user_id, t.type, t.amount DESC;
+
+COMMENT ON VIEW v_top_transactions IS 'Топ транзакций по сумме с ранжированием';
+
+-- Представление: Бюджеты с текущим статусом
+CREATE OR REPLACE VIEW v_budgets_with_status AS
+SELECT 
+    b.id AS budget_id,
+    b.user_id,
+    b.category_id,
+    COALESCE(c.name, 'Общий бюджет') AS category_name,
+    b.amount AS budget_amount,
+    b.period,
+    b.start_date,
+    b.end_date,
+    b.is_active,
+    CASE 
+        WHEN b.period = 'month' THEN 
+            DATE_TRUNC('month', CURRENT_DATE)::DATE
+        WHEN b.period = 'year' THEN 
+            DATE_TRUNC('year', CURRENT_DATE)::DATE
+    END AS current_period_start,
+    CASE 
+        WHEN b.period = 'month' THEN 
+            (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+        WHEN b.period = 'year' THEN 
+            (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+    END AS current_period_end,
+    COALESCE(SUM(CASE 
+        WHEN t.type = 'expense' 
+        AND t.date >= CASE 
+            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+        END
+        AND t.date <= CASE 
+            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+        END
+        THEN t.amount ELSE 0 
+    END), 0.00) AS spent_amount,
+    GREATEST(0.00, b.amount - COALESCE(SUM(CASE 
+        WHEN t.type = 'expense' 
+        AND t.date >= CASE 
+            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+        END
+        AND t.date <= CASE 
+            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+        END
+        THEN t.amount ELSE 0 
+    END), 0.00)) AS remaining_amount,
+    CASE 
+        WHEN b.amount > 0 THEN 
+            LEAST(100.00, (COALESCE(SUM(CASE 
+                WHEN t.type = 'expense' 
+                AND t.date >= CASE 
+                    WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+                    WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+                END
+                AND t.date <= CASE 
+                    WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+                    WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+                END
+                THEN t.amount ELSE 0 
+            END), 0.00) / b.amount) * 100.00)
+        ELSE 0.00
+    END AS usage_percent
+FROM budgets b
+LEFT JOIN categories c ON b.category_id = c.id
+LEFT JOIN transactions t ON (
+    t.user_id = b.user_id
+    AND (b.category_id IS NULL OR t.category_id = b.category_id)
+)
+WHERE b.is_active = TRUE
+GROUP BY b.id, b.user_id, b.category_id, c.name, b.amount, b.period, 
+         b.start_date, b.end_date, b.is_active
+ORDER BY b.user_id, usage_percent DESC;
+
+COMMENT ON VIEW v_budgets_with_status IS 'Бюджеты с текущим статусом использования за текущий период';
+
+COMMIT;
+
+-- Индекс строится без блокировки записи (вне транзакции)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_date_id
+    ON transactions(user_id, date DESC, id DESC)
+    INCLUDE (account_id, category_id, type, amount);
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_date_id;
+
+ANALYZE transactions;
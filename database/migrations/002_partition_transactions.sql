@@ -0,0 +1,620 @@
+-- FinFlow Migration 002
+-- Секционирование transactions по годам для существующей базы
+-- (после миграции 001; новые базы получают эту схему из 01_schema.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/002_partition_transactions.sql
+--
+-- Старая таблица переименовывается, новая секционированная таблица заполняется
+-- одним INSERT ... SELECT до создания триггеров (балансы, агрегаты и аудит не
+-- меняются), затем старая таблица удаляется. Чтение и запись transactions
+-- заблокированы на все время миграции, оно пропорционально объему таблицы.
+-- Режим аудита после миграции - 'statement'.
+-- Индексы прежней таблицы пересоздаются на новой в том же виде.
+-- Проверка отсечения секций после миграции:
+--   python -m app.commands.transaction_partitions --verify
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+LOCK TABLE transactions, transaction_tags IN ACCESS EXCLUSIVE MODE;
+
+-- Определения индексов сохраняются: индексы, которые не создаются ниже
+-- явно, пересоздаются на новой таблице в том же виде
+CREATE TEMP TABLE transactions_index_definitions ON COMMIT DROP AS
+SELECT i.relname AS index_name, pg_get_indexdef(x.indexrelid) AS definition
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+WHERE x.indrelid = 'transactions'::regclass
+  AND NOT x.indisprimary;
+
+-- Имена индексов и ограничений освобождаются для новой таблицы
+DO $$
+DECLARE
+    v_index TEXT;
+BEGIN
+    FOR v_index IN
+        SELECT index_name FROM transactions_index_definitions
+    LOOP
+        EXECUTE format('DROP INDEX %I', v_index);
+    END LOOP;
+END $$;
+
+ALTER TABLE transaction_tags DROP CONSTRAINT transaction_tags_transaction_id_fkey;
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey;
+ALTER SEQUENCE transactions_id_seq OWNED BY NONE;
+
+-- 4. Таблица транзакций (секционирована по годам по date)
+CREATE TABLE transactions (
+    id INTEGER NOT NULL DEFAULT nextval('transactions_id_seq'),
+    account_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL ON UPDATE CASCADE,
+    amount DECIMAL(15, 2) NOT NULL,
+    type transaction_type NOT NULL,
+    date DATE NOT NULL,
+    description TEXT,
+    payee VARCHAR(255),
+    location VARCHAR(255),
+    is_recurring BOOLEAN NOT NULL DEFAULT FALSE,
+    recurring_transaction_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date),
+    CONSTRAINT transactions_account_user_fkey FOREIGN KEY (account_id, user_id)
+        REFERENCES accounts(id, user_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    CONSTRAINT amount_positive CHECK (amount > 0),
+    CONSTRAINT date_not_future CHECK (date <= CURRENT_DATE)
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id;
+
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+COMMENT ON TABLE transactions IS 'Транзакции (доходы, расходы, переводы)';
+
+CREATE INDEX idx_transactions_account_id ON transactions(account_id);
+CREATE INDEX idx_transactions_category_id ON transactions(category_id);
+CREATE INDEX idx_transactions_date ON transactions(date);
+CREATE INDEX idx_transactions_type ON transactions(type);
+CREATE INDEX idx_transactions_date_type ON transactions(date, type);
+CREATE INDEX idx_transactions_user_date_id ON transactions(user_id, date DESC, id DESC)
+    INCLUDE (account_id, category_id, type, amount);
+CREATE UNIQUE INDEX idx_transactions_recurring_date ON transactions(recurring_transaction_id, date)
+    WHERE recurring_transaction_id IS NOT NULL;
+
+-- Остальные индексы прежней таблицы (например, из 06_indexes_analysis.sql)
+DO $$
+DECLARE
+    v_definition TEXT;
+BEGIN
+    FOR v_definition IN
+        SELECT d.definition
+        FROM transactions_index_definitions d
+        WHERE to_regclass(d.index_name) IS NULL
+    LOOP
+        EXECUTE v_definition;
+    END LOOP;
+END $$;
+
+-- Функция получения транзакций с тегами
+CREATE OR REPLACE FUNCTION get_transactions_with_tags(
+    p_user_id INTEGER,
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL,
+    p_tag_ids INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    transaction_id INTEGER,
+    account_name VARCHAR(255),
+    category_name VARCHAR(255),
+    amount DECIMAL(15, 2),
+    type transaction_type,
+    date DATE,
+    description TEXT,
+    tags TEXT[]
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        t.id AS transaction_id,
+        a.name AS account_name,
+        c.name AS category_name,
+        t.amount,
+        t.type,
+        t.date,
+        t.description,
+        ARRAY_AGG(DISTINCT tg.name ORDER BY tg.name) FILTER (WHERE tg.name IS NOT NULL) AS tags
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN categories c ON t.category_id = c.id
+    LEFT JOIN transaction_tags tt ON t.id = tt.transaction_id AND t.date = tt.transaction_date
+    LEFT JOIN tags tg ON tt.tag_id = tg.id
+    WHERE t.user_id = p_user_id
+      AND (p_start_date IS NULL OR t.date >= p_start_date)
+      AND (p_end_date IS NULL OR t.date <= p_end_date)
+      AND (p_tag_ids IS NULL OR tg.id = ANY(p_tag_ids))
+    GROUP BY t.id, a.name, c.name, t.amount, t.type, t.date, t.description
+    ORDER BY t.date DESC, t.id DESC;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_transactions_with_tags(INTEGER, DATE, DATE, INTEGER[]) IS 
+'Возвращает транзакции с привязанными тегами';
+
+-- Функция создания годовых секций transactions (transactions_yYYYY)
+-- Создает секции с p_years_back лет назад по p_years_ahead вперед, а также
+-- для всех лет, транзакции которых попали в transactions_default
+-- (например, при импорте старой выписки); существующие секции пропускает.
+-- Строки из transactions_default переносятся напрямую между секциями:
+-- триггеры уровня оператора на transactions (баланс, агрегаты, аудит)
+-- при этом не срабатывают, теги переносятся вместе с транзакциями.
+-- Возвращает имена созданных секций
+CREATE OR REPLACE FUNCTION create_transaction_partitions(
+    p_years_ahead INTEGER DEFAULT 1,
+    p_years_back INTEGER DEFAULT 0
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_year DATE;
+    v_name TEXT;
+    v_has_default_rows BOOLEAN;
+BEGIN
+    FOR v_year IN
+        SELECT generate_series(
+            DATE_TRUNC('year', CURRENT_DATE) - make_interval(years => p_years_back),
+            DATE_TRUNC('year', CURRENT_DATE) + make_interval(years => p_years_ahead),
+            INTERVAL '1 year'
+        )::DATE
+        UNION
+        SELECT DISTINCT DATE_TRUNC('year', date)::DATE FROM transactions_default
+        ORDER BY 1
+    LOOP
+        v_name := 'transactions_y' || TO_CHAR(v_year, 'YYYY');
+        CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+        
+        SELECT EXISTS (
+            SELECT 1 FROM transactions_default
+            WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+        ) INTO v_has_default_rows;
+        
+        IF v_has_default_rows THEN
+            -- Удаление из секции каскадно удаляет теги, поэтому они сохраняются заранее
+            CREATE TEMP TABLE transaction_tags_moved ON COMMIT DROP AS
+            SELECT * FROM transaction_tags
+            WHERE transaction_date >= v_year AND transaction_date < (v_year + INTERVAL '1 year')::DATE;
+            
+            CREATE TEMP TABLE transactions_moved (LIKE transactions) ON COMMIT DROP;
+            WITH moved AS (
+                DELETE FROM transactions_default
+                WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+                RETURNING *
+            )
+            INSERT INTO transactions_moved SELECT * FROM moved;
+        END IF;
+        
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_year, (v_year + INTERVAL '1 year')::DATE
+        );
+        
+        IF v_has_default_rows THEN
+            EXECUTE format('INSERT INTO %I SELECT * FROM transactions_moved', v_name);
+            INSERT INTO transaction_tags SELECT * FROM transaction_tags_moved;
+            DROP TABLE transactions_moved;
+            DROP TABLE transaction_tags_moved;
+        END IF;
+        
+        RETURN NEXT v_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION create_transaction_partitions(INTEGER, INTEGER) IS 
+'Создает годовые секции транзакций на p_years_ahead лет вперед и для дат из секции по умолчанию';
+
+-- Годовые секции на все годы, за которые есть транзакции
+
+SELECT create_transaction_partitions(
+    1,
+    COALESCE(EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER - EXTRACT(YEAR FROM MIN(date))::INTEGER, 0)
+)
+FROM transactions_unpartitioned;
+
+INSERT INTO transactions (
+    id, account_id, user_id, category_id, amount, type, date, description, payee,
+    location, is_recurring, recurring_transaction_id, created_at, updated_at
+)
+SELECT 
+    id, account_id, user_id, category_id, amount, type, date, description, payee,
+    location, is_recurring, recurring_transaction_id, created_at, updated_at
+FROM transactions_unpartitioned;
+
+-- Связь с тегами ссылается на ключ (id, date)
+ALTER TABLE transaction_tags ADD COLUMN transaction_date DATE;
+UPDATE transaction_tags tt
+SET transaction_date = t.date
+FROM transactions_unpartitioned t
+WHERE t.id = tt.transaction_id;
+ALTER TABLE transaction_tags ALTER COLUMN transaction_date SET NOT NULL;
+ALTER TABLE transaction_tags ADD CONSTRAINT transaction_tags_transaction_fkey
+    FOREIGN KEY (transaction_id, transaction_date)
+    REFERENCES transactions(id, date) ON DELETE CASCADE ON UPDATE CASCADE;
+DROP INDEX idx_transaction_tags_transaction_id;
+CREATE INDEX idx_transaction_tags_transaction_id ON transaction_tags(transaction_id, transaction_date);
+
+-- Вместе со старой таблицей удаляются ее триггеры и зависящие от нее представления
+DROP TABLE transactions_unpartitioned CASCADE;
+
+-- Функция для записи в журнал аудита
+CREATE OR REPLACE FUNCTION audit_trigger_function()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_user_id INTEGER;
+    v_old_data JSONB;
+    v_new_data JSONB;
+BEGIN
+    -- Получаем ID пользователя из сессии (если установлен)
+    v_user_id := NULLIF(current_setting('app.user_id', TRUE), '')::INTEGER;
+    
+    -- Формируем JSONB данные
+    IF TG_OP = 'DELETE' THEN
+        v_old_data := to_jsonb(OLD);
+        v_new_data := NULL;
+    ELSIF TG_OP = 'UPDATE' THEN
+        v_old_data := to_jsonb(OLD);
+        v_new_data := to_jsonb(NEW);
+    ELSIF TG_OP = 'INSERT' THEN
+        v_old_data := NULL;
+        v_new_data := to_jsonb(NEW);
+    END IF;
+    
+    -- Записываем в журнал аудита
+    INSERT INTO audit_log (
+        table_name,
+        record_id,
+        action,
+        old_data,
+        new_data,
+        changed_by
+    ) VALUES (
+        -- Для секционированных таблиц триггер срабатывает на секции,
+        -- имя исходной таблицы передается аргументом
+        COALESCE(TG_ARGV[0], TG_TABLE_NAME),
+        COALESCE((NEW.id)::INTEGER, (OLD.id)::INTEGER),
+        TG_OP::audit_action,
+        v_old_data,
+        v_new_data,
+        v_user_id
+    );
+    
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    ELSE
+        RETURN NEW;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Функция переключения режима аудита для всех аудируемых таблиц
+--   'statement' - триггеры уровня оператора (по умолчанию)
+--   'row'       - построчный триггер audit_trigger_function()
+--   'off'       - аудит отключен
+-- p_changed_only действует только в режиме 'statement' (для UPDATE)
+CREATE OR REPLACE FUNCTION set_audit_mode(
+    p_mode TEXT,
+    p_changed_only BOOLEAN DEFAULT FALSE
+)
+RETURNS VOID AS $$
+DECLARE
+    v_tables TEXT[] := ARRAY[
+        'users', 'accounts', 'categories', 'transactions',
+        'budgets', 'goals', 'recurring_transactions', 'tags'
+    ];
+    v_table TEXT;
+BEGIN
+    IF p_mode NOT IN ('statement', 'row', 'off') THEN
+        RAISE EXCEPTION 'Unknown audit mode: %', p_mode;
+    END IF;
+    
+    FOREACH v_table IN ARRAY v_tables LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_insert_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_update_trigger ON %1$I', v_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS audit_%1$s_delete_trigger ON %1$I', v_table);
+        
+        IF p_mode = 'row' THEN
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_trigger
+                    AFTER INSERT OR UPDATE OR DELETE ON %1$I
+                    FOR EACH ROW
+                    EXECUTE FUNCTION audit_trigger_function(%1$L)',
+                v_table
+            );
+        ELSIF p_mode = 'statement' THEN
+            -- Таблицы переходов допускают только одно событие на триггер
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_insert_trigger
+                    AFTER INSERT ON %1$I
+                    REFERENCING NEW TABLE AS new_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function()',
+                v_table
+            );
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_update_trigger
+                    AFTER UPDATE ON %1$I
+                    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function(%2$L)',
+                v_table,
+                CASE WHEN p_changed_only THEN 'changed_only' ELSE 'full' END
+            );
+            EXECUTE format(
+                'CREATE TRIGGER audit_%1$s_delete_trigger
+                    AFTER DELETE ON %1$I
+                    REFERENCING OLD TABLE AS old_rows
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION audit_statement_trigger_function()',
+                v_table
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT set_audit_mode('statement');
+
+CREATE TRIGGER account_balance_insert_trigger
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+CREATE TRIGGER account_balance_update_trigger
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+CREATE TRIGGER account_balance_delete_trigger
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_account_balance();
+
+CREATE TRIGGER set_transaction_user_id_trigger
+    BEFORE INSERT OR UPDATE OF account_id ON transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_transaction_user_id();
+
+CREATE TRIGGER monthly_totals_insert_trigger
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
+
+CREATE TRIGGER monthly_totals_update_trigger
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
+
+CREATE TRIGGER monthly_totals_delete_trigger
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION update_monthly_category_totals();
+
+CREATE TRIGGER update_transactions_updated_at
+    BEFORE UPDATE ON transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Представления, удаленные вместе со старой таблицей
+
+-- Представление: Месячные доходы и расходы
+CREATE OR REPLACE VIEW v_monthly_financial_summary AS
+SELECT 
+    t.user_id,
+    DATE_TRUNC('month', t.date)::DATE AS month,
+    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
+    SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
+    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) - 
+    SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS net_income,
+    COUNT(CASE WHEN t.type = 'income' THEN 1 END) AS income_count,
+    COUNT(CASE WHEN t.type = 'expense' THEN 1 END) AS expense_count,
+    COUNT(*) AS total_transactions
+FROM transactions t
+GROUP BY t.user_id, DATE_TRUNC('month', t.date)
+ORDER BY t.user_id, month DESC;
+
+COMMENT ON VIEW v_monthly_financial_summary IS 'Месячная сводка доходов и расходов по пользователям';
+
+-- Представление: Расходы по категориям за текущий месяц
+CREATE OR REPLACE VIEW v_current_month_expenses_by_category AS
+SELECT 
+    t.user_id,
+    c.id AS category_id,
+    c.name AS category_name,
+    c.parent_id,
+    COALESCE(parent_cat.name, 'Без родительской категории') AS parent_category_name,
+    SUM(t.amount) AS total_amount,
+    COUNT(t.id) AS transaction_count,
+    AVG(t.amount) AS avg_amount,
+    MIN(t.amount) AS min_amount,
+    MAX(t.amount) AS max_amount,
+    c.budget_limit,
+    CASE 
+        WHEN c.budget_limit > 0 THEN 
+            (SUM(t.amount) / c.budget_limit) * 100.00
+        ELSE NULL
+    END AS budget_usage_percent
+FROM transactions t
+JOIN categories c ON t.category_id = c.id
+LEFT JOIN categories parent_cat ON c.parent_id = parent_cat.id
+WHERE t.type = 'expense'
+  AND t.date >= DATE_TRUNC('month', CURRENT_DATE)::DATE
+GROUP BY t.user_id, c.id, c.name, c.parent_id, parent_cat.name, c.budget_limit
+ORDER BY t.user_id, total_amount DESC;
+
+COMMENT ON VIEW v_current_month_expenses_by_category IS 'Расходы по категориям за текущий месяц с анализом бюджета';
+
+-- Представление: Топ транзакций по сумме
+CREATE OR REPLACE VIEW v_top_transactions AS
+SELECT 
+    t.id AS transaction_id,
+    t.user_id,
+    a.name AS account_name,
+    c.name AS category_name,
+    t.amount,
+    t.type,
+    t.date,
+    t.description,
+    t.payee,
+    ROW_NUMBER() OVER (
+        PARTITION BY t.user_id, t.type 
+        ORDER BY t.amount DESC, t.date DESC
+    ) AS rank_by_type
+FROM transactions t
+JOIN accounts a ON t.account_id = a.id
+LEFT JOIN categories c ON t.category_id = c.id
+ORDER BY t.user_id, t.type, t.amount DESC;
+
+COMMENT ON VIEW v_top_transactions IS 'Топ транзакций по сумме с ранжированием';
+
+-- Представление: Анализ регулярных платежей
+CREATE OR REPLACE VIEW v_recurring_transactions_analysis AS
+SELECT 
+    rt.id AS recurring_id,
+    rt.user_id,
+    u.email,
+    rt.description,
+    rt.amount,
+    rt.type,
+    rt.interval,
+    rt.next_date,
+    rt.end_date,
+    rt.is_active,
+    COUNT(t.id) AS executed_count,
+    SUM(t.amount) AS total_executed_amount,
+    MIN(t.date) AS first_execution_date,
+    MAX(t.date) AS last_execution_date,
+    CASE 
+        WHEN rt.interval = 'daily' THEN rt.amount * 30
+        WHEN rt.interval = 'weekly' THEN rt.amount * 4
+        WHEN rt.interval = 'monthly' THEN rt.amount
+        WHEN rt.interval = 'yearly' THEN rt.amount / 12
+        ELSE 0
+    END AS estimated_monthly_amount
+FROM recurring_transactions rt
+JOIN users u ON rt.user_id = u.id
+LEFT JOIN transactions t ON rt.id = t.recurring_transaction_id
+GROUP BY rt.id, rt.user_id, u.email, rt.description, rt.amount, rt.type, 
+         rt.interval, rt.next_date, rt.end_date, rt.is_active
+ORDER BY rt.user_id, estimated_monthly_amount DESC;
+
+COMMENT ON VIEW v_recurring_transactions_analysis IS 'Анализ регулярных транзакций с расчетом статистики';
+
+-- Представление: Сводка по тегам
+CREATE OR REPLACE VIEW v_tags_summary AS
+SELECT 
+    tg.user_id,
+    tg.id AS tag_id,
+    tg.name AS tag_name,
+    COUNT(DISTINCT tt.transaction_id) AS transaction_count,
+    SUM(t.amount) AS total_amount,
+    AVG(t.amount) AS avg_amount,
+    MIN(t.date) AS first_use_date,
+    MAX(t.date) AS last_use_date
+FROM tags tg
+LEFT JOIN transaction_tags tt ON tg.id = tt.tag_id
+LEFT JOIN transactions t ON tt.transaction_id = t.id
+GROUP BY tg.user_id, tg.id, tg.name
+ORDER BY tg.user_id, transaction_count DESC;
+
+COMMENT ON VIEW v_tags_summary IS 'Сводная информация по использованию тегов';
+
+-- Представление: Бюджеты с текущим статусом
+CREATE OR REPLACE VIEW v_budgets_with_status AS
+SELECT 
+    b.id AS budget_id,
+    b.user_id,
+    b.category_id,
+    COALESCE(c.name, 'Общий бюджет') AS category_name,
+    b.amount AS budget_amount,
+    b.period,
+    b.start_date,
+    b.end_date,
+    b.is_active,
+    CASE 
+        WHEN b.period = 'month' THEN 
+            DATE_TRUNC('month', CURRENT_DATE)::DATE
+        WHEN b.period = 'year' THEN 
+            DATE_TRUNC('year', CURRENT_DATE)::DATE
+    END AS current_period_start,
+    CASE 
+        WHEN b.period = 'month' THEN 
+            (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+        WHEN b.period = 'year' THEN 
+            (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+    END AS current_period_end,
+    COALESCE(SUM(CASE 
+        WHEN t.type = 'expense' 
+        AND t.date >= CASE 
+            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+        END
+        AND t.date <= CASE 
+            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+        END
+        THEN t.amount ELSE 0 
+    END), 0.00) AS spent_amount,
+    GREATEST(0.00, b.amount - COALESCE(SUM(CASE 
+        WHEN t.type = 'expense' 
+        AND t.date >= CASE 
+            WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+            WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+        END
+        AND t.date <= CASE 
+            WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+            WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+        END
+        THEN t.amount ELSE 0 
+    END), 0.00)) AS remaining_amount,
+    CASE 
+        WHEN b.amount > 0 THEN 
+            LEAST(100.00, (COALESCE(SUM(CASE 
+                WHEN t.type = 'expense' 
+                AND t.date >= CASE 
+                    WHEN b.period = 'month' THEN DATE_TRUNC('month', CURRENT_DATE)::DATE
+                    WHEN b.period = 'year' THEN DATE_TRUNC('year', CURRENT_DATE)::DATE
+                END
+                AND t.date <= CASE 
+                    WHEN b.period = 'month' THEN (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month - 1 day')::DATE
+                    WHEN b.period = 'year' THEN (DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year - 1 day')::DATE
+                END
+                THEN t.amount ELSE 0 
+            END), 0.00) / b.amount) * 100.00)
+        ELSE 0.00
+    END AS usage_percent
+FROM budgets b
+LEFT JOIN categories c ON b.category_id = c.id
+LEFT JOIN transactions t ON (
+    t.user_id = b.user_id
+    AND (b.category_id IS NULL OR t.category_id = b.category_id)
+)
+WHERE b.is_active = TRUE
+GROUP BY b.id, b.user_id, b.category_id, c.name, b.amount, b.period, 
+         b.start_date, b.end_date, b.is_active
+ORDER BY b.user_id, usage_percent DESC;
+
+COMMENT ON VIEW v_budgets_with_status IS 'Бюджеты с текущим статусом использования за текущий период';
+
+COMMIT;
+
+ANALYZE transactions;
+ANALYZE transaction_tags;
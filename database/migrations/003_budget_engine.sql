@@ -0,0 +1,170 @@
+-- FinFlow Migration 003
+-- Оценка месячных и годовых бюджетов (evaluate_user_budgets) для существующей базы
+-- (новые базы получают эти функции и представления из 02_functions.sql и 04_views.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/003_budget_engine.sql
+--
+-- Данные не меняются: пересоздаются get_budget_status_report (добавлены столбцы
+-- period, period_start, period_end) и v_budgets_with_status
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+-- Функция оценки бюджетов пользователя на дату
+-- Период бюджета - календарный месяц или год, содержащий p_on_date, обрезанный
+-- по start_date/end_date бюджета; бюджеты, не действующие в этом периоде,
+-- не возвращаются. Расходы всех бюджетов считаются за один проход по
+-- idx_transactions_user_date_id (index-only scan по user_id и общему диапазону
+-- дат), бюджет без категории учитывает все расходы пользователя
+CREATE OR REPLACE FUNCTION evaluate_user_budgets(
+    p_user_id INTEGER,
+    p_on_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    budget_id INTEGER,
+    category_id INTEGER,
+    category_name VARCHAR(255),
+    period budget_period,
+    period_start DATE,
+    period_end DATE,
+    budget_amount DECIMAL(15, 2),
+    spent_amount DECIMAL(15, 2),
+    remaining DECIMAL(15, 2),
+    percentage_used DECIMAL(5, 2),
+    is_exceeded BOOLEAN
+) AS $$
+    WITH windows AS MATERIALIZED (
+        SELECT 
+            b.id,
+            b.category_id,
+            b.period,
+            b.amount,
+            GREATEST(p.period_start, b.start_date) AS window_start,
+            LEAST(p.period_end, b.end_date) AS window_end
+        FROM budgets b
+        CROSS JOIN LATERAL (
+            SELECT 
+                DATE_TRUNC(b.period::TEXT, p_on_date)::DATE AS period_start,
+                (DATE_TRUNC(b.period::TEXT, p_on_date) + CASE b.period
+                    WHEN 'month' THEN INTERVAL '1 month - 1 day'
+                    ELSE INTERVAL '1 year - 1 day'
+                END)::DATE AS period_end
+        ) p
+        WHERE b.user_id = p_user_id
+          AND b.is_active = TRUE
+          AND b.start_date <= p.period_end
+          AND (b.end_date IS NULL OR b.end_date >= p.period_start)
+    ),
+    daily AS (
+        SELECT t.date, t.category_id, SUM(t.amount) AS amount
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.type = 'expense'
+          AND t.date >= (SELECT MIN(w.window_start) FROM windows w)
+          AND t.date <= (SELECT MAX(w.window_end) FROM windows w)
+        GROUP BY t.date, t.category_id
+    ),
+    spent AS (
+        SELECT w.id, COALESCE(SUM(d.amount), 0.00) AS amount
+        FROM windows w
+        LEFT JOIN daily d ON d.date BETWEEN w.window_start AND w.window_end
+            AND (w.category_id IS NULL OR d.category_id = w.category_id)
+        GROUP BY w.id
+    )
+    SELECT 
+        w.id AS budget_id,
+        w.category_id,
+        COALESCE(c.name, 'Общий бюджет')::VARCHAR(255) AS category_name,
+        w.period,
+        w.window_start AS period_start,
+        w.window_end AS period_end,
+        w.amount AS budget_amount,
+        s.amount::DECIMAL(15, 2) AS spent_amount,
+        GREATEST(0.00, w.amount - s.amount)::DECIMAL(15, 2) AS remaining,
+        (CASE 
+            WHEN w.amount > 0 THEN LEAST(100.00, (s.amount / w.amount) * 100.00)
+            ELSE 0.00
+        END)::DECIMAL(5, 2) AS percentage_used,
+        s.amount > w.amount AS is_exceeded
+    FROM windows w
+    JOIN spent s ON s.id = w.id
+    LEFT JOIN categories c ON c.id = w.category_id
+    ORDER BY percentage_used DESC, w.id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION evaluate_user_budgets(INTEGER, DATE) IS 
+'Возвращает статус месячных и годовых бюджетов пользователя за период, содержащий дату';
+
+-- Функция получения отчета по бюджетам за месяц: месячные бюджеты - за этот
+-- месяц, годовые - за его год
+-- Набор столбцов изменился (period, period_start, period_end), поэтому
+-- прежняя версия удаляется
+DROP FUNCTION IF EXISTS get_budget_status_report(INTEGER, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION get_budget_status_report(
+    p_user_id INTEGER,
+    p_year INTEGER,
+    p_month INTEGER
+)
+RETURNS TABLE (
+    budget_id INTEGER,
+    category_name VARCHAR(255),
+    period budget_period,
+    period_start DATE,
+    period_end DATE,
+    budget_amount DECIMAL(15, 2),
+    spent_amount DECIMAL(15, 2),
+    remaining DECIMAL(15, 2),
+    percentage_used DECIMAL(5, 2),
+    is_exceeded BOOLEAN
+) AS $$
+    SELECT 
+        e.budget_id,
+        e.category_name,
+        e.period,
+        e.period_start,
+        e.period_end,
+        e.budget_amount,
+        e.spent_amount,
+        e.remaining,
+        e.percentage_used,
+        e.is_exceeded
+    FROM evaluate_user_budgets(p_user_id, MAKE_DATE(p_year, p_month, 1)) e
+    ORDER BY e.percentage_used DESC, e.budget_id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_budget_status_report(INTEGER, INTEGER, INTEGER) IS 
+'Возвращает отчет о статусе месячных и годовых бюджетов за указанный месяц';
+
+-- Представление: Бюджеты с текущим статусом
+-- Статус считается evaluate_user_budgets отдельно для каждого пользователя,
+-- поэтому выборка с WHERE user_id = ... читает только его транзакции.
+-- Набор и типы столбцов изменились, поэтому прежняя версия удаляется
+DROP VIEW IF EXISTS v_budgets_with_status;
+
+CREATE VIEW v_budgets_with_status AS
+SELECT 
+    b.id AS budget_id,
+    u.id AS user_id,
+    b.category_id,
+    s.category_name,
+    b.amount AS budget_amount,
+    b.period,
+    b.start_date,
+    b.end_date,
+    b.is_active,
+    s.period_start AS current_period_start,
+    s.period_end AS current_period_end,
+    s.spent_amount,
+    s.remaining AS remaining_amount,
+    s.percentage_used AS usage_percent
+FROM users u
+CROSS JOIN LATERAL evaluate_user_budgets(u.id, CURRENT_DATE) s
+JOIN budgets b ON b.id = s.budget_id
+ORDER BY u.id, usage_percent DESC;
+
+COMMENT ON VIEW v_budgets_with_status IS 'Бюджеты с текущим статусом использования за текущий период';
+
+COMMIT;
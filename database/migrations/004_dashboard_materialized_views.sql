@@ -0,0 +1,218 @@
+-- FinFlow Migration 004
+-- Материализованные представления дашборда для существующей базы
+-- (после миграции 003; новые базы получают их из 08_materialized_views.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/004_dashboard_materialized_views.sql
+--
+-- Представления заполняются при создании, время выполнения пропорционально
+-- объему данных; время обновления фиксируется первым запуском
+--   python -m app.commands.refresh_dashboard --force
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+-- ============================================
+-- МАТЕРИАЛИЗОВАННЫЕ ПРЕДСТАВЛЕНИЯ
+-- ============================================
+
+-- 1. Сводка по счетам пользователя (v_user_accounts_summary)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_user_accounts_summary AS
+SELECT
+    a.user_id,
+    COUNT(*) AS total_accounts,
+    COUNT(*) FILTER (WHERE a.is_active) AS active_accounts,
+    COALESCE(SUM(a.balance) FILTER (WHERE a.is_active), 0.00) AS total_balance,
+    COALESCE(SUM(a.balance) FILTER (WHERE a.is_active AND a.type = 'cash'), 0.00) AS cash_balance,
+    COALESCE(SUM(a.balance) FILTER (WHERE a.is_active AND a.type = 'debit_card'), 0.00) AS debit_balance,
+    COALESCE(SUM(a.balance) FILTER (WHERE a.is_active AND a.type = 'credit_card'), 0.00) AS credit_balance,
+    COALESCE(SUM(a.balance) FILTER (WHERE a.is_active AND a.type = 'deposit'), 0.00) AS deposit_balance
+FROM accounts a
+GROUP BY a.user_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_user_accounts_summary_user
+    ON mv_user_accounts_summary(user_id);
+
+COMMENT ON MATERIALIZED VIEW mv_user_accounts_summary IS 'Сводная информация по счетам пользователей (материализованная)';
+
+-- 2. Месячные доходы и расходы (v_monthly_financial_summary)
+-- Считается по помесячным агрегатам monthly_category_totals, а не по transactions
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_monthly_financial_summary AS
+SELECT
+    m.user_id,
+    m.month,
+    SUM(m.total_income)::DECIMAL(15, 2) AS total_income,
+    SUM(m.total_expense)::DECIMAL(15, 2) AS total_expense,
+    (SUM(m.total_income) - SUM(m.total_expense))::DECIMAL(15, 2) AS net_income,
+    SUM(m.income_count)::BIGINT AS income_count,
+    SUM(m.expense_count)::BIGINT AS expense_count,
+    SUM(m.transaction_count)::BIGINT AS total_transactions
+FROM monthly_category_totals m
+GROUP BY m.user_id, m.month
+HAVING SUM(m.transaction_count) > 0;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_monthly_financial_summary_user_month
+    ON mv_monthly_financial_summary(user_id, month DESC);
+
+COMMENT ON MATERIALIZED VIEW mv_monthly_financial_summary IS 'Месячная сводка доходов и расходов по пользователям (материализованная)';
+
+-- 3. Расходы по категориям за текущий месяц (v_current_month_expenses_by_category)
+-- Текущий месяц определяется в момент обновления
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_current_month_expenses_by_category AS
+SELECT
+    t.user_id,
+    DATE_TRUNC('month', CURRENT_DATE)::DATE AS month,
+    c.id AS category_id,
+    c.name AS category_name,
+    c.parent_id,
+    COALESCE(parent_cat.name, 'Без родительской категории') AS parent_category_name,
+    SUM(t.amount) AS total_amount,
+    COUNT(t.id) AS transaction_count,
+    AVG(t.amount)::DECIMAL(15, 2) AS avg_amount,
+    MIN(t.amount) AS min_amount,
+    MAX(t.amount) AS max_amount,
+    c.budget_limit,
+    CASE
+        WHEN c.budget_limit > 0 THEN
+            ((SUM(t.amount) / c.budget_limit) * 100.00)::DECIMAL(10, 2)
+        ELSE NULL
+    END AS budget_usage_percent
+FROM transactions t
+JOIN categories c ON t.category_id = c.id
+LEFT JOIN categories parent_cat ON c.parent_id = parent_cat.id
+WHERE t.type = 'expense'
+  AND t.date >= DATE_TRUNC('month', CURRENT_DATE)::DATE
+GROUP BY t.user_id, c.id, c.name, c.parent_id, parent_cat.name, c.budget_limit;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_current_month_expenses_user_category
+    ON mv_current_month_expenses_by_category(user_id, category_id);
+
+COMMENT ON MATERIALIZED VIEW mv_current_month_expenses_by_category IS 'Расходы по категориям за текущий месяц (материализованная)';
+
+-- 4. Сводка по тегам (v_tags_summary)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tags_summary AS
+SELECT
+    tg.user_id,
+    tg.id AS tag_id,
+    tg.name AS tag_name,
+    COUNT(t.id) AS transaction_count,
+    COALESCE(SUM(t.amount), 0.00) AS total_amount,
+    AVG(t.amount)::DECIMAL(15, 2) AS avg_amount,
+    MIN(t.date) AS first_use_date,
+    MAX(t.date) AS last_use_date
+FROM tags tg
+LEFT JOIN transaction_tags tt ON tt.tag_id = tg.id
+LEFT JOIN transactions t ON t.id = tt.transaction_id AND t.date = tt.transaction_date
+GROUP BY tg.user_id, tg.id, tg.name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_tags_summary_user_tag
+    ON mv_tags_summary(user_id, tag_id);
+
+COMMENT ON MATERIALIZED VIEW mv_tags_summary IS 'Сводная информация по использованию тегов (материализованная)';
+
+-- 5. Бюджеты с текущим статусом (v_budgets_with_status)
+-- Строится по evaluate_user_budgets, а не по v_budgets_with_status, чтобы
+-- представление можно было пересоздать
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_budgets_with_status AS
+SELECT
+    u.user_id,
+    s.budget_id,
+    s.category_id,
+    s.category_name,
+    s.period,
+    s.period_start,
+    s.period_end,
+    s.budget_amount,
+    s.spent_amount,
+    s.remaining,
+    s.percentage_used,
+    s.is_exceeded
+FROM (SELECT DISTINCT b.user_id FROM budgets b WHERE b.is_active = TRUE) u
+CROSS JOIN LATERAL evaluate_user_budgets(u.user_id, CURRENT_DATE) s;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_budgets_with_status_user_budget
+    ON mv_budgets_with_status(user_id, budget_id);
+
+COMMENT ON MATERIALIZED VIEW mv_budgets_with_status IS 'Бюджеты со статусом за текущий период (материализованная)';
+
+-- ============================================
+-- ОБНОВЛЕНИЕ
+-- ============================================
+
+-- Интервалы обновления и время последнего обновления (актуальность данных)
+CREATE TABLE IF NOT EXISTS dashboard_view_refreshes (
+    view_name TEXT PRIMARY KEY,
+    refresh_interval INTERVAL NOT NULL,
+    last_refreshed_at TIMESTAMP WITH TIME ZONE,
+    last_duration_ms DECIMAL(12, 2),
+    last_error TEXT,
+    last_error_at TIMESTAMP WITH TIME ZONE,
+    CONSTRAINT refresh_interval_positive CHECK (refresh_interval > INTERVAL '0')
+);
+
+COMMENT ON TABLE dashboard_view_refreshes IS 'Расписание и состояние обновления материализованных представлений дашборда';
+
+-- Интервал можно изменить UPDATE без перезапуска планировщика
+INSERT INTO dashboard_view_refreshes (view_name, refresh_interval) VALUES
+    ('mv_user_accounts_summary', INTERVAL '1 minute'),
+    ('mv_monthly_financial_summary', INTERVAL '5 minutes'),
+    ('mv_current_month_expenses_by_category', INTERVAL '2 minutes'),
+    ('mv_tags_summary', INTERVAL '15 minutes'),
+    ('mv_budgets_with_status', INTERVAL '2 minutes')
+ON CONFLICT (view_name) DO NOTHING;
+
+-- Функция обновления материализованного представления дашборда
+-- Обновляет представление, если подошел его интервал (или p_force), и
+-- возвращает TRUE; строка расписания блокируется до конца транзакции, поэтому
+-- параллельные планировщики не обновляют одно представление дважды
+-- (занятое представление пропускается). Первое заполнение выполняется
+-- без CONCURRENTLY
+CREATE OR REPLACE FUNCTION refresh_dashboard_view(
+    p_view_name TEXT,
+    p_force BOOLEAN DEFAULT FALSE
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_started TIMESTAMP WITH TIME ZONE := clock_timestamp();
+    v_populated BOOLEAN;
+BEGIN
+    PERFORM 1
+    FROM dashboard_view_refreshes r
+    WHERE r.view_name = p_view_name
+      AND (p_force OR r.last_refreshed_at IS NULL
+           OR r.last_refreshed_at + r.refresh_interval <= v_started)
+    FOR UPDATE SKIP LOCKED;
+    
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+    
+    SELECT c.relispopulated INTO v_populated
+    FROM pg_class c
+    WHERE c.oid = to_regclass(p_view_name) AND c.relkind = 'm';
+    
+    IF v_populated IS NULL THEN
+        RAISE EXCEPTION 'Materialized view % does not exist', p_view_name;
+    ELSIF v_populated THEN
+        EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', p_view_name);
+    ELSE
+        EXECUTE format('REFRESH MATERIALIZED VIEW %I', p_view_name);
+    END IF;
+    
+    -- Данные соответствуют снимку на начало обновления
+    UPDATE dashboard_view_refreshes
+    SET last_refreshed_at = v_started,
+        last_duration_ms = EXTRACT(EPOCH FROM clock_timestamp() - v_started) * 1000,
+        last_error = NULL,
+        last_error_at = NULL
+    WHERE view_name = p_view_name;
+    
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION refresh_dashboard_view(TEXT, BOOLEAN) IS
+'Обновляет материализованное представление дашборда, если подошел его интервал';
+
+COMMIT;
@@ -0,0 +1,214 @@
+-- FinFlow Migration 005
+-- Отсчет дат регулярных платежей от закрепленной даты start_date для
+-- существующей базы (новые базы получают эту схему из 01_schema.sql,
+-- 02_functions.sql и 03_triggers.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/005_recurring_anchor.sql
+--
+-- Раньше каждая дата считалась от next_date, и ограничение концом месяца
+-- сохранялось навсегда (31.01 -> 28.02 -> 28.03). Дата отсчета и число
+-- наступивших дат восстанавливаются по уже созданным транзакциям; next_date
+-- пересчитывается, если новая дата попадает в тот же месяц (исправляется
+-- только сдвиг дня). Остальные расписания отсчитываются от текущей next_date
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+LOCK TABLE recurring_transactions IN SHARE ROW EXCLUSIVE MODE;
+
+ALTER TABLE recurring_transactions
+    ADD COLUMN start_date DATE,
+    ADD COLUMN occurrence_count INTEGER NOT NULL DEFAULT 0,
+    ADD CONSTRAINT occurrence_count_non_negative CHECK (occurrence_count >= 0);
+
+WITH history AS (
+    SELECT 
+        r.id,
+        MIN(t.date) AS start_date,
+        COUNT(DISTINCT t.date)::INTEGER AS occurrence_count
+    FROM recurring_transactions r
+    JOIN transactions t ON t.recurring_transaction_id = r.id AND t.date < r.next_date
+    GROUP BY r.id
+),
+anchored AS (
+    SELECT 
+        h.*,
+        recurring_occurrence(h.start_date, r.interval, h.occurrence_count) AS new_next
+    FROM history h
+    JOIN recurring_transactions r ON r.id = h.id
+    WHERE DATE_TRUNC('month', recurring_occurrence(h.start_date, r.interval, h.occurrence_count))
+        = DATE_TRUNC('month', r.next_date)
+)
+UPDATE recurring_transactions r
+SET start_date = a.start_date,
+    occurrence_count = a.occurrence_count,
+    next_date = CASE 
+        WHEN NOT r.is_active OR (r.end_date IS NOT NULL AND a.new_next > r.end_date) THEN r.next_date
+        ELSE a.new_next
+    END,
+    is_active = r.is_active AND (r.end_date IS NULL OR a.new_next <= r.end_date)
+FROM anchored a
+WHERE r.id = a.id;
+
+UPDATE recurring_transactions
+SET start_date = next_date
+WHERE start_date IS NULL;
+
+ALTER TABLE recurring_transactions ALTER COLUMN start_date SET NOT NULL;
+
+-- Функция закрепления даты отсчета регулярного платежа
+-- При вставке без start_date отсчет начинается с next_date. Изменение
+-- next_date или interval извне (материализация меняет и occurrence_count)
+-- начинает отсчет заново с новой next_date
+CREATE OR REPLACE FUNCTION set_recurring_anchor()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.start_date IS NULL THEN
+            NEW.start_date := NEW.next_date;
+            NEW.occurrence_count := 0;
+        END IF;
+    ELSIF NEW.occurrence_count = OLD.occurrence_count
+          AND NEW.start_date = OLD.start_date
+          AND (NEW.next_date <> OLD.next_date OR NEW.interval <> OLD.interval) THEN
+        NEW.start_date := NEW.next_date;
+        NEW.occurrence_count := 0;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_recurring_anchor_trigger
+    BEFORE INSERT OR UPDATE OF next_date, interval ON recurring_transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_recurring_anchor();
+
+COMMENT ON FUNCTION set_recurring_anchor() IS 'Закрепляет дату отсчета регулярного платежа';
+
+-- Функция материализации наступивших регулярных платежей (одна пачка)
+-- Берет до p_batch_size активных расписаний с next_date <= p_as_of после ключа
+-- (p_after_date, p_after_id), создает транзакции за все пропущенные даты
+-- (не более p_max_occurrences на расписание) одним INSERT и сдвигает next_date.
+-- Даты считаются от start_date по номерам начиная с occurrence_count, поэтому
+-- ограничение концом месяца не переносится на следующие даты.
+-- Повторный запуск не создает дублей: ON CONFLICT по (recurring_transaction_id, date).
+-- Расписания счетов, баланс которых ушел бы в минус, пропускаются.
+-- Возвращает счетчики пачки и ключ последнего расписания для следующего вызова
+CREATE OR REPLACE FUNCTION materialize_recurring_transactions(
+    p_as_of DATE DEFAULT CURRENT_DATE,
+    p_batch_size INTEGER DEFAULT 10000,
+    p_after_date DATE DEFAULT '-infinity',
+    p_after_id INTEGER DEFAULT 0,
+    p_max_occurrences INTEGER DEFAULT 366
+)
+RETURNS TABLE (
+    batch_schedules INTEGER,
+    created_transactions INTEGER,
+    skipped_schedules INTEGER,
+    cursor_date DATE,
+    cursor_id INTEGER
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH batch AS (
+        SELECT 
+            r.id,
+            r.account_id,
+            r.category_id,
+            r.description,
+            r.amount,
+            r.type,
+            r.interval,
+            r.start_date,
+            r.occurrence_count,
+            r.next_date,
+            LEAST(p_as_of, COALESCE(r.end_date, p_as_of)) AS until_date
+        FROM recurring_transactions r
+        WHERE r.is_active = TRUE
+          AND r.next_date <= p_as_of
+          AND (r.next_date, r.id) > (p_after_date, p_after_id)
+        ORDER BY r.next_date, r.id
+        LIMIT p_batch_size
+        -- Параллельные обработчики не ждут друг друга
+        FOR UPDATE SKIP LOCKED
+    ),
+    occurrences AS (
+        SELECT b.*, o.occ_date
+        FROM batch b
+        CROSS JOIN LATERAL (
+            SELECT recurring_occurrence(b.start_date, b.interval, gs.n) AS occ_date
+            FROM generate_series(
+                b.occurrence_count,
+                b.occurrence_count
+                    + LEAST(p_max_occurrences, recurring_occurrence_count(b.next_date, b.interval, b.until_date)) - 1
+            ) AS gs(n)
+        ) o
+        WHERE o.occ_date <= b.until_date
+    ),
+    blocked AS (
+        SELECT o.account_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        GROUP BY o.account_id, a.balance
+        HAVING a.balance + SUM(CASE o.type
+            WHEN 'income' THEN o.amount
+            WHEN 'expense' THEN -o.amount
+            ELSE 0
+        END) < 0
+    ),
+    ready AS (
+        SELECT o.*, a.user_id AS account_user_id
+        FROM occurrences o
+        JOIN accounts a ON a.id = o.account_id
+        WHERE o.account_id NOT IN (SELECT bl.account_id FROM blocked bl)
+    ),
+    inserted AS (
+        INSERT INTO transactions (
+            account_id, user_id, category_id, amount, type, date,
+            description, is_recurring, recurring_transaction_id
+        )
+        SELECT 
+            rd.account_id, rd.account_user_id, rd.category_id, rd.amount, rd.type, rd.occ_date,
+            rd.description, TRUE, rd.id
+        FROM ready rd
+        ON CONFLICT (recurring_transaction_id, date)
+            WHERE recurring_transaction_id IS NOT NULL
+            DO NOTHING
+        RETURNING 1
+    ),
+    advanced AS (
+        UPDATE recurring_transactions r
+        SET next_date = CASE 
+                WHEN r.end_date IS NOT NULL AND s.new_next > r.end_date THEN s.last_date
+                ELSE s.new_next
+            END,
+            occurrence_count = s.new_count,
+            is_active = (r.end_date IS NULL OR s.new_next <= r.end_date)
+        FROM (
+            SELECT 
+                rd.id,
+                MAX(rd.occ_date) AS last_date,
+                rd.occurrence_count + COUNT(*)::INTEGER AS new_count,
+                recurring_occurrence(rd.start_date, rd.interval, rd.occurrence_count + COUNT(*)::INTEGER) AS new_next
+            FROM ready rd
+            GROUP BY rd.id, rd.start_date, rd.occurrence_count, rd.interval
+        ) s
+        WHERE r.id = s.id
+    )
+    -- Изменяющие CTE выполняются полностью, даже если на них нет ссылок
+    SELECT 
+        (SELECT COUNT(*) FROM batch)::INTEGER,
+        (SELECT COUNT(*) FROM inserted)::INTEGER,
+        (SELECT COUNT(DISTINCT o.id) FROM occurrences o
+         WHERE o.account_id IN (SELECT bl.account_id FROM blocked bl))::INTEGER,
+        (SELECT b.next_date FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1),
+        (SELECT b.id FROM batch b ORDER BY b.next_date DESC, b.id DESC LIMIT 1);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION materialize_recurring_transactions(DATE, INTEGER, DATE, INTEGER, INTEGER) IS 
+'Создает транзакции по наступившим регулярным платежам (одна пачка расписаний)';
+
+COMMIT;
@@ -0,0 +1,99 @@
+-- FinFlow Migration 006
+-- Перенос строк из transactions_default в новую годовую секцию без срабатывания
+-- триггеров для существующей базы (новые базы получают функцию из 02_functions.sql)
+--
+-- Запуск:
+--   psql -U finflow_user -d finflow_db -f database/migrations/006_partition_move_triggers.sql
+--
+-- Раньше DELETE + INSERT при переносе вызывали триггеры аудита (в режиме 'row'
+-- - по записи на каждую строку), баланса и помесячных агрегатов. Данные не
+-- меняются, пересоздается только create_transaction_partitions
+
+\set ON_ERROR_STOP on
+
+BEGIN;
+
+-- Функция создания годовых секций transactions (transactions_yYYYY)
+-- Создает секции с p_years_back лет назад по p_years_ahead вперед, а также
+-- для всех лет, транзакции которых попали в transactions_default
+-- (например, при импорте старой выписки); существующие секции пропускает.
+-- Строки из transactions_default переносятся напрямую между секциями с
+-- отключенными пользовательскими триггерами секций: баланс, агрегаты и аудит
+-- (в режимах 'row' и 'statement') не меняются, теги переносятся вместе
+-- с транзакциями.
+-- Возвращает имена созданных секций
+CREATE OR REPLACE FUNCTION create_transaction_partitions(
+    p_years_ahead INTEGER DEFAULT 1,
+    p_years_back INTEGER DEFAULT 0
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_years DATE[];
+    v_year DATE;
+    v_name TEXT;
+    v_has_default_rows BOOLEAN;
+BEGIN
+    -- Годы выбираются заранее: открытый курсор по transactions_default
+    -- не дал бы отключить ее триггеры
+    SELECT ARRAY_AGG(y ORDER BY y) INTO v_years
+    FROM (
+        SELECT generate_series(
+            DATE_TRUNC('year', CURRENT_DATE) - make_interval(years => p_years_back),
+            DATE_TRUNC('year', CURRENT_DATE) + make_interval(years => p_years_ahead),
+            INTERVAL '1 year'
+        )::DATE AS y
+        UNION
+        SELECT DISTINCT DATE_TRUNC('year', date)::DATE FROM transactions_default
+    ) years;
+    
+    FOREACH v_year IN ARRAY v_years
+    LOOP
+        v_name := 'transactions_y' || TO_CHAR(v_year, 'YYYY');
+        CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+        
+        SELECT EXISTS (
+            SELECT 1 FROM transactions_default
+            WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+        ) INTO v_has_default_rows;
+        
+        IF v_has_default_rows THEN
+            -- Удаление из секции каскадно удаляет теги, поэтому они сохраняются заранее
+            CREATE TEMP TABLE transaction_tags_moved ON COMMIT DROP AS
+            SELECT * FROM transaction_tags
+            WHERE transaction_date >= v_year AND transaction_date < (v_year + INTERVAL '1 year')::DATE;
+            
+            CREATE TEMP TABLE transactions_moved (LIKE transactions) ON COMMIT DROP;
+            -- Перенос не меняет данных: балансы, агрегаты и аудит не трогаются
+            ALTER TABLE transactions_default DISABLE TRIGGER USER;
+            WITH moved AS (
+                DELETE FROM transactions_default
+                WHERE date >= v_year AND date < (v_year + INTERVAL '1 year')::DATE
+                RETURNING *
+            )
+            INSERT INTO transactions_moved SELECT * FROM moved;
+            ALTER TABLE transactions_default ENABLE TRIGGER USER;
+        END IF;
+        
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_year, (v_year + INTERVAL '1 year')::DATE
+        );
+        
+        IF v_has_default_rows THEN
+            EXECUTE format('ALTER TABLE %I DISABLE TRIGGER USER', v_name);
+            EXECUTE format('INSERT INTO %I SELECT * FROM transactions_moved', v_name);
+            EXECUTE format('ALTER TABLE %I ENABLE TRIGGER USER', v_name);
+            INSERT INTO transaction_tags SELECT * FROM transaction_tags_moved;
+            DROP TABLE transactions_moved;
+            DROP TABLE transaction_tags_moved;
+        END IF;
+        
+        RETURN NEXT v_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION create_transaction_partitions(INTEGER, INTEGER) IS 
+'Создает годовые секции транзакций на p_years_ahead лет вперед и для дат из секции по умолчанию';
+
+COMMIT;